@@ -9,9 +9,13 @@ import uuid
 from typing import Optional
 
 import interactions
-from interactions import slash_command
+from interactions import slash_command, Permissions, slash_default_member_permission
 from interactions.api.events import CommandError, CommandCompletion, Startup
-from backend.util import global_config
+from backend.util import global_config, database_backend, database_router, http_client, query_registry
+from backend.website.player_stats import player_stats
+from backend.website.profiles import profile_cache
+from backend.website.oauth.token_cache import token_cache
+from backend.website.oauth.rate_limits import rate_limited_client
 from version import __version__
 
 logger = logging.getLogger("OCE-4Mans")
@@ -151,6 +155,158 @@ class DevTools(interactions.Extension):
         )
         await ctx.send(embeds=embed)
 
+    @slash_command(
+        name="db-pool-stats",
+        description="Shows database pool pressure"
+    )
+    @slash_default_member_permission(Permissions.ADMINISTRATOR)
+    async def db_pool_stats_command(self, ctx: interactions.SlashContext) -> None:
+        """
+        Database pool statistics
+        Parameters:
+        - ctx: The context of the command.
+        Returns:
+        - None
+        Description:
+        Shows in-use vs idle connections, churn and acquire waits per caller.
+
+        Example usage:
+        /db-pool-stats
+        """
+        embeds = []
+        for pool in database_backend.pools():
+            stats = pool.stats()
+            embed = interactions.Embed(
+                title=f"Database pool ({stats['name']})",
+                description=(
+                    f"In use: **{stats['in_use']}** / limit **{stats['limit']}**\n"
+                    f"Idle: **{stats['idle']}** (size {stats['size']})\n"
+                    f"Connections opened: **{stats['connections_opened']}**"
+                ),
+                color=0x5f0dd9
+            )
+            for caller, caller_stats in stats["callers"].items():
+                embed.add_field(
+                    name=caller,
+                    value=(
+                        f"{caller_stats['acquires']} acquires\n"
+                        f"avg {caller_stats['avg_wait_ms']}ms / p95 {caller_stats['p95_wait_ms']}ms"
+                        f" / max {caller_stats['max_wait_ms']}ms"
+                    ),
+                    inline=True
+                )
+            embeds.append(embed)
+        if database_backend.dialect == "mysql" and database_router.replica_configured:
+            routing = database_router.stats()
+            embeds[-1].set_footer(
+                text=(
+                    f"Replica {'serving reads' if routing['replica_healthy'] else 'bypassed'}, "
+                    f"lag {routing['replica_lag']}s, {routing['fallbacks']} reads fell back to the primary"
+                )
+            )
+        await ctx.send(embeds=embeds)
+
+    @slash_command(
+        name="db-query-stats",
+        description="Shows which named queries dominate database time"
+    )
+    @slash_default_member_permission(Permissions.ADMINISTRATOR)
+    async def db_query_stats_command(self, ctx: interactions.SlashContext) -> None:
+        """
+        Named query statistics
+        Parameters:
+        - ctx: The context of the command.
+        Returns:
+        - None
+        Description:
+        Shows call counts and latency of the registered queries, heaviest first.
+
+        Example usage:
+        /db-query-stats
+        """
+        stats = query_registry.stats_by_total_time(limit=25)
+        embed = interactions.Embed(
+            title="Named queries",
+            description="Sorted by total time" if stats else "No queries have run yet.",
+            color=0x5f0dd9
+        )
+        for name, query_stats in stats.items():
+            embed.add_field(
+                name=name,
+                value=(
+                    f"{query_stats['calls']} calls, {query_stats['total_ms']}ms total\n"
+                    f"avg {query_stats['avg_ms']}ms / max {query_stats['max_ms']}ms"
+                ),
+                inline=True
+            )
+        await ctx.send(embeds=embed)
+
+    @slash_command(
+        name="cache-stats",
+        description="Shows how often the in-memory caches are hit"
+    )
+    @slash_default_member_permission(Permissions.ADMINISTRATOR)
+    async def cache_stats_command(self, ctx: interactions.SlashContext) -> None:
+        """
+        In-memory cache statistics
+        Parameters:
+        - ctx: The context of the command.
+        Returns:
+        - None
+        Description:
+        Shows the size, hits, misses and hit rate of the player stats, profile and token caches.
+
+        Example usage:
+        /cache-stats
+        """
+        embed = interactions.Embed(title="Caches", color=0x5f0dd9)
+        caches = (("Player stats", player_stats.stats()), ("Discord profiles", profile_cache.memory.stats()),
+                  ("Access tokens", token_cache.stats()))
+        for name, stats in caches:
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = f"{100 * stats['hits'] / lookups:.1f}%" if lookups else "n/a"
+            value = f"{stats['size']} cached\n{stats['hits']} hits / {stats['misses']} misses ({hit_rate})"
+            if "coalesced" in stats:
+                value += f"\n{stats['coalesced']} coalesced"
+            embed.add_field(name=name, value=value, inline=True)
+        await ctx.send(embeds=embed)
+
+    @slash_command(
+        name="http-stats",
+        description="Shows how well outbound HTTP connections are reused"
+    )
+    @slash_default_member_permission(Permissions.ADMINISTRATOR)
+    async def http_stats_command(self, ctx: interactions.SlashContext) -> None:
+        """
+        Outbound HTTP statistics
+        Parameters:
+        - ctx: The context of the command.
+        Returns:
+        - None
+        Description:
+        Shows requests made through the shared HTTP client, new vs reused connections, DNS cache use
+        and how often Discord's rate limits held requests back.
+
+        Example usage:
+        /http-stats
+        """
+        stats = http_client.stats()
+        limits = rate_limited_client.stats()
+        reuse_rate = f"{stats['reuse_rate']}%" if stats["reuse_rate"] is not None else "n/a"
+        embed = interactions.Embed(
+            title="Outbound HTTP",
+            description=(
+                f"Requests: **{stats['requests']}** ({stats['failed']} failed)\n"
+                f"Connections: **{stats['connections_created']}** opened, **{stats['connections_reused']}** reused"
+                f" ({reuse_rate})\n"
+                f"DNS cache: {stats['dns_cache_hits']} hits / {stats['dns_cache_misses']} misses\n"
+                f"Discord rate limits: **{limits['waiting']}** waiting now, {limits['queued']} queued, "
+                f"{limits['rate_limited']} 429s over {limits['requests']} requests ({limits['buckets']} buckets)"
+            ),
+            color=0x5f0dd9
+        )
+        await ctx.send(embeds=embed)
+
     @interactions.listen(CommandError, disable_default_listeners=True)
     async def on_command_error(self, event: CommandError) -> None:
         """
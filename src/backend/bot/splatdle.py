@@ -1,18 +1,183 @@
 """
 devtools.py
 """
+import asyncio
 import logging
-from typing import Optional
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
 
 import interactions
 from interactions import slash_command, slash_option, OptionType, Permissions, slash_default_member_permission
 from backend.util.database_context_manager import DBContextManager
 from backend.util.config import global_config
-from interactions.ext.paginators import Paginator
+from backend.website.splatdle import splatdle_days
+from backend.website.game_history import game_history
+from backend.website.histograms import histogram_dict, histograms
+from backend.website.rank_index import rank_index
+from backend.website.leaderboard_snapshots import leaderboard_snapshots
+from backend.website.profiles import profile_cache
+from backend.website.player_stats import player_stats
+from backend.website.guild_members import guild_membership
+from interactions.api.events import GuildAvailable, GuildJoin, GuildLeft, MemberAdd, MemberRemove, MemberUpdate
 
 logger = logging.getLogger("OCE-4Mans")
 
 
+def distribution_bars(distribution: Dict[str, int], width: int = 8) -> str:
+    """Draw a guess-count distribution as Wordle-style text bars.
+
+    Args:
+        distribution: Count per bucket label, as returned by ``histogram_dict``.
+        width: Length of the longest bar in characters (default: 8).
+
+    Returns:
+        One line per bucket.
+    """
+    most = max(distribution.values(), default=0)
+    lines = []
+    for label, count in distribution.items():
+        length = round(count / most * width) if most else 0
+        lines.append(f"`{label:>3}` {'🟩' * length if count else '⬛'} {count}")
+    return "\n".join(lines)
+
+
+class LeaderboardPaginator:
+    """Paginator over the shared leaderboard snapshots.
+
+    Pages come from ``leaderboard_snapshots``, which builds each page once
+    per snapshot version with keyset pagination and resolves names through
+    the profile cache, so every guild viewing the same page shares one
+    database read. The paginator only turns page rows into embeds.
+
+    Attributes:
+        bot: The Discord bot client instance.
+        board: Which leaderboard: "global", "today", "yesterday" or "guild".
+        title: Title of every page.
+        format_line: Formats one row of a page.
+        timeout: Seconds of inactivity after which the buttons are disabled.
+        guild_id: Guild whose members the "guild" board is narrowed to.
+    """
+
+    def __init__(self, bot: interactions.Client, board: str, title: str,
+                 format_line: Callable[[Dict[str, Any]], str], timeout: int = 300,
+                 guild_id: Optional[int] = None) -> None:
+        """Initialize the paginator; ``send`` shows the first page.
+
+        Args:
+            bot: The Discord bot client instance.
+            board: Which leaderboard: "global", "today", "yesterday" or "guild".
+            title: Title of every page.
+            format_line: Formats one row of a page.
+            timeout: Seconds of inactivity after which the buttons are disabled (default: 300).
+            guild_id: Guild whose members the "guild" board is narrowed to (default: None).
+        """
+        self.bot: interactions.Client = bot
+        self.board: str = board
+        self.guild_id: Optional[int] = guild_id
+        self.title: str = title
+        self.format_line: Callable[[Dict[str, Any]], str] = format_line
+        self.timeout: int = timeout
+        self.page_index: int = 0
+        self._has_next: bool = False
+        self._id: str = str(uuid.uuid4())
+        self._message: Optional[interactions.Message] = None
+        self._author_id: Optional[int] = None
+        self._timeout_task: Optional[asyncio.Task] = None
+
+    async def _page(self, index: int) -> Optional[interactions.Embed]:
+        """Render a page of the current snapshot.
+
+        Args:
+            index: Zero-based page number.
+
+        Returns:
+            The page, or None if it has no rows.
+        """
+        if self.board == "guild":
+            page = await leaderboard_snapshots.guild_page(self.guild_id, index, self.bot)
+        else:
+            page = await leaderboard_snapshots.page(self.board, index, self.bot)
+        if page is None:
+            return None
+        self._has_next = page.has_next
+        embed = interactions.Embed(title=self.title,
+                                   description="\n".join(self.format_line(row) for row in page.rows) + "\n",
+                                   color=global_config.theme_colour)
+        page_count = page.page_count(leaderboard_snapshots.per_page)
+        embed.set_footer(text=f"Page {index + 1}/{page_count}" if page_count else f"Page {index + 1}")
+        return embed
+
+    def _components(self, disable: bool = False) -> List[interactions.ActionRow]:
+        """Build the back and next buttons for the current page.
+
+        Args:
+            disable: Whether to disable both buttons (default: False).
+        """
+        return interactions.spread_to_rows(
+            interactions.Button(style=interactions.ButtonStyle.BLURPLE, emoji="⬅️", custom_id=f"{self._id}|back",
+                                disabled=disable or self.page_index == 0),
+            interactions.Button(style=interactions.ButtonStyle.BLURPLE, emoji="➡️", custom_id=f"{self._id}|next",
+                                disabled=disable or not self._has_next),
+        )
+
+    async def send(self, ctx: interactions.SlashContext) -> bool:
+        """Show the first page.
+
+        Args:
+            ctx: The slash command context.
+
+        Returns:
+            Whether there was anything to show.
+        """
+        page = await self._page(0)
+        if page is None:
+            return False
+        self.bot.add_component_callback(interactions.ComponentCommand(
+            name=f"LeaderboardPaginator:{self._id}",
+            callback=self._on_button,
+            listeners=[f"{self._id}|back", f"{self._id}|next"],
+        ))
+        self._message = await ctx.send(embeds=page, components=self._components())
+        self._author_id = ctx.author.id
+        self._timeout_task = asyncio.create_task(self._disable_after_timeout())
+        return True
+
+    async def _on_button(self, ctx: interactions.ComponentContext) -> None:
+        """Move to the previous or next page.
+
+        Args:
+            ctx: The button press context.
+        """
+        if ctx.author.id != self._author_id:
+            await ctx.send("This paginator is not for you", ephemeral=True)
+            return
+        index = self.page_index
+        if ctx.custom_id.endswith("|next") and self._has_next:
+            index += 1
+        elif ctx.custom_id.endswith("|back") and index > 0:
+            index -= 1
+        await ctx.defer(edit_origin=True)
+        # The leaderboard may have shrunk under a new snapshot; stay on the last page that exists
+        page = await self._page(index)
+        while page is None and index > 0:
+            index -= 1
+            page = await self._page(index)
+        self.page_index = index
+        await ctx.edit_origin(embeds=page, components=self._components())
+        self._timeout_task.cancel()
+        self._timeout_task = asyncio.create_task(self._disable_after_timeout())
+
+    async def _disable_after_timeout(self) -> None:
+        """Disable the buttons once nobody has pressed them for ``timeout`` seconds.
+        """
+        await asyncio.sleep(self.timeout)
+        try:
+            await self._message.edit(components=self._components(disable=True))
+        except Exception as e:
+            logger.debug(f"Could not disable leaderboard buttons: {e}")
+
+
 class SplatdleExt(interactions.Extension):
     """Splatdle game commands extension.
 
@@ -33,6 +198,81 @@ class SplatdleExt(interactions.Extension):
         self.bot = bot
         self.error_log_channel: Optional[interactions.GuildChannel] = None
 
+    @interactions.listen(MemberUpdate)
+    async def on_member_update(self, event: MemberUpdate) -> None:
+        """Refresh a player's cached profile when their name or avatar changes.
+
+        ``event.before`` cannot be compared against: it shares its user with
+        ``event.after`` and is missing for uncached members, so the profile
+        cache decides whether anything changed.
+
+        Args:
+            event: The gateway member update.
+        """
+        after = event.after
+        try:
+            await profile_cache.refresh(after.id, after.user.username, getattr(after.user.avatar, "hash", None))
+        except Exception as e:
+            logger.error(f"Failed to refresh the profile of {after.id}: {e}")
+
+    @interactions.listen(GuildJoin)
+    async def on_guild_join(self, event: GuildJoin) -> None:
+        """Index a guild's members when the bot joins it or starts up in it.
+
+        Args:
+            event: The gateway guild join.
+        """
+        await self._load_members(event.guild)
+
+    @interactions.listen(GuildAvailable)
+    async def on_guild_available(self, event: GuildAvailable) -> None:
+        """Index a guild's members if it was unavailable when the bot started.
+
+        Args:
+            event: The gateway guild available event.
+        """
+        await self._load_members(event.guild)
+
+    async def _load_members(self, guild: Optional[interactions.Guild]) -> None:
+        """Load a guild's members into the membership index, logging any failure.
+
+        Args:
+            guild: The guild, if it is cached.
+        """
+        if guild is None:
+            return
+        try:
+            await guild_membership.load(guild)
+        except Exception as e:
+            logger.error(f"Failed to index the members of guild {guild.id}: {e}")
+
+    @interactions.listen(GuildLeft)
+    async def on_guild_left(self, event: GuildLeft) -> None:
+        """Drop a guild the bot was removed from.
+
+        Args:
+            event: The gateway guild leave.
+        """
+        guild_membership.forget(event.guild_id)
+
+    @interactions.listen(MemberAdd)
+    async def on_member_add(self, event: MemberAdd) -> None:
+        """Add a new member to the membership index.
+
+        Args:
+            event: The gateway member add.
+        """
+        guild_membership.add(event.guild_id, event.member.id)
+
+    @interactions.listen(MemberRemove)
+    async def on_member_remove(self, event: MemberRemove) -> None:
+        """Remove a departed member from the membership index.
+
+        Args:
+            event: The gateway member remove.
+        """
+        guild_membership.remove(event.guild_id, event.member.id)
+
     @slash_command(
         name="splatdle-leaderboard",
         description="Show the splatdle leaderboard",
@@ -40,96 +280,107 @@ class SplatdleExt(interactions.Extension):
     @slash_option(
         name="today", description="whether to just show today's leaderboard", opt_type=OptionType.BOOLEAN
     )
-    async def leaderboard(self, ctx: interactions.SlashContext, today: bool = False) -> None:
+    @slash_option(
+        name="yesterday", description="whether to just show yesterday's leaderboard", opt_type=OptionType.BOOLEAN
+    )
+    @slash_option(
+        name="server", description="whether to just show players in this server", opt_type=OptionType.BOOLEAN
+    )
+    async def leaderboard(self, ctx: interactions.SlashContext, today: bool = False, yesterday: bool = False,
+                          server: bool = False) -> None:
         """Display the Splatdle leaderboard.
 
-        Shows either the global leaderboard (sorted by weighted score) or today's
-        leaderboard (sorted by guess count). Uses pagination for large lists.
+        Shows either the global leaderboard (sorted by weighted score), the
+        global leaderboard narrowed to this server's members, or a single
+        day's leaderboard (sorted by guess count) for today or yesterday. Uses
+        pagination for large lists.
 
         Args:
             ctx: The slash command context.
             today: Whether to show today's leaderboard only (default: False).
+            yesterday: Whether to show yesterday's leaderboard only (default: False).
+            server: Whether to show only this server's members on the global leaderboard (default: False).
         """
-        pages: list[interactions.Embed] = []
-        players_per_page: int = 10
-        counter: int = 0
-        embed: Optional[interactions.Embed] = None
         await ctx.defer()
 
         try:
-            if not today:
-                async with DBContextManager(use_dict=True) as cur:
-                    await cur.execute(
-                        "SELECT discord_id, average_guess_count, streak, times_played FROM UserStats "
-                        "ORDER BY (average_guess_count + 4.0 / SQRT(times_played)) ASC"
-                    )
-                    records = await cur.fetchall()
-                    title = "🏆 Global Splatdle Leaderboard (sorted by weighted score)"
-                    empty_message = "No players have completed a game yet. Be the first!"
-            else:
-                async with DBContextManager(use_dict=True) as cur:
-                    await cur.execute(
-                        "SELECT discord_id, guess_count FROM TodaysLeaderboard ORDER BY guess_count ASC"
-                    )
-                    records = await cur.fetchall()
-                    title = "📅 Today's Splatdle Leaderboard"
+            if server and not (yesterday or today):
+                if ctx.guild is None:
+                    await ctx.send("❌ The server leaderboard can only be shown in a server.")
+                    return
+                if guild_membership.members(ctx.guild.id) is None:
+                    asyncio.create_task(self._load_members(ctx.guild))
+                    await ctx.send("⏳ Still loading this server's members, try again in a moment.")
+                    return
+                paginator = LeaderboardPaginator(
+                    self.bot,
+                    board="guild",
+                    title=f"🏆 {ctx.guild.name} Splatdle Leaderboard (sorted by weighted score)",
+                    format_line=self._global_line,
+                    guild_id=ctx.guild.id,
+                )
+                empty_message = "No one in this server has completed a game yet. Be the first!"
+            elif yesterday or today:
+                paginator = LeaderboardPaginator(
+                    self.bot,
+                    board="yesterday" if yesterday else "today",
+                    title="📅 Yesterday's Splatdle Leaderboard" if yesterday else "📅 Today's Splatdle Leaderboard",
+                    format_line=self._day_line,
+                )
+                if yesterday:
+                    empty_message = "No one played yesterday."
+                else:
                     empty_message = "No one has played today yet. Be the first!"
+            else:
+                paginator = LeaderboardPaginator(
+                    self.bot,
+                    board="global",
+                    title="🏆 Global Splatdle Leaderboard (sorted by weighted score)",
+                    format_line=self._global_line,
+                )
+                empty_message = "No players have completed a game yet. Be the first!"
 
-            if not records:
+            if not await paginator.send(ctx):
                 embed = interactions.Embed(
-                    title=title,
+                    title=paginator.title,
                     description=empty_message,
                     color=global_config.theme_colour
                 )
                 await ctx.send(embed=embed)
-                return
-            for i, record in enumerate(records):
-                try:
-                    user = await self.bot.fetch_user(record["discord_id"])
-
-                    if today:
-                        line = f"**{i+1}.** {user.username} - {record['guess_count']} guesses"
-                    else:
-                        streak_emoji = "🔥" if record['streak'] > 0 else "💔"
-                        weighted_score = record['average_guess_count'] + 2.0 / (record['times_played'] ** 0.5)
-                        line = (
-                            f"**{i+1}.** {user.username} - {record['average_guess_count']:.1f} avg"
-                            f"(weighted: {weighted_score:.1f}) ({record['times_played']} games)"
-                            f"{streak_emoji}{record['streak']}"
-                        )
-
-                    if not counter:
-                        embed = interactions.Embed(
-                            title=title,
-                            description=line + "\n",
-                            color=global_config.theme_colour
-                        )
-                        counter += 1
-                    else:
-                        embed.description += line + "\n"
-                        counter += 1
-
-                    if counter == players_per_page:
-                        pages.append(embed)
-                        embed = None
-                        counter = 0
-                except Exception as e:
-                    logger.error(f"Error fetching user {record['discord_id']}: {e}")
-                    continue
-
-            if embed is not None:
-                pages.append(embed)
-
-            if pages:
-                paginator = Paginator.create_from_embeds(self.bot, *pages)
-                await paginator.send(ctx)
-            else:
-                await ctx.send("❌ Error displaying leaderboard.")
 
         except Exception as e:
             logger.error(f"Error in leaderboard command: {e}")
             await ctx.send("❌ An error occurred while fetching the leaderboard.")
 
+    @staticmethod
+    def _day_line(row: Dict[str, Any]) -> str:
+        """Format one row of a single day's leaderboard.
+
+        Args:
+            row: The player's row of a ``LeaderboardPage``.
+
+        Returns:
+            The line to show.
+        """
+        return f"**{row['position']}.** {row['username'] or 'Unknown player'} - {row['guessCount']} guesses"
+
+    @staticmethod
+    def _global_line(row: Dict[str, Any]) -> str:
+        """Format one row of the global leaderboard.
+
+        Args:
+            row: The player's row of a ``LeaderboardPage``.
+
+        Returns:
+            The line to show.
+        """
+        streak_emoji = "🔥" if row['streak'] > 0 else "💔"
+        return (
+            f"**{row['position']}.** {row['username'] or 'Unknown player'} - {row['averageGuesses']:.1f} avg"
+            f"(weighted: {row['weightedScore']:.1f}) ({row['timesPlayed']} games)"
+            f"{streak_emoji}{row['streak']}"
+        )
+
     @slash_command(
         name="splatdle-stats",
         description="View splatdle statistics for yourself or another player",
@@ -144,7 +395,8 @@ class SplatdleExt(interactions.Extension):
         """Show Splatdle statistics for a specific user.
 
         Displays comprehensive statistics including games played, average guesses,
-        current streak, and today's performance for the specified user or command author.
+        current streak, today's performance and guess-count distributions for the
+        specified user or command author.
 
         Args:
             ctx: The slash command context.
@@ -152,23 +404,13 @@ class SplatdleExt(interactions.Extension):
         """
         await ctx.defer()
         target_user = user if user else ctx.author
+        today, yesterday = splatdle_days()
 
         try:
-            async with DBContextManager(use_dict=True) as cur:
-                await cur.execute(
-                    "SELECT discord_id, streak, times_played, average_guess_count, "
-                    "played_today FROM UserStats WHERE discord_id = %s",
-                    (target_user.id,)
-                )
-                stats_record = await cur.fetchone()
-
-                await cur.execute(
-                    "SELECT guess_count FROM TodaysLeaderboard WHERE discord_id = %s",
-                    (target_user.id,)
-                )
-                today_record = await cur.fetchone()
+            player = await player_stats.get(target_user.id)
+            day_counts, player_counts = await histograms(today, target_user.id)
 
-            if not stats_record:
+            if player is None:
                 embed = interactions.Embed(
                     title="📊 Splatdle Stats",
                     description=(
@@ -181,10 +423,11 @@ class SplatdleExt(interactions.Extension):
                 await ctx.send(embed=embed)
                 return
 
-            streak = stats_record['streak']
-            times_played = stats_record['times_played']
-            avg_guess = stats_record['average_guess_count']
-            played_today = stats_record['played_today']
+            streak = player.streak(yesterday)
+            times_played = player.times_played
+            avg_guess = player.average_guess_count
+            played_today = player.played_on(today)
+            todays_guesses = player.todays_guess_count(today)
 
             if streak > 0:
                 streak_text = f"🔥 {streak} game{'s' if streak != 1 else ''}"
@@ -192,8 +435,8 @@ class SplatdleExt(interactions.Extension):
                 streak_text = f"💔 {abs(streak)} game{'s' if abs(streak) != 1 else ''} (broken)"
 
             today_text = "✅ Completed" if played_today else "❌ Not played"
-            if today_record:
-                today_text = f"✅ Completed in {today_record['guess_count']} guesses"
+            if todays_guesses is not None:
+                today_text = f"✅ Completed in {todays_guesses} guesses"
 
             if avg_guess <= 2.0:
                 performance = "🏆 Excellent"
@@ -248,6 +491,26 @@ class SplatdleExt(interactions.Extension):
                 inline=True
             )
 
+            rank = rank_index.rank(target_user.id)
+            if rank:
+                embed.add_field(
+                    name="Global Rank",
+                    value=f"**#{rank['rank']}** of {rank['players']} (ahead of {rank['percentile']:.0f}%)",
+                    inline=True
+                )
+
+            embed.add_field(
+                name="Guess Distribution",
+                value=distribution_bars(histogram_dict(player_counts)),
+                inline=True
+            )
+
+            embed.add_field(
+                name="Everyone Today",
+                value=distribution_bars(histogram_dict(day_counts)),
+                inline=True
+            )
+
             if streak > 0:
                 footer_text = "Keep the streak alive! 🔥"
             elif not played_today:
@@ -261,6 +524,67 @@ class SplatdleExt(interactions.Extension):
             logger.error(f"Error in stats command: {e}")
             await ctx.send("❌ An error occurred while fetching player statistics.")
 
+    @slash_command(
+        name="splatdle-history",
+        description="View the last 30 days of splatdle games for yourself or another player",
+    )
+    @slash_option(
+        name="user",
+        description="The user to get the history for (defaults to yourself)",
+        opt_type=OptionType.USER,
+        required=False
+    )
+    async def history(self, ctx: interactions.SlashContext, user: Optional[interactions.Member] = None) -> None:
+        """Show a player's Splatdle games over the last 30 days.
+
+        Lists each game with its weapon and guess count, next to that day's
+        average from the daily rollups where the day is finished.
+
+        Args:
+            ctx: The slash command context.
+            user: Optional user to get the history for (defaults to command author).
+        """
+        await ctx.defer()
+        target_user = user if user else ctx.author
+        today, _ = splatdle_days()
+
+        try:
+            games = await game_history.player_history(target_user.id, today)
+            rollups = {day["date"]: day for day in await game_history.rollups(today - timedelta(days=29), today)}
+
+            if not games:
+                embed = interactions.Embed(
+                    title="📜 Splatdle History",
+                    description=f"**{target_user.display_name}** hasn't played Splatdle in the last 30 days.",
+                    color=global_config.theme_colour
+                )
+                await ctx.send(embed=embed)
+                return
+
+            lines = []
+            for game in games:
+                day = game["played_on"].isoformat()
+                line = f"**{day}** - {game['guess_count']} guesses"
+                if game["weapon"]:
+                    line += f" ({game['weapon']})"
+                rollup = rollups.get(day)
+                if rollup and rollup["averageGuesses"] is not None:
+                    line += f" · avg {rollup['averageGuesses']:.1f} over {rollup['players']} players"
+                lines.append(line)
+
+            average = sum(game["guess_count"] for game in games) / len(games)
+            embed = interactions.Embed(
+                title="📜 Splatdle History",
+                description="\n".join(lines),
+                color=global_config.theme_colour
+            )
+            embed.set_thumbnail(url=target_user.avatar.url)
+            embed.set_footer(text=f"{len(games)} games in the last 30 days, {average:.1f} guesses on average")
+            await ctx.send(embed=embed)
+        except Exception as e:
+            logger.error(f"Error in history command: {e}")
+            await ctx.send("❌ An error occurred while fetching the player's history.")
+
     @slash_command(
         name="set-splatdle-channel",
         description="Set splatdle channel",
@@ -281,14 +605,8 @@ class SplatdleExt(interactions.Extension):
             splatdle_channel: Channel to post announcements to (defaults to current channel).
         """
         splatdle_channel = ctx.channel if splatdle_channel is None else splatdle_channel
-        async with DBContextManager() as cur:
-            await cur.execute(
-                "INSERT INTO SplatdleChannels (guild_id, channel_id) "
-                "VALUES (%s, %s) "
-                "ON DUPLICATE KEY UPDATE "
-                "channel_id = VALUES(channel_id)",
-                (ctx.guild.id, splatdle_channel.id)
-            )
+        async with DBContextManager(caller="set_splatdle_channel") as cur:
+            await cur.run("splatdle_channels.upsert", (ctx.guild.id, splatdle_channel.id))
         await ctx.send("✅ Updated the channel")
 
     @slash_command(
@@ -305,13 +623,8 @@ class SplatdleExt(interactions.Extension):
         Args:
             ctx: The slash command context.
         """
-        async with DBContextManager() as cur:
-            await cur.execute(
-                "SELECT channel_id "
-                "FROM SplatdleChannels "
-                "WHERE guild_id = %s",
-                (ctx.guild.id,)
-            )
+        async with DBContextManager(caller="view_splatdle_channel") as cur:
+            await cur.run("splatdle_channels.by_guild", (ctx.guild.id,))
             row = await cur.fetchone()
         channel_id = row[0]
         await ctx.send(f"The splatdle announcement channel is set to <#{channel_id}>")
@@ -2,5 +2,13 @@
 # flake8: noqa
 
 from .config import global_config, setup_logging
-from .database_context_manager import DBContextManager
+from .database_context_manager import DBContextManager, QueryCursor
+from .database_pool import database_pool, database_router
+from .database_backend import database_backend
+from .query_registry import query_registry
+from .migrations import migration_runner
+from .index_advisor import index_advisor
+from .ttl_cache import TTLCache
+from .single_flight import SingleFlight
+from .http_client import http_client, HttpClient
 from .version import __author__, __version__
@@ -4,7 +4,7 @@ from typing import Optional
 
 
 import os
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 from datetime import datetime
 import logging
 
@@ -21,10 +21,51 @@ class Config:
         client_id: Discord application client ID.
         client_secret: Discord application client secret.
         redirect_uri: OAuth redirect URI.
+        session_secret: Key session cookies are signed with; must be the same for every worker.
+        session_seconds: Seconds a signed session cookie is valid for.
+        session_refresh_seconds: Seconds before a session expires when it is confirmed with Discord and renewed.
+        db_backend: Database engine, "mysql" or the embedded "sqlite".
+        sqlite_path: SQLite database file, or ":memory:".
+        sqlite_pool_size: Connections opened for a SQLite database file.
+        sqlite_busy_timeout_ms: How long SQLite waits on a locked database in milliseconds.
         mysql_database: MySQL database name.
         mysql_user: MySQL username.
         mysql_pass: MySQL password.
         mysql_host: MySQL host address.
+        mysql_replica_host: Read replica host address, unset to send all reads to the primary.
+        mysql_replica_user: Read replica username (defaults to mysql_user).
+        mysql_replica_pass: Read replica password (defaults to mysql_pass).
+        mysql_replica_database: Read replica database name (defaults to mysql_database).
+        mysql_replica_max_lag: Replication lag in seconds up to which the replica serves reads.
+        mysql_replica_check_interval: Seconds between replica lag checks.
+        mysql_pool_min_size: Connections the shared MySQL pool keeps open.
+        mysql_pool_max_size: Upper bound on connections in the shared MySQL pool.
+        mysql_pool_recycle: Seconds after which pooled connections are recycled (-1 disables).
+        mysql_pool_adaptive: Whether the pool limit grows and shrinks with acquire waits.
+        mysql_pool_adapt_interval: Seconds between adaptive sizing steps.
+        mysql_pool_adapt_wait_ms: p95 acquire wait in milliseconds above which the pool grows.
+        migrate_on_startup: Whether pending schema migrations are applied when the application starts.
+        mysql_prepared_statements: Whether named queries run as server-side prepared statements.
+        slow_query_log: Whether statements over the threshold are logged and explained.
+        slow_query_threshold_ms: Duration in milliseconds from which a statement counts as slow.
+        slow_query_explain_interval: Seconds before the same slow statement is explained again.
+        submission_queue: Whether Splatdle results are journaled and written to the database in batches.
+        submission_journal: Path of the journal pending Splatdle results are appended to.
+        submission_flush_ms: Milliseconds between batched writes of pending results.
+        submission_batch_size: Pending results that trigger a write before the interval is up.
+        rank_sync_seconds: Seconds between checks for scores written by other workers.
+        profile_cache_size: Most Discord profiles held in memory.
+        profile_ttl_seconds: Seconds before a cached Discord profile is looked up again.
+        leaderboard_snapshot_seconds: Least seconds between checks for a new leaderboard snapshot.
+        player_stats_cache_size: Most players' Splatdle stats held in memory.
+        player_stats_ttl_seconds: Seconds before cached Splatdle stats are read from the database again.
+        token_cache_size: Most access tokens whose user is held in memory.
+        token_cache_seconds: Seconds an access token's user is trusted before asking the provider again.
+        http_connection_limit: Most outbound HTTP connections open at once.
+        http_connections_per_host: Most outbound HTTP connections open to one host.
+        http_keepalive_seconds: Seconds an idle outbound connection is kept open for reuse.
+        http_dns_cache_seconds: Seconds a resolved host name is reused.
+        http_timeout_seconds: Seconds an outbound HTTP request may take in total.
         token: Discord bot token.
         secured: Whether to use HTTPS/SSL.
         discord_token: Discord bot token (duplicate of token).
@@ -40,10 +81,51 @@ class Config:
         self.client_id: Optional[str] = None
         self.client_secret: Optional[str] = None
         self.redirect_uri: Optional[str] = None
+        self.session_secret: Optional[str] = None
+        self.session_seconds: float = 3600.0
+        self.session_refresh_seconds: float = 300.0
+        self.db_backend: str = "mysql"
+        self.sqlite_path: str = ":memory:"
+        self.sqlite_pool_size: int = 4
+        self.sqlite_busy_timeout_ms: float = 5000.0
         self.mysql_database: Optional[str] = None
         self.mysql_user: Optional[str] = None
         self.mysql_pass: Optional[str] = None
         self.mysql_host: Optional[str] = None
+        self.mysql_replica_host: Optional[str] = None
+        self.mysql_replica_user: Optional[str] = None
+        self.mysql_replica_pass: Optional[str] = None
+        self.mysql_replica_database: Optional[str] = None
+        self.mysql_replica_max_lag: float = 5.0
+        self.mysql_replica_check_interval: float = 5.0
+        self.mysql_pool_min_size: int = 1
+        self.mysql_pool_max_size: int = 10
+        self.mysql_pool_recycle: int = 3600
+        self.mysql_pool_adaptive: bool = False
+        self.mysql_pool_adapt_interval: float = 10.0
+        self.mysql_pool_adapt_wait_ms: float = 50.0
+        self.migrate_on_startup: bool = False
+        self.mysql_prepared_statements: bool = False
+        self.slow_query_log: bool = False
+        self.slow_query_threshold_ms: float = 200.0
+        self.slow_query_explain_interval: float = 3600.0
+        self.submission_queue: bool = False
+        self.submission_journal: str = os.path.join("data", "submissions.journal")
+        self.submission_flush_ms: float = 250.0
+        self.submission_batch_size: int = 100
+        self.rank_sync_seconds: float = 30.0
+        self.profile_cache_size: int = 10000
+        self.profile_ttl_seconds: float = 86400.0
+        self.leaderboard_snapshot_seconds: float = 5.0
+        self.player_stats_cache_size: int = 10000
+        self.player_stats_ttl_seconds: float = 60.0
+        self.token_cache_size: int = 10000
+        self.token_cache_seconds: float = 300.0
+        self.http_connection_limit: int = 100
+        self.http_connections_per_host: int = 20
+        self.http_keepalive_seconds: float = 30.0
+        self.http_dns_cache_seconds: int = 300
+        self.http_timeout_seconds: float = 15.0
         self.token: Optional[str] = None
         self.secured: bool = False
         self.discord_token: Optional[str] = None
@@ -62,11 +144,52 @@ class Config:
         self.discord_token = getenv("DISCORD_TOKEN")
         self.client_secret = getenv("DISCORD_CLIENT_SECRET")
         self.redirect_uri = getenv("DISCORD_REDIRECT_URI")
+        self.session_secret = getenv("SESSION_SECRET")
+        self.session_seconds = float(getenv("SESSION_SECONDS", "3600"))
+        self.session_refresh_seconds = float(getenv("SESSION_REFRESH_SECONDS", "300"))
         self.token = getenv("DISCORD_TOKEN")
+        self.db_backend = getenv("DB_BACKEND", "mysql").lower()
+        self.sqlite_path = getenv("SQLITE_PATH", ":memory:")
+        self.sqlite_pool_size = int(getenv("SQLITE_POOL_SIZE", "4"))
+        self.sqlite_busy_timeout_ms = float(getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
         self.mysql_database = getenv("MYSQL_DB")
         self.mysql_user = getenv("MYSQL_USER")
         self.mysql_pass = getenv("MYSQL_PASS")
         self.mysql_host = getenv("MYSQL_HOST")
+        self.mysql_replica_host = getenv("MYSQL_REPLICA_HOST")
+        self.mysql_replica_user = getenv("MYSQL_REPLICA_USER", self.mysql_user)
+        self.mysql_replica_pass = getenv("MYSQL_REPLICA_PASS", self.mysql_pass)
+        self.mysql_replica_database = getenv("MYSQL_REPLICA_DB", self.mysql_database)
+        self.mysql_replica_max_lag = float(getenv("MYSQL_REPLICA_MAX_LAG", "5"))
+        self.mysql_replica_check_interval = float(getenv("MYSQL_REPLICA_CHECK_INTERVAL", "5"))
+        self.mysql_pool_min_size = int(getenv("MYSQL_POOL_MIN_SIZE", "1"))
+        self.mysql_pool_max_size = int(getenv("MYSQL_POOL_MAX_SIZE", "10"))
+        self.mysql_pool_recycle = int(getenv("MYSQL_POOL_RECYCLE", "3600"))
+        self.mysql_pool_adaptive = getenv("MYSQL_POOL_ADAPTIVE") == "1"
+        self.mysql_pool_adapt_interval = float(getenv("MYSQL_POOL_ADAPT_INTERVAL", "10"))
+        self.mysql_pool_adapt_wait_ms = float(getenv("MYSQL_POOL_ADAPT_WAIT_MS", "50"))
+        self.migrate_on_startup = getenv("MIGRATE_ON_STARTUP") == "1"
+        self.mysql_prepared_statements = getenv("MYSQL_PREPARED_STATEMENTS") == "1"
+        self.slow_query_log = getenv("SLOW_QUERY_LOG") == "1"
+        self.slow_query_threshold_ms = float(getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+        self.slow_query_explain_interval = float(getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "3600"))
+        self.submission_queue = getenv("SUBMISSION_QUEUE") == "1"
+        self.submission_journal = getenv("SUBMISSION_JOURNAL", os.path.join("data", "submissions.journal"))
+        self.submission_flush_ms = float(getenv("SUBMISSION_FLUSH_MS", "250"))
+        self.submission_batch_size = int(getenv("SUBMISSION_BATCH_SIZE", "100"))
+        self.rank_sync_seconds = float(getenv("RANK_SYNC_SECONDS", "30"))
+        self.profile_cache_size = int(getenv("PROFILE_CACHE_SIZE", "10000"))
+        self.profile_ttl_seconds = float(getenv("PROFILE_TTL_SECONDS", "86400"))
+        self.leaderboard_snapshot_seconds = float(getenv("LEADERBOARD_SNAPSHOT_SECONDS", "5"))
+        self.player_stats_cache_size = int(getenv("PLAYER_STATS_CACHE_SIZE", "10000"))
+        self.player_stats_ttl_seconds = float(getenv("PLAYER_STATS_TTL_SECONDS", "60"))
+        self.token_cache_size = int(getenv("TOKEN_CACHE_SIZE", "10000"))
+        self.token_cache_seconds = float(getenv("TOKEN_CACHE_SECONDS", "300"))
+        self.http_connection_limit = int(getenv("HTTP_CONNECTION_LIMIT", "100"))
+        self.http_connections_per_host = int(getenv("HTTP_CONNECTIONS_PER_HOST", "20"))
+        self.http_keepalive_seconds = float(getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+        self.http_dns_cache_seconds = int(getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+        self.http_timeout_seconds = float(getenv("HTTP_TIMEOUT_SECONDS", "15"))
         self.secured = getenv("SECURED") == "1"
         self.port = getenv("PORT")
         self.discord_verify = getenv("DISCORD_VERIFY")
@@ -77,7 +200,8 @@ def setup_logging() -> None:
     """Set up application logging configuration.
 
     Configures logging with file rotation, console output, and
-    appropriate log levels for different components.
+    appropriate log levels for different components. When the slow query
+    log is enabled its output goes to its own rotating file in ``logs/``.
     """
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR)
@@ -98,6 +222,14 @@ def setup_logging() -> None:
     logging.getLogger('aiohttp.access').setLevel(logging.INFO)
     logging.getLogger('aiomysql').setLevel(logging.INFO)
 
+    if global_config.slow_query_log:
+        slow_query_handler = RotatingFileHandler(
+            os.path.join(LOG_DIR, "slow_queries.log"), maxBytes=5 * 1024 * 1024, backupCount=5)
+        slow_query_handler.setFormatter(logging.Formatter('%(asctime)s: %(message)s'))
+        slow_query_logger = logging.getLogger('slow_queries')
+        slow_query_logger.propagate = False
+        slow_query_logger.addHandler(slow_query_handler)
+
 
 load_dotenv()
 global_config = Config()
@@ -0,0 +1,487 @@
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import time
+import aiomysql
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .config import global_config
+from .database_pool import CallerStats, DatabaseRouter, database_router
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             "schema.sqlite.sql")
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+
+class DatabaseBackend:
+    """Base class for the database engines behind ``DBContextManager``.
+
+    A backend owns the connections, hands them out per ``DBContextManager``
+    block and opens cursors on them. Statements are written once in the
+    query registry; each backend runs them in its own SQL dialect.
+
+    Attributes:
+        dialect: Name of the SQL dialect the backend speaks.
+    """
+
+    dialect: str = ""
+
+    async def init(self) -> None:
+        """Open the backend's connections (must be implemented by subclasses).
+        """
+        raise NotImplementedError("Backend init not implemented")
+
+    async def close(self) -> None:
+        """Close the backend's connections (must be implemented by subclasses).
+        """
+        raise NotImplementedError("Backend close not implemented")
+
+    async def acquire(self, caller: str, read_only: bool = False) -> Tuple[Any, Any]:
+        """Borrow a connection (must be implemented by subclasses).
+
+        Args:
+            caller: Name the wait time is attributed to.
+            read_only: Whether the caller only reads (default: False).
+
+        Returns:
+            The pool the connection came from and the connection itself.
+        """
+        raise NotImplementedError("Backend acquire not implemented")
+
+    async def cursor(self, con: Any, use_dict: bool) -> Any:
+        """Open a cursor on a borrowed connection (must be implemented by subclasses).
+
+        Args:
+            con: A connection obtained from ``acquire``.
+            use_dict: Whether rows are returned as dictionaries.
+
+        Returns:
+            A cursor with an aiomysql-compatible interface.
+        """
+        raise NotImplementedError("Backend cursor not implemented")
+
+    async def explain(self, sql: str, params: Optional[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Return the engine's query plan for a statement (must be implemented by subclasses).
+
+        Args:
+            sql: The statement text in this backend's dialect.
+            params: The statement parameters.
+
+        Returns:
+            One dictionary per plan row.
+        """
+        raise NotImplementedError("Backend explain not implemented")
+
+    def pools(self) -> List[Any]:
+        """Return the backend's pools for statistics (must be implemented by subclasses).
+        """
+        raise NotImplementedError("Backend pools not implemented")
+
+
+class MySQLBackend(DatabaseBackend):
+    """MySQL backend using the shared aiomysql pools and replica routing.
+
+    Attributes:
+        router: Router choosing between the primary and the replica pool.
+    """
+
+    dialect = "mysql"
+
+    def __init__(self, router: DatabaseRouter) -> None:
+        """Initialize the MySQL backend.
+
+        Args:
+            router: Router choosing between the primary and the replica pool.
+        """
+        self.router: DatabaseRouter = router
+
+    async def init(self) -> None:
+        """Open the primary pool and start replica monitoring.
+        """
+        await self.router.init()
+
+    async def close(self) -> None:
+        """Close the primary and replica pools.
+        """
+        await self.router.close()
+
+    async def acquire(self, caller: str, read_only: bool = False) -> Tuple[Any, Any]:
+        """Borrow a connection, from the replica when the caller only reads and it is healthy.
+        """
+        return await self.router.acquire(caller, read_only)
+
+    async def cursor(self, con: Any, use_dict: bool) -> Any:
+        """Open an aiomysql cursor.
+        """
+        return await con.cursor(aiomysql.DictCursor if use_dict else aiomysql.Cursor)
+
+    async def explain(self, sql: str, params: Optional[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Run ``EXPLAIN`` on a connection from the primary pool.
+        """
+        con = await self.router.primary.acquire("slow_query_explain")
+        try:
+            async with con.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute("EXPLAIN " + cur.mogrify(sql, params or None))
+                plan = await cur.fetchall()
+            await con.rollback()
+            return list(plan)
+        finally:
+            await self.router.primary.release(con)
+
+    def pools(self) -> List[Any]:
+        """Return the primary pool, and the replica pool if one is configured.
+        """
+        pools = [self.router.primary]
+        if self.router.replica_configured:
+            pools.append(self.router.replica)
+        return pools
+
+
+class SQLiteCursor:
+    """aiomysql-compatible cursor over a ``sqlite3`` cursor.
+
+    Accepts ``%s`` placeholders like the MySQL cursors do.
+
+    Attributes:
+        connection: The connection the cursor belongs to.
+        use_dict: Whether rows are returned as dictionaries.
+    """
+
+    def __init__(self, connection: "SQLiteConnection", raw: sqlite3.Cursor, use_dict: bool) -> None:
+        """Initialize the cursor.
+
+        Args:
+            connection: The connection the cursor belongs to.
+            raw: The underlying sqlite3 cursor.
+            use_dict: Whether rows are returned as dictionaries.
+        """
+        self.connection: SQLiteConnection = connection
+        self.use_dict: bool = use_dict
+        self._raw: sqlite3.Cursor = raw
+
+    @property
+    def rowcount(self) -> int:
+        """Rows affected by the last statement.
+        """
+        return self._raw.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        """Row ID of the last inserted row.
+        """
+        return self._raw.lastrowid
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        """Execute a statement on the connection's worker thread.
+
+        Args:
+            sql: The statement text, with ``%s`` or ``?`` placeholders.
+            params: Values for the placeholders.
+
+        Returns:
+            Number of affected rows.
+        """
+        await self.connection.run(self._raw.execute, sql.replace("%s", "?"), tuple(params or ()))
+        return self._raw.rowcount
+
+    async def executemany(self, sql: str, rows: Sequence[Sequence[Any]]) -> int:
+        """Execute a statement once per row of parameters on the worker thread.
+
+        Args:
+            sql: The statement text, with ``%s`` or ``?`` placeholders.
+            rows: Values for the placeholders, one sequence per row.
+
+        Returns:
+            Number of affected rows.
+        """
+        await self.connection.run(self._raw.executemany, sql.replace("%s", "?"), [tuple(row) for row in rows])
+        return self._raw.rowcount
+
+    def _row(self, row: Optional[tuple]) -> Any:
+        """Convert a row to a dictionary when the cursor returns dictionaries.
+        """
+        if row is None or not self.use_dict:
+            return row
+        return {column[0]: value for column, value in zip(self._raw.description, row)}
+
+    async def fetchone(self) -> Any:
+        """Fetch the next row.
+        """
+        return self._row(await self.connection.run(self._raw.fetchone))
+
+    async def fetchmany(self, size: Optional[int] = None) -> Any:
+        """Fetch up to ``size`` rows.
+        """
+        rows = await self.connection.run(self._raw.fetchmany, size or self._raw.arraysize)
+        return [self._row(row) for row in rows]
+
+    async def fetchall(self) -> Any:
+        """Fetch all remaining rows.
+        """
+        return [self._row(row) for row in await self.connection.run(self._raw.fetchall)]
+
+    async def nextset(self) -> None:
+        """SQLite statements return a single result set.
+        """
+        return None
+
+    async def close(self) -> None:
+        """Close the cursor.
+        """
+        await self.connection.run(self._raw.close)
+
+
+class SQLiteConnection:
+    """A ``sqlite3`` connection driven from a dedicated worker thread.
+
+    Attributes:
+        raw: The underlying sqlite3 connection.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the connection holder; ``open`` connects.
+
+        Args:
+            path: Database file path, or ``:memory:``.
+        """
+        self._path: str = path
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self.raw: Optional[sqlite3.Connection] = None
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking sqlite3 call on the worker thread.
+
+        Args:
+            func: The sqlite3 call.
+            *args: Arguments for the call.
+
+        Returns:
+            Whatever the call returns.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> None:
+        """Connect on the worker thread and apply the connection settings.
+        """
+        self.raw = sqlite3.connect(self._path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self.raw.execute("PRAGMA journal_mode = WAL")
+        self.raw.execute(f"PRAGMA busy_timeout = {int(global_config.sqlite_busy_timeout_ms)}")
+        self.raw.create_function("SQRT", 1, lambda value: math.sqrt(value) if value is not None else None,
+                                 deterministic=True)
+        self.raw.create_function("NOW", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+
+    async def open(self) -> None:
+        """Connect and register the MySQL functions the named queries use.
+        """
+        await self.run(self._connect)
+
+    async def cursor(self, use_dict: bool = False) -> SQLiteCursor:
+        """Open a cursor.
+
+        Args:
+            use_dict: Whether rows are returned as dictionaries (default: False).
+        """
+        return SQLiteCursor(self, await self.run(self.raw.cursor), use_dict)
+
+    async def commit(self) -> None:
+        """Commit the current transaction.
+        """
+        await self.run(self.raw.commit)
+
+    async def rollback(self) -> None:
+        """Roll back the current transaction.
+        """
+        await self.run(self.raw.rollback)
+
+    async def close(self) -> None:
+        """Close the connection and stop its worker thread.
+        """
+        if self.raw is not None:
+            await self.run(self.raw.close)
+            self.raw = None
+        self._executor.shutdown(wait=False)
+
+
+class SQLitePool:
+    """Fixed-size pool of SQLite connections.
+
+    An in-memory database only exists per connection, so it always gets a
+    single connection; file databases get ``SQLITE_POOL_SIZE``.
+
+    Attributes:
+        name: Pool name shown in statistics.
+        size: Number of connections in the pool.
+        limit: Same as ``size``; kept for parity with ``DatabasePool``.
+        in_use: Number of connections currently borrowed.
+        connections_opened: Connections opened since startup.
+        callers: Acquire statistics per caller name.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            path: Database file path, or ``:memory:``.
+            size: Number of connections to open for file databases.
+        """
+        self.name: str = "sqlite"
+        self.path: str = path
+        self.size: int = 1 if path == ":memory:" else max(1, size)
+        self.limit: int = self.size
+        self.in_use: int = 0
+        self.connections_opened: int = 0
+        self.callers: Dict[str, CallerStats] = {}
+        self._connections: List[SQLiteConnection] = []
+        self._free: Optional[asyncio.Queue] = None
+
+    async def init(self) -> None:
+        """Open the connections and create the schema.
+        """
+        if self._free is not None:
+            return
+        self._free = asyncio.Queue()
+        for _ in range(self.size):
+            con = SQLiteConnection(self.path)
+            await con.open()
+            self._connections.append(con)
+            self.connections_opened += 1
+            self._free.put_nowait(con)
+
+        with open(SQLITE_SCHEMA, "r", encoding="utf-8") as f:
+            schema = f.read()
+        await self._connections[0].run(self._connections[0].raw.executescript, schema)
+        logger.info("Opened SQLite database %s with %s connection(s)", self.path, self.size)
+
+    async def acquire(self, caller: str = "unknown") -> SQLiteConnection:
+        """Borrow a connection, waiting until one is free.
+
+        Args:
+            caller: Name the wait time is attributed to (default: "unknown").
+
+        Returns:
+            A connection that must be handed back with ``release``.
+        """
+        if self._free is None:
+            await self.init()
+        started = time.perf_counter()
+        con = await self._free.get()
+        self.in_use += 1
+        self.callers.setdefault(caller, CallerStats()).record(time.perf_counter() - started)
+        return con
+
+    async def release(self, con: SQLiteConnection) -> None:
+        """Return a borrowed connection to the pool.
+
+        Args:
+            con: The connection obtained from ``acquire``.
+        """
+        self.in_use -= 1
+        self._free.put_nowait(con)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarise pool usage in the same shape as ``DatabasePool.stats``.
+        """
+        return {
+            "name": self.name,
+            "size": self.size,
+            "in_use": self.in_use,
+            "idle": self.size - self.in_use,
+            "limit": self.limit,
+            "connections_opened": self.connections_opened,
+            "callers": {name: stats.as_dict() for name, stats in sorted(self.callers.items())},
+        }
+
+    async def close(self) -> None:
+        """Close every connection in the pool.
+        """
+        for con in self._connections:
+            await con.close()
+        self._connections = []
+        self._free = None
+
+
+class SQLiteBackend(DatabaseBackend):
+    """Embedded SQLite backend for running without a MySQL server.
+
+    Meant for local load tests and benchmarks: it needs no outside services
+    and runs the same named queries, using their SQLite variants where the
+    MySQL syntax differs.
+
+    Attributes:
+        pool: The SQLite connection pool.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, path: str, size: int) -> None:
+        """Initialize the SQLite backend.
+
+        Args:
+            path: Database file path, or ``:memory:``.
+            size: Number of connections for file databases.
+        """
+        self.pool: SQLitePool = SQLitePool(path, size)
+
+    async def init(self) -> None:
+        """Open the SQLite pool.
+        """
+        await self.pool.init()
+
+    async def close(self) -> None:
+        """Close the SQLite pool.
+        """
+        await self.pool.close()
+
+    async def acquire(self, caller: str, read_only: bool = False) -> Tuple[Any, Any]:
+        """Borrow a connection; SQLite has no replica, so ``read_only`` is ignored.
+        """
+        return self.pool, await self.pool.acquire(caller)
+
+    async def cursor(self, con: Any, use_dict: bool) -> Any:
+        """Open a SQLite cursor.
+        """
+        return await con.cursor(use_dict)
+
+    async def explain(self, sql: str, params: Optional[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """Run ``EXPLAIN QUERY PLAN`` for the statement.
+        """
+        con = await self.pool.acquire("slow_query_explain")
+        try:
+            cur = await con.cursor(use_dict=True)
+            await cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return await cur.fetchall()
+        finally:
+            await self.pool.release(con)
+
+    def pools(self) -> List[Any]:
+        """Return the SQLite pool.
+        """
+        return [self.pool]
+
+
+def create_backend() -> DatabaseBackend:
+    """Create the backend selected by the ``DB_BACKEND`` setting.
+
+    Returns:
+        The configured database backend.
+
+    Raises:
+        ValueError: If the setting names an unknown backend.
+    """
+    if global_config.db_backend == "mysql":
+        return MySQLBackend(database_router)
+    if global_config.db_backend == "sqlite":
+        return SQLiteBackend(global_config.sqlite_path, global_config.sqlite_pool_size)
+    raise ValueError(f"Unknown DB_BACKEND {global_config.db_backend}")
+
+
+database_backend = create_backend()
@@ -1,64 +1,251 @@
 import logging
-import aiomysql
-from dotenv import load_dotenv
-from typing import Optional, Any, Type
+import time
+from typing import Optional, Any, Sequence, Type
 from .config import global_config
+from .database_backend import database_backend
+from .query_registry import NamedQuery, query_registry
+from .slow_query_log import slow_query_log
+from . import queries  # noqa: F401  pylint: disable=unused-import
 
 logger = logging.getLogger(__name__)
-load_dotenv()
+
+
+class QueryCursor:
+    """Cursor handed out by ``DBContextManager``.
+
+    Wraps the backend's cursor so statements from the query registry can be
+    run by name, in the backend's SQL dialect. When ``MYSQL_PREPARED_STATEMENTS``
+    is enabled on the MySQL backend, named statements
+    are prepared server-side the first time a pooled connection runs them and
+    executed with ``EXECUTE ... USING`` afterwards. aiomysql only speaks the
+    text protocol, so the user variables and ``EXECUTE`` are sent together as
+    one multi-statement round trip.
+
+    With slow query logging on, every statement is timed and the ones over
+    the threshold are handed to the slow query log.
+
+    Attributes:
+        raw: The underlying backend cursor.
+        con: The connection the cursor belongs to.
+        dialect: SQL dialect of the backend the cursor belongs to.
+        caller: The ``DBContextManager`` caller the cursor was opened for.
+        log_slow_queries: Whether slow statements are logged.
+        read_only: Whether only read-only named queries may be run.
+    """
+
+    def __init__(self, raw: Any, con: Any, dialect: str = "mysql", caller: str = "unknown",
+                 log_slow_queries: bool = False, read_only: bool = False) -> None:
+        """Initialize the cursor wrapper.
+
+        Args:
+            raw: The underlying backend cursor.
+            con: The connection the cursor belongs to.
+            dialect: SQL dialect of the backend (default: "mysql").
+            caller: The caller the cursor was opened for (default: "unknown").
+            log_slow_queries: Whether slow statements are logged (default: False).
+            read_only: Whether only read-only named queries may be run (default: False).
+        """
+        self.raw: Any = raw
+        self.con: Any = con
+        self.dialect: str = dialect
+        self.caller: str = caller
+        self.log_slow_queries: bool = log_slow_queries
+        self.read_only: bool = read_only
+
+    @property
+    def rowcount(self) -> int:
+        """Rows affected or returned by the last statement.
+        """
+        return self.raw.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        """Auto-increment ID generated by the last insert.
+        """
+        return self.raw.lastrowid
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        """Execute an inline SQL statement.
+
+        Args:
+            sql: The statement text using ``%s`` placeholders.
+            params: Values for the placeholders.
+
+        Returns:
+            Number of affected rows.
+        """
+        if not self.log_slow_queries:
+            return await self.raw.execute(sql, params)
+        started = time.perf_counter()
+        try:
+            return await self.raw.execute(sql, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            if slow_query_log.is_slow(elapsed):
+                slow_query_log.record(sql, params, elapsed, self.caller)
+
+    async def run(self, name: str, params: Sequence[Any] = ()) -> int:
+        """Execute a statement from the query registry by name.
+
+        Args:
+            name: Dotted name of the registered statement.
+            params: Values for the statement's placeholders.
+
+        Returns:
+            Number of affected rows.
+
+        Raises:
+            ValueError: If a writing query is run on a read-only cursor.
+        """
+        query = query_registry.get(name)
+        if self.read_only and not query.read_only:
+            raise ValueError(f"Query {name} writes and cannot run on a read-only connection")
+        sql = query.sql_for(self.dialect)
+        started = time.perf_counter()
+        try:
+            if self.dialect == "mysql" and global_config.mysql_prepared_statements and query.prepare:
+                return await self._execute_prepared(query, params)
+            return await self.raw.execute(sql, params or None)
+        finally:
+            elapsed = time.perf_counter() - started
+            query_registry.record(name, elapsed)
+            if self.log_slow_queries and slow_query_log.is_slow(elapsed):
+                slow_query_log.record(sql, params, elapsed, self.caller, name=name)
+
+    async def run_many(self, name: str, rows: Sequence[Sequence[Any]]) -> int:
+        """Execute a statement from the query registry once per row of parameters.
+
+        On MySQL, aiomysql rewrites a plain ``INSERT ... VALUES (%s, ...)``
+        statement into multi-row inserts, so a batch costs one round trip
+        instead of one per row. Statements run this way are never prepared.
+
+        Args:
+            name: Dotted name of the registered statement.
+            rows: Values for the statement's placeholders, one sequence per row.
+
+        Returns:
+            Number of affected rows.
+
+        Raises:
+            ValueError: If a writing query is run on a read-only cursor.
+        """
+        query = query_registry.get(name)
+        if self.read_only and not query.read_only:
+            raise ValueError(f"Query {name} writes and cannot run on a read-only connection")
+        if not rows:
+            return 0
+        sql = query.sql_for(self.dialect)
+        started = time.perf_counter()
+        try:
+            return await self.raw.executemany(sql, rows)
+        finally:
+            elapsed = time.perf_counter() - started
+            query_registry.record(name, elapsed)
+            if self.log_slow_queries and slow_query_log.is_slow(elapsed):
+                slow_query_log.record(sql, rows[0], elapsed, self.caller, name=name)
+
+    async def _execute_prepared(self, query: NamedQuery, params: Sequence[Any]) -> int:
+        """Execute a named statement as a server-side prepared statement.
+
+        Args:
+            query: The registered statement.
+            params: Values for the statement's placeholders.
+
+        Returns:
+            Number of affected rows.
+        """
+        prepared = getattr(self.con, "prepared_statements", None)
+        if prepared is None:
+            prepared = set()
+            self.con.prepared_statements = prepared
+        if query.name not in prepared:
+            await self.raw.execute(f"PREPARE {query.statement_name} FROM %s", (query.prepared_sql,))
+            prepared.add(query.name)
+
+        if not params:
+            return await self.raw.execute(f"EXECUTE {query.statement_name}")
+
+        variables = ", ".join(f"@p{i}" for i in range(len(params)))
+        assignments = ", ".join(f"@p{i} = %s" for i in range(len(params)))
+        await self.raw.execute(f"SET {assignments}; EXECUTE {query.statement_name} USING {variables}", params)
+        await self.raw.nextset()
+        return self.raw.rowcount
+
+    async def fetchone(self) -> Any:
+        """Fetch the next row of the last result set.
+        """
+        return await self.raw.fetchone()
+
+    async def fetchmany(self, size: Optional[int] = None) -> Any:
+        """Fetch the next ``size`` rows of the last result set.
+        """
+        return await self.raw.fetchmany(size)
+
+    async def fetchall(self) -> Any:
+        """Fetch all remaining rows of the last result set.
+        """
+        return await self.raw.fetchall()
+
+    async def close(self) -> None:
+        """Close the underlying cursor.
+        """
+        await self.raw.close()
 
 
 class DBContextManager:
-    """Async context manager for MySQL database connections.
+    """Async context manager for database connections.
 
-    Provides automatic connection management, transaction handling,
-    and proper cleanup for MySQL database operations.
+    Borrows a connection from the configured backend's process-wide pool
+    (MySQL, or embedded SQLite with ``DB_BACKEND=sqlite``), wraps the block in
+    a transaction and returns the connection to the pool afterwards. On MySQL,
+    read-only blocks are served by the read replica when one is configured
+    and healthy.
 
     Attributes:
-        mysql_db: Database name from configuration.
-        mysql_host: Database host from configuration.
-        mysql_user: Database username from configuration.
-        mysql_pass: Database password from configuration.
         use_dict: Whether to use dictionary cursor for results.
-        pool: Connection pool for database connections.
-        cur: Database cursor for executing queries.
+        caller: Name the pool attributes acquire waits to.
+        log_slow_queries: Whether statements over the slow query threshold are logged.
+        read_only: Whether the block only reads and may be served by the replica.
+        pool: The pool the connection was borrowed from.
+        cur: Query cursor for executing statements.
         con: Database connection from the pool.
     """
 
-    mysql_db = global_config.mysql_database
-    mysql_host = global_config.mysql_host
-    mysql_user = global_config.mysql_user
-    mysql_pass = global_config.mysql_pass
-
-    def __init__(self, use_dict: bool = False) -> None:
+    def __init__(self, use_dict: bool = False, caller: str = "unknown",
+                 log_slow_queries: Optional[bool] = None, read_only: bool = False) -> None:
         """Initialize the database context manager.
 
         Args:
             use_dict: Whether to return results as dictionaries (default: False).
+            caller: Name used for the pool's acquire-wait statistics.
+            log_slow_queries: Log slow statements; defaults to the ``SLOW_QUERY_LOG`` setting.
+            read_only: Whether the block only runs read-only queries (default: False).
         """
         self.use_dict: bool = use_dict
-        self.pool: Optional[aiomysql.Pool] = None
-        self.cur: Optional[aiomysql.Cursor] = None
-        self.con: Optional[aiomysql.Connection] = None
+        self.caller: str = caller
+        self.log_slow_queries: bool = slow_query_log.enabled if log_slow_queries is None else log_slow_queries
+        self.read_only: bool = read_only
+        self.pool: Any = None
+        self.cur: Optional[QueryCursor] = None
+        self.con: Any = None
 
-    async def __aenter__(self) -> aiomysql.Cursor:
-        """Enter the async context and establish database connection.
+    async def __aenter__(self) -> QueryCursor:
+        """Enter the async context and borrow a database connection.
 
-        Creates a connection pool, acquires a connection, and returns
-        a cursor for database operations.
+        Acquires a connection from the shared pool and returns a cursor
+        that can run inline SQL or registered statements by name.
 
         Returns:
-            Database cursor for executing queries.
+            Query cursor for executing statements.
         """
-        self.pool = await aiomysql.create_pool(
-            host=self.mysql_host,
-            user=self.mysql_user,
-            password=self.mysql_pass,
-            db=self.mysql_db,
-            autocommit=False
-        )
-        self.con = await self.pool.acquire()
-        self.cur = await self.con.cursor(aiomysql.DictCursor if self.use_dict else aiomysql.Cursor)
+        self.pool, self.con = await database_backend.acquire(self.caller, self.read_only)
+        try:
+            raw = await database_backend.cursor(self.con, self.use_dict)
+            self.cur = QueryCursor(raw, self.con, database_backend.dialect, self.caller, self.log_slow_queries,
+                                   self.read_only)
+        except BaseException:
+            await self.pool.release(self.con)
+            raise
         return self.cur
 
     async def __aexit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException],
@@ -83,4 +270,4 @@ class DBContextManager:
                 await self.con.commit()
         finally:
             await self.cur.close()
-            self.pool.release(self.con)
+            await self.pool.release(self.con)
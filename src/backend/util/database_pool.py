@@ -0,0 +1,462 @@
+import asyncio
+import logging
+import time
+import weakref
+import aiomysql
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from .config import global_config
+
+logger = logging.getLogger(__name__)
+
+WAIT_SAMPLE_SIZE = 512
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Return the given percentile of a list of samples.
+
+    Args:
+        samples: Sample values, in any order.
+        fraction: Percentile as a fraction between 0 and 1.
+
+    Returns:
+        The nearest-rank percentile, or 0.0 for an empty list.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class CallerStats:
+    """Acquire statistics for a single ``DBContextManager`` caller.
+
+    Attributes:
+        acquires: Number of connections borrowed.
+        wait_total: Total seconds spent waiting for a connection.
+        wait_max: Longest single wait in seconds.
+        waits: The most recent wait samples in seconds.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty caller statistics.
+        """
+        self.acquires: int = 0
+        self.wait_total: float = 0.0
+        self.wait_max: float = 0.0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def record(self, wait: float) -> None:
+        """Record one acquire.
+
+        Args:
+            wait: Seconds spent waiting for the connection.
+        """
+        self.acquires += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summarise the statistics in milliseconds.
+        """
+        samples = list(self.waits)
+        return {
+            "acquires": self.acquires,
+            "avg_wait_ms": round(self.wait_total / self.acquires * 1000, 3) if self.acquires else 0.0,
+            "p95_wait_ms": round(percentile(samples, 0.95) * 1000, 3),
+            "max_wait_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class DatabasePool:
+    """Process-wide owner of the MySQL connection pool.
+
+    The pool is created once when the application starts (see ``run_services``
+    in ``main.py``) and shared by the API, the Splatdle game loop, the OAuth
+    handlers and the bot extensions. ``DBContextManager`` borrows connections
+    from it instead of opening its own.
+
+    Every acquire is timed and attributed to the caller that asked for it. In
+    adaptive mode the number of connections handed out is capped by ``limit``,
+    which grows when the p95 acquire wait crosses the configured threshold and
+    shrinks again while the pool sits idle, always within the configured
+    min/max bounds.
+
+    Attributes:
+        name: Which server the pool connects to, e.g. "primary" or "replica".
+        pool: The shared aiomysql pool, or None while closed.
+        limit: Maximum number of connections currently handed out at once.
+        in_use: Number of connections currently borrowed.
+        connections_opened: Distinct connections seen since startup (churn).
+        callers: Acquire statistics per caller name.
+    """
+
+    def __init__(self, name: str, host: Optional[str], user: Optional[str], password: Optional[str],
+                 database: Optional[str]) -> None:
+        """Initialize an empty, closed pool holder.
+
+        Args:
+            name: Which server the pool connects to.
+            host: MySQL host address.
+            user: MySQL username.
+            password: MySQL password.
+            database: MySQL database name.
+        """
+        self.name: str = name
+        self._connect_kwargs: Dict[str, Any] = {"host": host, "user": user, "password": password, "db": database}
+        self.pool: Optional[aiomysql.Pool] = None
+        self.limit: int = global_config.mysql_pool_max_size
+        self.in_use: int = 0
+        self.connections_opened: int = 0
+        self.callers: Dict[str, CallerStats] = {}
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._gate: Optional[asyncio.Condition] = None
+        self._known: "weakref.WeakSet[aiomysql.Connection]" = weakref.WeakSet()
+        self._window_waits: List[float] = []
+        self._window_peak: int = 0
+        self._adapt_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the shared pool has been created and not yet closed.
+        """
+        return self.pool is not None
+
+    async def init(self) -> None:
+        """Create the shared pool using the configured size and recycle settings.
+
+        Calling this more than once is a no-op.
+        """
+        async with self._lock:
+            if self.pool is not None:
+                return
+            self.pool = await aiomysql.create_pool(
+                **self._connect_kwargs,
+                minsize=global_config.mysql_pool_min_size,
+                maxsize=global_config.mysql_pool_max_size,
+                pool_recycle=global_config.mysql_pool_recycle,
+                autocommit=False
+            )
+            self._gate = asyncio.Condition()
+            if global_config.mysql_pool_adaptive:
+                self.limit = global_config.mysql_pool_min_size
+                self._adapt_task = asyncio.create_task(self._adapt_loop())
+            else:
+                self.limit = global_config.mysql_pool_max_size
+            logger.info("Created MySQL %s pool (min=%s, max=%s, recycle=%ss, adaptive=%s)", self.name,
+                        global_config.mysql_pool_min_size, global_config.mysql_pool_max_size,
+                        global_config.mysql_pool_recycle, global_config.mysql_pool_adaptive)
+
+    async def get_pool(self) -> aiomysql.Pool:
+        """Return the shared pool, creating it on first use if startup did not.
+
+        Returns:
+            The shared aiomysql pool.
+        """
+        if self.pool is None:
+            logger.warning("MySQL %s pool used before application startup, creating it lazily", self.name)
+            await self.init()
+        return self.pool
+
+    async def acquire(self, caller: str = "unknown") -> aiomysql.Connection:
+        """Borrow a connection, recording how long the caller waited for it.
+
+        Args:
+            caller: Name the wait time is attributed to.
+
+        Returns:
+            A connection that must be handed back with ``release``.
+        """
+        pool = await self.get_pool()
+        started = time.perf_counter()
+        async with self._gate:
+            await self._gate.wait_for(lambda: self.in_use < self.limit)
+            self.in_use += 1
+        try:
+            con = await pool.acquire()
+        except BaseException:
+            await self._free_slot()
+            raise
+        wait = time.perf_counter() - started
+
+        if con not in self._known:
+            self._known.add(con)
+            self.connections_opened += 1
+        self.callers.setdefault(caller, CallerStats()).record(wait)
+        self._window_waits.append(wait)
+        self._window_peak = max(self._window_peak, self.in_use)
+        return con
+
+    async def release(self, con: aiomysql.Connection) -> None:
+        """Return a borrowed connection to the pool.
+
+        Args:
+            con: The connection obtained from ``acquire``.
+        """
+        try:
+            await self.pool.release(con)
+        finally:
+            await self._free_slot()
+
+    async def _free_slot(self) -> None:
+        """Give back one slot of the adaptive limit and wake a waiter.
+        """
+        async with self._gate:
+            self.in_use -= 1
+            self._gate.notify()
+
+    async def _set_limit(self, limit: int) -> None:
+        """Change the adaptive limit and wake anyone waiting on it.
+
+        Args:
+            limit: The new limit, already clamped to the configured bounds.
+        """
+        async with self._gate:
+            self.limit = limit
+            self._gate.notify_all()
+
+    async def _adapt_loop(self) -> None:
+        """Periodically grow or shrink the adaptive limit from the last window.
+        """
+        while True:
+            await asyncio.sleep(global_config.mysql_pool_adapt_interval)
+            try:
+                await self._adapt()
+            except Exception as e:
+                logger.error("Failed to adapt MySQL %s pool size: %s", self.name, e)
+
+    async def _adapt(self) -> None:
+        """Apply one adaptive sizing step based on the waits since the last step.
+        """
+        waits, self._window_waits = self._window_waits, []
+        peak, self._window_peak = self._window_peak, self.in_use
+        p95_ms = percentile(waits, 0.95) * 1000
+        lower = global_config.mysql_pool_min_size
+        upper = global_config.mysql_pool_max_size
+
+        if p95_ms > global_config.mysql_pool_adapt_wait_ms and self.limit < upper:
+            new_limit = min(upper, self.limit * 2)
+            logger.info("MySQL %s pool p95 acquire wait %.1fms, growing limit %s -> %s",
+                        self.name, p95_ms, self.limit, new_limit)
+            await self._set_limit(new_limit)
+        elif peak < self.limit // 2 and self.limit > lower:
+            new_limit = max(lower, self.limit - 1)
+            logger.info("MySQL %s pool idle (peak %s in use), shrinking limit %s -> %s",
+                        self.name, peak, self.limit, new_limit)
+            await self._set_limit(new_limit)
+            await self._close_idle(new_limit)
+
+    async def _close_idle(self, keep: int) -> int:
+        """Close idle connections beyond ``keep``, leaving the rest warm for the next burst.
+
+        Args:
+            keep: Most idle connections to keep open.
+
+        Returns:
+            Number of connections closed.
+        """
+        closed = 0
+        while self.pool.freesize > keep:
+            # A closed connection is dropped by the pool when it is released
+            con = await self.pool.acquire()
+            con.close()
+            await self.pool.release(con)
+            closed += 1
+        return closed
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarise current pool pressure.
+
+        Returns:
+            Dictionary with size, in-use/idle counts, churn and per-caller waits.
+        """
+        return {
+            "name": self.name,
+            "size": self.pool.size if self.pool else 0,
+            "in_use": self.in_use,
+            "idle": self.pool.freesize if self.pool else 0,
+            "limit": self.limit,
+            "connections_opened": self.connections_opened,
+            "callers": {name: stats.as_dict() for name, stats in sorted(self.callers.items())},
+        }
+
+    async def close(self) -> None:
+        """Close every pooled connection and wait for them to shut down.
+        """
+        async with self._lock:
+            if self.pool is None:
+                return
+            if self._adapt_task:
+                self._adapt_task.cancel()
+                self._adapt_task = None
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            logger.info("Closed MySQL %s pool", self.name)
+
+
+class DatabaseRouter:
+    """Routes read-only work to a replica and everything else to the primary.
+
+    The replica is only used while it is reachable and its replication lag,
+    checked every ``MYSQL_REPLICA_CHECK_INTERVAL`` seconds, stays within
+    ``MYSQL_REPLICA_MAX_LAG``. Otherwise, and whenever borrowing a replica
+    connection fails, read-only callers fall back to the primary.
+
+    Attributes:
+        primary: Pool for the primary server.
+        replica: Pool for the read replica.
+        replica_healthy: Whether read-only work is currently sent to the replica.
+        replica_lag: Last measured replication lag in seconds, if known.
+        fallbacks: Read-only acquires that fell back to the primary.
+    """
+
+    def __init__(self, primary: DatabasePool, replica: DatabasePool) -> None:
+        """Initialize the router.
+
+        Args:
+            primary: Pool for the primary server.
+            replica: Pool for the read replica.
+        """
+        self.primary: DatabasePool = primary
+        self.replica: DatabasePool = replica
+        self.replica_healthy: bool = False
+        self.replica_lag: Optional[float] = None
+        self.fallbacks: int = 0
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    @property
+    def replica_configured(self) -> bool:
+        """Whether a replica host has been configured.
+        """
+        return bool(global_config.mysql_replica_host)
+
+    async def init(self) -> None:
+        """Open the primary pool, and the replica pool plus its lag monitor if configured.
+        """
+        await self.primary.init()
+        if not self.replica_configured:
+            return
+        try:
+            await self.replica.init()
+            await self.check_replica()
+        except Exception as e:
+            logger.error("MySQL replica unavailable, serving reads from the primary: %s", e)
+        self._monitor_task = asyncio.create_task(self._monitor_loop())
+
+    async def acquire(self, caller: str, read_only: bool = False) -> Tuple[DatabasePool, aiomysql.Connection]:
+        """Borrow a connection from the pool suited to the work.
+
+        Args:
+            caller: Name the wait time is attributed to.
+            read_only: Whether the caller only reads (default: False).
+
+        Returns:
+            The pool the connection came from and the connection itself.
+        """
+        if read_only and self.replica_healthy:
+            try:
+                return self.replica, await self.replica.acquire(caller)
+            except Exception as e:
+                self.replica_healthy = False
+                self.fallbacks += 1
+                logger.error("MySQL replica acquire failed, falling back to the primary: %s", e)
+        elif read_only and self.replica_configured:
+            self.fallbacks += 1
+        return self.primary, await self.primary.acquire(caller)
+
+    async def check_replica(self) -> None:
+        """Measure replication lag and decide whether the replica may serve reads.
+        """
+        await self.replica.init()
+        con = await self.replica.acquire("replica_lag_check")
+        try:
+            lag = await self._read_lag(con)
+            await con.rollback()
+        finally:
+            await self.replica.release(con)
+
+        self.replica_lag = lag
+        healthy = lag is None or lag <= global_config.mysql_replica_max_lag
+        if healthy != self.replica_healthy:
+            logger.info("MySQL replica %s (lag: %ss)",
+                        "serving reads" if healthy else "lagging, reads go to the primary", lag)
+        self.replica_healthy = healthy
+
+    async def _read_lag(self, con: aiomysql.Connection) -> Optional[float]:
+        """Read the replica's lag behind the primary.
+
+        Args:
+            con: A connection to the replica.
+
+        Returns:
+            Lag in seconds, None if the server does not report it.
+
+        Raises:
+            RuntimeError: If replication is configured but stopped.
+        """
+        async with con.cursor(aiomysql.DictCursor) as cur:
+            try:
+                await cur.execute("SHOW REPLICA STATUS")
+            except aiomysql.Error:
+                await cur.execute("SHOW SLAVE STATUS")
+            status = await cur.fetchone()
+        if not status:
+            return None
+        lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        if lag is None:
+            raise RuntimeError("replication is not running")
+        return float(lag)
+
+    async def _monitor_loop(self) -> None:
+        """Periodically re-check replica lag and reachability.
+        """
+        while True:
+            await asyncio.sleep(global_config.mysql_replica_check_interval)
+            try:
+                await self.check_replica()
+            except Exception as e:
+                if self.replica_healthy:
+                    logger.error("MySQL replica check failed, reads go to the primary: %s", e)
+                self.replica_healthy = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarise routing state.
+
+        Returns:
+            Dictionary with replica health, lag and fallback count.
+        """
+        return {
+            "replica_configured": self.replica_configured,
+            "replica_healthy": self.replica_healthy,
+            "replica_lag": self.replica_lag,
+            "fallbacks": self.fallbacks,
+        }
+
+    async def close(self) -> None:
+        """Stop the lag monitor and close both pools.
+        """
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        await self.replica.close()
+        await self.primary.close()
+
+
+database_pool = DatabasePool(
+    "primary",
+    host=global_config.mysql_host,
+    user=global_config.mysql_user,
+    password=global_config.mysql_pass,
+    database=global_config.mysql_database
+)
+replica_pool = DatabasePool(
+    "replica",
+    host=global_config.mysql_replica_host,
+    user=global_config.mysql_replica_user,
+    password=global_config.mysql_replica_pass,
+    database=global_config.mysql_replica_database
+)
+database_router = DatabaseRouter(database_pool, replica_pool)
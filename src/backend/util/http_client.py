@@ -0,0 +1,115 @@
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+from .config import global_config
+
+logger = logging.getLogger("HttpClient")
+
+
+class HttpClient:
+    """The one aiohttp client session the process makes outbound HTTP requests with.
+
+    Every handler shares it, so connections to the same host (in practice
+    discord.com) are kept alive and reused across requests and handlers
+    instead of each handler warming up its own pool. The session is created
+    on first use inside the running event loop and closed on shutdown. Trace
+    hooks count requests and whether each one opened a new connection or
+    reused a kept-alive one.
+
+    Attributes:
+        limit: Most connections open at once.
+        limit_per_host: Most connections open to one host.
+        keepalive: Seconds an idle connection is kept open for reuse.
+        dns_ttl: Seconds a resolved host name is reused.
+        timeout: Seconds a request may take in total.
+        requests: Requests started.
+        failed: Requests that raised before a response arrived.
+        connections_created: Requests that had to open a new connection.
+        connections_reused: Requests sent on a kept-alive connection.
+        dns_cache_hits: Host lookups answered from the DNS cache.
+        dns_cache_misses: Host lookups that went to the resolver.
+    """
+
+    def __init__(self, limit: int, limit_per_host: int, keepalive: float, dns_ttl: int, timeout: float) -> None:
+        """Initialize the client; the session is created on first use.
+
+        Args:
+            limit: Most connections open at once.
+            limit_per_host: Most connections open to one host.
+            keepalive: Seconds an idle connection is kept open for reuse.
+            dns_ttl: Seconds a resolved host name is reused.
+            timeout: Seconds a request may take in total.
+        """
+        self.limit: int = limit
+        self.limit_per_host: int = limit_per_host
+        self.keepalive: float = keepalive
+        self.dns_ttl: int = dns_ttl
+        self.timeout: float = timeout
+        self.requests: int = 0
+        self.failed: int = 0
+        self.connections_created: int = 0
+        self.connections_reused: int = 0
+        self.dns_cache_hits: int = 0
+        self.dns_cache_misses: int = 0
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def session(self) -> ClientSession:
+        """The shared session, created if it does not exist yet.
+        """
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                     keepalive_timeout=self.keepalive, ttl_dns_cache=self.dns_ttl)
+            self._session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout),
+                                          trace_configs=[self._trace_config()])
+            logger.debug("Opened the shared HTTP session (limit %s, %s per host)", self.limit, self.limit_per_host)
+        return self._session
+
+    def _trace_config(self) -> TraceConfig:
+        """Build the trace hooks that keep the counters.
+        """
+        trace_config = TraceConfig()
+
+        def hook(attribute: str) -> Any:
+            async def on_event(session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+                setattr(self, attribute, getattr(self, attribute) + 1)
+            return on_event
+
+        trace_config.on_request_start.append(hook("requests"))
+        trace_config.on_request_exception.append(hook("failed"))
+        trace_config.on_connection_create_end.append(hook("connections_created"))
+        trace_config.on_connection_reuseconn.append(hook("connections_reused"))
+        trace_config.on_dns_cache_hit.append(hook("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(hook("dns_cache_misses"))
+        return trace_config
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the client's counters.
+
+        Returns:
+            ``requests``, ``failed``, ``connections_created``, ``connections_reused``, ``reuse_rate``
+            (percentage of connections that were reused), ``dns_cache_hits`` and ``dns_cache_misses``.
+        """
+        connections = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": round(100 * self.connections_reused / connections, 1) if connections else None,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+    async def close(self) -> None:
+        """Close the shared session and its connections.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+http_client = HttpClient(global_config.http_connection_limit, global_config.http_connections_per_host,
+                         global_config.http_keepalive_seconds, global_config.http_dns_cache_seconds,
+                         global_config.http_timeout_seconds)
@@ -0,0 +1,77 @@
+import logging
+from typing import Any, Dict, List, Tuple
+from .database_backend import database_backend
+from .query_registry import NamedQuery, query_registry
+
+logger = logging.getLogger(__name__)
+
+
+def plan_problems(dialect: str, plan: List[Dict[str, Any]]) -> List[str]:
+    """Pick out the steps of a query plan that touch more rows than they need to.
+
+    Args:
+        dialect: SQL dialect the plan came from.
+        plan: Rows returned by the backend's ``EXPLAIN``.
+
+    Returns:
+        One description per full scan, filesort or temporary table.
+    """
+    problems = []
+    for row in plan:
+        if dialect == "sqlite":
+            detail = str(row.get("detail", ""))
+            if detail.startswith("SCAN ") and "INDEX" not in detail:
+                problems.append(f"full scan: {detail}")
+            elif "TEMP B-TREE" in detail:
+                problems.append(f"sort: {detail}")
+            continue
+        table = row.get("table")
+        extra = str(row.get("Extra") or "")
+        if row.get("type") == "ALL":
+            problems.append(f"full scan of {table} (~{row.get('rows')} rows)")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table}")
+        if "Using temporary" in extra:
+            problems.append(f"temporary table for {table}")
+    return problems
+
+
+class IndexAdvisor:
+    """Runs the registered queries through ``EXPLAIN`` and flags full scans.
+
+    Each named query is explained with placeholder parameters, which is
+    enough for the optimizer to pick its access paths. Some statements scan
+    on purpose (the daily resets, for example), so the report is a list of
+    candidates to look at rather than a list of errors.
+    """
+
+    async def explain(self, query: NamedQuery) -> List[Dict[str, Any]]:
+        """Return the backend's plan for a named query.
+
+        Args:
+            query: The registered statement.
+
+        Returns:
+            The plan rows.
+        """
+        return await database_backend.explain(query.sql_for(database_backend.dialect), (0,) * query.param_count)
+
+    async def review(self) -> List[Tuple[str, str]]:
+        """Explain every registered query and collect the problems found.
+
+        Returns:
+            Pairs of query name and problem description.
+        """
+        findings = []
+        for name, query in sorted(query_registry.all().items()):
+            try:
+                plan = await self.explain(query)
+            except Exception as e:
+                findings.append((name, f"could not explain: {e}"))
+                continue
+            for problem in plan_problems(database_backend.dialect, plan):
+                findings.append((name, problem))
+        return findings
+
+
+index_advisor = IndexAdvisor()
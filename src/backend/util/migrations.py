@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, List
+from .database_backend import database_backend
+from .database_context_manager import DBContextManager
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MIGRATIONS_DIR = os.path.join(SRC_DIR, "migrations")
+BASELINE_SCHEMA = os.path.join(SRC_DIR, "schema.sql")
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+_COMMENT = re.compile(r"--[^\n]*")
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a SQL script into statements.
+
+    Args:
+        sql: Script text; ``--`` comments are dropped and statements end with ``;``.
+
+    Returns:
+        The statements, without their trailing semicolons.
+    """
+    sql = _COMMENT.sub("", sql)
+    return [statement.strip() for statement in sql.split(";") if statement.strip()]
+
+
+class Migration:
+    """One versioned schema change.
+
+    Attributes:
+        version: Version number taken from the file name.
+        name: Descriptive part of the file name.
+        path: Path of the SQL file.
+        checksum: SHA-256 of the file contents.
+        statements: The statements the migration runs, in order.
+    """
+
+    def __init__(self, version: int, name: str, path: str) -> None:
+        """Load a migration file.
+
+        Args:
+            version: Version number of the migration.
+            name: Descriptive name of the migration.
+            path: Path of the SQL file.
+        """
+        self.version: int = version
+        self.name: str = name
+        self.path: str = path
+        with open(path, "r", encoding="utf-8") as f:
+            sql = f.read()
+        self.checksum: str = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+        self.statements: List[str] = split_statements(sql)
+
+
+class MigrationRunner:
+    """Forward-only runner for the MySQL schema migrations.
+
+    ``schema.sql`` is the baseline and counts as version 0; every later change
+    lives in ``migrations/NNN_name.sql`` and is applied once, in version
+    order. Applied versions are recorded in ``SchemaMigrations`` together with
+    a checksum, so an edited migration is reported instead of silently
+    ignored. MySQL commits DDL implicitly, so a migration that fails part way
+    has to be fixed up by hand before the runner is started again.
+
+    The SQLite backend creates its full schema from ``schema.sqlite.sql`` on
+    startup, so there is nothing to migrate there.
+
+    Attributes:
+        migrations_dir: Directory holding the migration files.
+        baseline_schema: Path of the baseline schema.
+    """
+
+    def __init__(self, migrations_dir: str = MIGRATIONS_DIR, baseline_schema: str = BASELINE_SCHEMA) -> None:
+        """Initialize the runner.
+
+        Args:
+            migrations_dir: Directory holding the migration files (default: ``src/migrations``).
+            baseline_schema: Path of the baseline schema (default: ``src/schema.sql``).
+        """
+        self.migrations_dir: str = migrations_dir
+        self.baseline_schema: str = baseline_schema
+
+    def discover(self) -> List[Migration]:
+        """Load the baseline and every migration file, ordered by version.
+
+        Returns:
+            The migrations.
+
+        Raises:
+            ValueError: If two files share a version number.
+        """
+        migrations = {0: Migration(0, "baseline", self.baseline_schema)}
+        for filename in sorted(os.listdir(self.migrations_dir)):
+            match = _MIGRATION_FILE.match(filename)
+            if not match:
+                continue
+            version = int(match.group(1))
+            if version in migrations:
+                raise ValueError(f"Duplicate migration version {version}: {filename}")
+            migrations[version] = Migration(version, match.group(2), os.path.join(self.migrations_dir, filename))
+        return [migrations[version] for version in sorted(migrations)]
+
+    async def applied(self) -> Dict[int, str]:
+        """Read the applied versions, creating the bookkeeping table if needed.
+
+        Returns:
+            Checksum of each applied migration by version.
+        """
+        async with DBContextManager(caller="migrations") as cur:
+            await cur.execute("""
+                CREATE TABLE IF NOT EXISTS SchemaMigrations (
+                    version INTEGER,
+                    name VARCHAR(255),
+                    checksum CHAR(64),
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (version)
+                )
+            """)
+            await cur.execute("SELECT version, checksum FROM SchemaMigrations")
+            rows = await cur.fetchall()
+        return {version: checksum for version, checksum in rows}
+
+    async def pending(self) -> List[Migration]:
+        """List the migrations that have not been applied yet.
+
+        Returns:
+            The pending migrations, in the order they would run.
+        """
+        applied = await self.applied()
+        pending = []
+        for migration in self.discover():
+            checksum = applied.get(migration.version)
+            if checksum is None:
+                pending.append(migration)
+            elif checksum != migration.checksum and migration.version != 0:
+                logger.warning("Migration %03d_%s was edited after it was applied", migration.version,
+                               migration.name)
+        return pending
+
+    async def migrate(self, dry_run: bool = False) -> List[Migration]:
+        """Apply every pending migration.
+
+        Args:
+            dry_run: Only report what would run (default: False).
+
+        Returns:
+            The migrations that were applied, or would be on a dry run.
+        """
+        if database_backend.dialect != "mysql":
+            logger.info("The %s backend creates its schema on startup, nothing to migrate",
+                        database_backend.dialect)
+            return []
+
+        pending = await self.pending()
+        if not pending:
+            logger.info("Database schema is up to date")
+        for migration in pending:
+            if dry_run:
+                logger.info("Would apply migration %03d_%s (%s statements)", migration.version, migration.name,
+                            len(migration.statements))
+                for statement in migration.statements:
+                    logger.info("  %s", " ".join(statement.split()))
+                continue
+            await self._apply(migration)
+        return pending
+
+    async def _apply(self, migration: Migration) -> None:
+        """Run one migration and record it.
+
+        Args:
+            migration: The migration to apply.
+        """
+        logger.info("Applying migration %03d_%s", migration.version, migration.name)
+        async with DBContextManager(caller="migrations") as cur:
+            for statement in migration.statements:
+                await cur.execute(statement)
+            await cur.execute("INSERT INTO SchemaMigrations (version, name, checksum) VALUES (%s, %s, %s)",
+                              (migration.version, migration.name, migration.checksum))
+
+
+migration_runner = MigrationRunner()
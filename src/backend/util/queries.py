@@ -0,0 +1,357 @@
+"""Named SQL statements used by the website, the OAuth handlers and the bot.
+
+Every statement the application runs is registered here and executed by
+name with ``QueryCursor.run``. Statements written in MySQL-only syntax carry
+a ``sqlite`` variant for the embedded SQLite backend.
+
+Days are Splatdle days in UTC and are passed in as parameters. A streak only
+counts while the player's ``last_played_date`` is today or yesterday.
+"""
+from .query_registry import query_registry
+
+# UserStats
+
+# Records a finished game in one statement. MySQL evaluates the assignments left to right, so
+# last_played_date still holds its old value until the last one. Affects no rows if the player
+# already played today.
+query_registry.register("user_stats.record_result", """
+    INSERT INTO UserStats (discord_id, streak, times_played, total_guesses, average_guess_count, last_played_date)
+    VALUES (%s, 1, 1, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        streak = CASE
+            WHEN last_played_date <=> VALUES(last_played_date) THEN streak
+            WHEN last_played_date <=> %s THEN streak + 1
+            ELSE 1
+        END,
+        times_played = IF(last_played_date <=> VALUES(last_played_date), times_played, times_played + 1),
+        total_guesses = IF(last_played_date <=> VALUES(last_played_date), total_guesses,
+                           total_guesses + VALUES(total_guesses)),
+        average_guess_count = IF(last_played_date <=> VALUES(last_played_date), average_guess_count,
+                                 total_guesses / times_played),
+        last_played_date = VALUES(last_played_date)
+""", sqlite="""
+    INSERT INTO UserStats (discord_id, streak, times_played, total_guesses, average_guess_count, last_played_date)
+    VALUES (%s, 1, 1, %s, %s, %s)
+    ON CONFLICT (discord_id) DO UPDATE SET
+        streak = CASE WHEN last_played_date IS %s THEN streak + 1 ELSE 1 END,
+        times_played = times_played + 1,
+        total_guesses = total_guesses + excluded.total_guesses,
+        average_guess_count = (total_guesses + excluded.total_guesses) * 1.0 / (times_played + 1),
+        last_played_date = excluded.last_played_date
+    WHERE UserStats.last_played_date IS NOT excluded.last_played_date
+""")
+
+query_registry.register("user_stats.submission", """
+    SELECT s.streak, s.times_played, s.total_guesses, s.last_played_date, t.guess_count, t.finished_at
+    FROM UserStats s
+    LEFT JOIN GameResults t ON t.played_on = s.last_played_date AND t.discord_id = s.discord_id
+    WHERE s.discord_id = %s
+""", read_only=True)
+
+query_registry.register("user_stats.write_behind", """
+    INSERT INTO UserStats (discord_id, streak, times_played, total_guesses, average_guess_count, last_played_date)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        streak = VALUES(streak),
+        times_played = VALUES(times_played),
+        total_guesses = VALUES(total_guesses),
+        average_guess_count = VALUES(average_guess_count),
+        last_played_date = VALUES(last_played_date)
+""", prepare=False, sqlite="""
+    INSERT INTO UserStats (discord_id, streak, times_played, total_guesses, average_guess_count, last_played_date)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (discord_id) DO UPDATE SET
+        streak = excluded.streak,
+        times_played = excluded.times_played,
+        total_guesses = excluded.total_guesses,
+        average_guess_count = excluded.average_guess_count,
+        last_played_date = excluded.last_played_date
+""")
+
+query_registry.register("user_stats.scores", """
+    SELECT discord_id, weighted_score
+    FROM UserStats
+    WHERE times_played > 0
+""", read_only=True, prepare=False)
+
+query_registry.register("user_stats.scores_since", """
+    SELECT discord_id, weighted_score
+    FROM UserStats
+    WHERE last_played_date >= %s AND times_played > 0
+""", read_only=True)
+
+# GlobalStats
+query_registry.register("global_stats.get", """
+    SELECT players, sum_player_averages, total_games, total_guesses
+    FROM GlobalStats
+    WHERE id = 1
+""", read_only=True)
+
+query_registry.register("global_stats.add", """
+    UPDATE GlobalStats
+    SET players = players + %s,
+        sum_player_averages = sum_player_averages + %s,
+        total_games = total_games + %s,
+        total_guesses = total_guesses + %s
+    WHERE id = 1
+""")
+
+query_registry.register("global_stats.rebuild", """
+    REPLACE INTO GlobalStats (id, players, sum_player_averages, total_games, total_guesses)
+    SELECT 1, COUNT(*), COALESCE(SUM(total_guesses * 1.0 / times_played), 0), COALESCE(SUM(times_played), 0),
+           COALESCE(SUM(total_guesses), 0)
+    FROM UserStats
+    WHERE times_played > 0
+""", prepare=False)
+
+# Leaderboards
+# Keyset pages: each page starts after the (sort key, discord_id) of the previous page's last row
+query_registry.register("leaderboard.global_page", """
+    SELECT discord_id, average_guess_count, CASE WHEN last_played_date >= %s THEN streak ELSE 0 END AS streak,
+           times_played, weighted_score
+    FROM UserStats
+    WHERE (weighted_score, discord_id) > (%s, %s)
+    ORDER BY weighted_score ASC, discord_id ASC
+    LIMIT %s
+""", read_only=True)
+
+query_registry.register("leaderboard.global_row", """
+    SELECT discord_id, average_guess_count, CASE WHEN last_played_date >= %s THEN streak ELSE 0 END AS streak,
+           times_played, weighted_score
+    FROM UserStats
+    WHERE discord_id = %s
+""", read_only=True)
+
+query_registry.register("leaderboard.day_page", """
+    SELECT discord_id, guess_count
+    FROM GameResults
+    WHERE played_on = %s AND (guess_count, discord_id) > (%s, %s)
+    ORDER BY guess_count ASC, discord_id ASC
+    LIMIT %s
+""", read_only=True)
+
+query_registry.register("leaderboard.global_position", """
+    SELECT COUNT(*)
+    FROM UserStats
+    WHERE (weighted_score, discord_id) <= (%s, %s)
+""", read_only=True)
+
+query_registry.register("leaderboard.day_position", """
+    SELECT COUNT(*)
+    FROM GameResults
+    WHERE played_on = %s AND (guess_count, discord_id) <= (%s, %s)
+""", read_only=True)
+
+query_registry.register("leaderboard.day", """
+    SELECT discord_id, guess_count
+    FROM GameResults
+    WHERE played_on = %s
+    ORDER BY guess_count ASC
+""", read_only=True)
+
+# GameResults
+query_registry.register("game_results.insert", """
+    INSERT INTO GameResults (played_on, discord_id, weapon, guess_count, finished_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE guess_count = VALUES(guess_count)
+""", sqlite="""
+    INSERT INTO GameResults (played_on, discord_id, weapon, guess_count, finished_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (played_on, discord_id) DO UPDATE SET guess_count = excluded.guess_count
+""")
+
+query_registry.register("game_results.write_behind", """
+    INSERT INTO GameResults (played_on, discord_id, weapon, guess_count, finished_at)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE guess_count = VALUES(guess_count)
+""", prepare=False, sqlite="""
+    INSERT INTO GameResults (played_on, discord_id, weapon, guess_count, finished_at)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (played_on, discord_id) DO UPDATE SET guess_count = excluded.guess_count
+""")
+
+query_registry.register("game_results.player_history", """
+    SELECT played_on, weapon, guess_count, finished_at
+    FROM GameResults
+    WHERE discord_id = %s AND played_on >= %s
+    ORDER BY played_on DESC
+""", read_only=True)
+
+query_registry.register("game_results.first_day", """
+    SELECT played_on
+    FROM GameResults
+    ORDER BY played_on ASC
+    LIMIT 1
+""", read_only=True, prepare=False)
+
+query_registry.register("game_results.day_summary", """
+    SELECT COUNT(*), COALESCE(SUM(guess_count), 0), MIN(guess_count), MAX(weapon)
+    FROM GameResults
+    WHERE played_on = %s
+""", read_only=True)
+
+query_registry.register("game_results.day_distribution", """
+    SELECT guess_count, COUNT(*)
+    FROM GameResults
+    WHERE played_on = %s
+    GROUP BY guess_count
+""", read_only=True)
+
+query_registry.register("game_results.partitions", """
+    SELECT PARTITION_NAME
+    FROM INFORMATION_SCHEMA.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'GameResults'
+""", read_only=True, prepare=False)
+
+# DailyRollups
+query_registry.register("daily_rollups.latest_day", """
+    SELECT played_on
+    FROM DailyRollups
+    ORDER BY played_on DESC
+    LIMIT 1
+""", read_only=True, prepare=False)
+
+query_registry.register("daily_rollups.save", """
+    REPLACE INTO DailyRollups (played_on, weapon, players, total_guesses, best_guess_count, distribution)
+    VALUES (%s, %s, %s, %s, %s, %s)
+""")
+
+query_registry.register("daily_rollups.range", """
+    SELECT played_on, weapon, players, total_guesses, best_guess_count, distribution
+    FROM DailyRollups
+    WHERE played_on >= %s AND played_on <= %s
+    ORDER BY played_on DESC
+""", read_only=True)
+
+# Guess-count histograms
+query_registry.register("day_histogram.get", """
+    SELECT bucket, players
+    FROM DailyGuessHistogram
+    WHERE played_on = %s
+""", read_only=True)
+
+query_registry.register("day_histogram.add", """
+    INSERT INTO DailyGuessHistogram (played_on, bucket, players)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE players = players + VALUES(players)
+""", sqlite="""
+    INSERT INTO DailyGuessHistogram (played_on, bucket, players)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (played_on, bucket) DO UPDATE SET players = players + excluded.players
+""")
+
+query_registry.register("day_histogram.clear", """
+    DELETE FROM DailyGuessHistogram
+    WHERE played_on = %s
+""")
+
+query_registry.register("day_histogram.rebuild", """
+    INSERT INTO DailyGuessHistogram (played_on, bucket, players)
+    SELECT played_on, CASE WHEN guess_count >= %s THEN %s ELSE guess_count END AS bucket, COUNT(*)
+    FROM GameResults
+    WHERE played_on = %s
+    GROUP BY played_on, bucket
+""")
+
+query_registry.register("player_histogram.get", """
+    SELECT bucket, games
+    FROM PlayerGuessHistogram
+    WHERE discord_id = %s
+""", read_only=True)
+
+query_registry.register("player_histogram.add", """
+    INSERT INTO PlayerGuessHistogram (discord_id, bucket, games)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE games = games + VALUES(games)
+""", sqlite="""
+    INSERT INTO PlayerGuessHistogram (discord_id, bucket, games)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (discord_id, bucket) DO UPDATE SET games = games + excluded.games
+""")
+
+query_registry.register("player_histogram.clear", """
+    DELETE FROM PlayerGuessHistogram
+    WHERE discord_id = %s
+""")
+
+query_registry.register("player_histogram.rebuild", """
+    INSERT INTO PlayerGuessHistogram (discord_id, bucket, games)
+    SELECT discord_id, CASE WHEN guess_count >= %s THEN %s ELSE guess_count END AS bucket, COUNT(*)
+    FROM GameResults
+    WHERE discord_id = %s
+    GROUP BY discord_id, bucket
+""")
+
+# DiscordProfiles
+query_registry.register("discord_profiles.by_id", """
+    SELECT discord_id, username, avatar, updated_at
+    FROM DiscordProfiles
+    WHERE discord_id = %s
+""", read_only=True)
+
+query_registry.register("discord_profiles.upsert", """
+    INSERT INTO DiscordProfiles (discord_id, username, avatar, updated_at)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        username = VALUES(username),
+        avatar = VALUES(avatar),
+        updated_at = VALUES(updated_at)
+""", sqlite="""
+    INSERT INTO DiscordProfiles (discord_id, username, avatar, updated_at)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (discord_id) DO UPDATE SET
+        username = excluded.username,
+        avatar = excluded.avatar,
+        updated_at = excluded.updated_at
+""")
+
+query_registry.register("discord_profiles.refresh", """
+    UPDATE DiscordProfiles
+    SET username = %s, avatar = %s, updated_at = %s
+    WHERE discord_id = %s
+""")
+
+# SplatdleChannels
+query_registry.register("splatdle_channels.all", """
+    SELECT guild_id, channel_id
+    FROM SplatdleChannels
+""", read_only=True, prepare=False)
+
+query_registry.register("splatdle_channels.by_guild", """
+    SELECT channel_id
+    FROM SplatdleChannels
+    WHERE guild_id = %s
+""", read_only=True)
+
+query_registry.register("splatdle_channels.upsert", """
+    INSERT INTO SplatdleChannels (guild_id, channel_id)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE channel_id = VALUES(channel_id)
+""", sqlite="""
+    INSERT INTO SplatdleChannels (guild_id, channel_id)
+    VALUES (%s, %s)
+    ON CONFLICT (guild_id) DO UPDATE SET channel_id = excluded.channel_id
+""")
+
+# UserTokens
+query_registry.register("user_tokens.by_id", """
+    SELECT access_token, refresh_token, expires_at
+    FROM UserTokens
+    WHERE discord_id = %s
+""", read_only=True)
+
+query_registry.register("user_tokens.upsert", """
+    INSERT INTO UserTokens (discord_id, access_token, refresh_token, expires_at)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        access_token = VALUES(access_token),
+        refresh_token = VALUES(refresh_token),
+        expires_at = VALUES(expires_at)
+""", sqlite="""
+    INSERT INTO UserTokens (discord_id, access_token, refresh_token, expires_at)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (discord_id) DO UPDATE SET
+        access_token = excluded.access_token,
+        refresh_token = excluded.refresh_token,
+        expires_at = excluded.expires_at
+""")
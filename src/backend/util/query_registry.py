@@ -0,0 +1,174 @@
+import re
+from typing import Any, Dict, Optional
+
+
+class NamedQuery:
+    """A SQL statement registered under a stable name.
+
+    Attributes:
+        name: Dotted name the statement is called by, e.g. ``user_stats.submission``.
+        sql: The statement text using ``%s`` placeholders.
+        sqlite_sql: The SQLite variant of the statement, using ``?`` placeholders.
+        read_only: Whether the statement only reads data.
+        prepare: Whether the statement may run as a server-side prepared statement.
+        statement_name: Identifier used for the server-side prepared statement.
+        param_count: Number of ``%s`` placeholders in the statement.
+    """
+
+    def __init__(self, name: str, sql: str, read_only: bool = False, prepare: bool = True,
+                 sqlite: Optional[str] = None) -> None:
+        """Initialize a named query.
+
+        Args:
+            name: Dotted name the statement is called by.
+            sql: The statement text using ``%s`` placeholders.
+            read_only: Whether the statement only reads data (default: False).
+            prepare: Whether the statement may be prepared server-side (default: True).
+            sqlite: SQLite variant for statements using MySQL-only syntax (default: same as ``sql``).
+        """
+        self.name: str = name
+        self.sql: str = " ".join(sql.split())
+        self.sqlite_sql: str = " ".join((sqlite or sql).split()).replace("%s", "?")
+        self.read_only: bool = read_only
+        self.prepare: bool = prepare
+        self.statement_name: str = "stmt_" + re.sub(r"\W", "_", name)
+        self.param_count: int = self.sql.count("%s")
+
+    @property
+    def prepared_sql(self) -> str:
+        """The statement text with ``?`` placeholders, as ``PREPARE`` expects.
+        """
+        return self.sql.replace("%s", "?")
+
+    def sql_for(self, dialect: str) -> str:
+        """The statement text for a backend's SQL dialect.
+
+        Args:
+            dialect: "mysql" or "sqlite".
+        """
+        return self.sqlite_sql if dialect == "sqlite" else self.sql
+
+
+class QueryStats:
+    """Call count and latency for one named query.
+
+    Attributes:
+        calls: Number of executions.
+        total_time: Total seconds spent executing.
+        max_time: Slowest single execution in seconds.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty query statistics.
+        """
+        self.calls: int = 0
+        self.total_time: float = 0.0
+        self.max_time: float = 0.0
+
+    def record(self, elapsed: float) -> None:
+        """Record one execution.
+
+        Args:
+            elapsed: Seconds the execution took.
+        """
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summarise the statistics in milliseconds.
+        """
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "avg_ms": round(self.total_time / self.calls * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_time * 1000, 3),
+        }
+
+
+class QueryRegistry:
+    """Central registry of the application's named SQL statements.
+
+    Code executes statements by name through ``QueryCursor.run`` rather than
+    passing inline SQL around, which lets the registry prepare them
+    server-side and keep per-query call counts and latency.
+
+    Attributes:
+        stats: Execution statistics per query name.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry.
+        """
+        self._queries: Dict[str, NamedQuery] = {}
+        self.stats: Dict[str, QueryStats] = {}
+
+    def register(self, name: str, sql: str, read_only: bool = False, prepare: bool = True,
+                 sqlite: Optional[str] = None) -> NamedQuery:
+        """Register a statement under a name.
+
+        Args:
+            name: Dotted name the statement is called by.
+            sql: The statement text using ``%s`` placeholders.
+            read_only: Whether the statement only reads data (default: False).
+            prepare: Whether the statement may be prepared server-side (default: True).
+            sqlite: SQLite variant for statements using MySQL-only syntax (default: same as ``sql``).
+
+        Returns:
+            The registered query.
+
+        Raises:
+            ValueError: If the name is already registered.
+        """
+        if name in self._queries:
+            raise ValueError(f"Query {name} is already registered")
+        query = NamedQuery(name, sql, read_only=read_only, prepare=prepare, sqlite=sqlite)
+        self._queries[name] = query
+        return query
+
+    def get(self, name: str) -> NamedQuery:
+        """Look up a registered statement.
+
+        Args:
+            name: Dotted name of the statement.
+
+        Returns:
+            The registered query.
+
+        Raises:
+            KeyError: If no statement is registered under the name.
+        """
+        try:
+            return self._queries[name]
+        except KeyError:
+            raise KeyError(f"No query registered as {name}") from None
+
+    def all(self) -> Dict[str, NamedQuery]:
+        """Return every registered statement keyed by name.
+        """
+        return dict(self._queries)
+
+    def record(self, name: str, elapsed: float) -> None:
+        """Record one execution of a named statement.
+
+        Args:
+            name: Dotted name of the statement.
+            elapsed: Seconds the execution took.
+        """
+        self.stats.setdefault(name, QueryStats()).record(elapsed)
+
+    def stats_by_total_time(self, limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Summarise statistics, heaviest queries first.
+
+        Args:
+            limit: Maximum number of queries to include (default: all).
+
+        Returns:
+            Dictionary of query name to summarised statistics.
+        """
+        ordered = sorted(self.stats.items(), key=lambda item: item[1].total_time, reverse=True)
+        return {name: stats.as_dict() for name, stats in ordered[:limit]}
+
+
+query_registry = QueryRegistry()
+
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Collapses concurrent calls for the same key into one.
+
+    The first caller for a key starts the call; anyone asking for the same
+    key while it is running waits for that call's result (or exception)
+    instead of starting another. A caller that is cancelled does not cancel
+    the call for the others.
+
+    Attributes:
+        calls: Calls that were started.
+        coalesced: Callers that waited on a call already running.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with nothing running.
+        """
+        self.calls: int = 0
+        self.coalesced: int = 0
+        self._running: Dict[K, asyncio.Task] = {}
+
+    async def do(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        """Run ``call`` for ``key``, or wait for the run already in flight.
+
+        Args:
+            key: Identifies calls that would return the same result.
+            call: Starts the call when none is running for ``key``.
+
+        Returns:
+            The call's result.
+        """
+        task = self._running.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            self._running[key] = task
+            task.add_done_callback(lambda _: self._running.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        """Number of calls running.
+        """
+        return len(self._running)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Optional, Sequence, Set
+from .config import global_config
+from .database_backend import database_backend
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_queries")
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "REPLACE")
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:\?\s*,\s*)+\?\s*\)")
+
+
+def fingerprint(sql: str) -> str:
+    """Normalise a statement so executions that differ only by values group together.
+
+    Args:
+        sql: The statement text.
+
+    Returns:
+        The statement with literals and placeholders replaced by ``?``.
+    """
+    normalised = " ".join(sql.split())
+    normalised = normalised.replace("%s", "?")
+    normalised = _STRING_LITERAL.sub("?", normalised)
+    normalised = _NUMBER_LITERAL.sub("?", normalised)
+    return _IN_LIST.sub("(?+)", normalised)
+
+
+def params_shape(params: Optional[Sequence[Any]]) -> str:
+    """Describe statement parameters by type without logging their values.
+
+    Args:
+        params: The statement parameters.
+
+    Returns:
+        A string such as ``(int, str)``.
+    """
+    if not params:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in params) + ")"
+
+
+class SlowQueryLog:
+    """Logs statements slower than the configured threshold.
+
+    Each slow statement is written to ``logs/slow_queries.log`` as a
+    fingerprint plus the shape of its parameters. The first time a
+    fingerprint turns up (and again once ``SLOW_QUERY_EXPLAIN_INTERVAL`` has
+    passed) it is run through the backend's ``EXPLAIN`` on a separate pooled
+    connection, so the request that hit the slow statement is not held up.
+
+    Attributes:
+        explained_at: When each fingerprint was last explained.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the slow query log.
+        """
+        self.explained_at: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether slow statements are being logged.
+        """
+        return global_config.slow_query_log
+
+    def is_slow(self, elapsed: float) -> bool:
+        """Whether a statement duration crosses the threshold.
+
+        Args:
+            elapsed: Seconds the statement took.
+        """
+        return elapsed * 1000 >= global_config.slow_query_threshold_ms
+
+    def record(self, sql: str, params: Optional[Sequence[Any]], elapsed: float, caller: str,
+               name: Optional[str] = None) -> None:
+        """Log a slow statement and schedule an EXPLAIN for it.
+
+        Args:
+            sql: The statement text.
+            params: The statement parameters.
+            elapsed: Seconds the statement took.
+            caller: The ``DBContextManager`` caller that ran it.
+            name: The registered query name, if it was run by name.
+        """
+        statement = fingerprint(sql)
+        slow_query_logger.warning("%.1fms caller=%s query=%s params=%s sql=%s",
+                                  elapsed * 1000, caller, name or "-", params_shape(params), statement)
+        logger.warning("Slow query (%.1fms) from %s: %s", elapsed * 1000, caller, name or statement[:80])
+
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        now = time.monotonic()
+        last = self.explained_at.get(statement)
+        if last is not None and now - last < global_config.slow_query_explain_interval:
+            return
+        self.explained_at[statement] = now
+        task = asyncio.create_task(self._explain(sql, params, statement))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, sql: str, params: Optional[Sequence[Any]], statement: str) -> None:
+        """Run EXPLAIN for a slow statement on a side connection and log the plan.
+
+        Args:
+            sql: The statement text.
+            params: The statement parameters.
+            statement: The statement fingerprint the plan is logged under.
+        """
+        try:
+            plan = await database_backend.explain(sql, params)
+        except Exception as e:
+            slow_query_logger.warning("  EXPLAIN %s failed: %s", statement, e)
+            return
+        for row in plan:
+            slow_query_logger.warning("  EXPLAIN %s: %s", statement,
+                                      ", ".join(f"{key}={value}" for key, value in row.items()))
+
+
+slow_query_log = SlowQueryLog()
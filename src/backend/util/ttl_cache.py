@@ -0,0 +1,101 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU cache whose entries expire after a time to live.
+
+    Once ``capacity`` entries are held, storing another evicts the least
+    recently used one. Expired entries are dropped when they are next looked
+    up. Not shared between worker processes, so anything cached here has to
+    be safe to serve slightly stale.
+
+    Attributes:
+        capacity: Most entries held at once.
+        ttl: Default seconds an entry stays fresh.
+        hits: Lookups answered from the cache.
+        misses: Lookups that found nothing fresh.
+    """
+
+    def __init__(self, capacity: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            capacity: Most entries held at once.
+            ttl: Default seconds an entry stays fresh.
+            clock: Source of the current time in seconds (default: ``time.monotonic``).
+        """
+        self.capacity: int = max(1, capacity)
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._clock: Callable[[], float] = clock
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Look up a fresh entry.
+
+        Args:
+            key: The entry's key.
+            default: Returned when there is no fresh entry (default: None).
+
+        Returns:
+            The cached value, or ``default``.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one if the cache is full.
+
+        Args:
+            key: The entry's key.
+            value: The value to cache.
+            ttl: Seconds this entry stays fresh (default: the cache's ``ttl``).
+        """
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        """Remove an entry.
+
+        Args:
+            key: The entry's key.
+
+        Returns:
+            The removed value, fresh or not, or None if there was none.
+        """
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        """Remove every entry; the hit and miss counters are kept.
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache's counters.
+
+        Returns:
+            ``size``, ``hits`` and ``misses``.
+        """
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        """Number of entries held, including expired ones not yet dropped.
+        """
+        return len(self._entries)
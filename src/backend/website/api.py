@@ -1,21 +1,39 @@
 from aiohttp.web_request import Request
 from functools import wraps
+from datetime import date, timedelta
 from aiohttp import web
-from typing import Any, Callable, Dict, Optional
-from .splatdle import Splatdle
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from .splatdle import Splatdle, splatdle_days
 from .oauth import DiscordOauthHandler
+from .submission_queue import submission_queue
+from .global_stats import game_delta, global_averages, record_games
+from .game_history import game_history
+from .histograms import histogram_bucket, histogram_dict, histograms, record_histograms
+from .rank_index import rank_index, weighted_score
+from .leaderboard_snapshots import BOARDS, leaderboard_snapshots
+from .player_stats import PlayerStats, player_stats
 from ..util.database_context_manager import DBContextManager
+from ..util.single_flight import SingleFlight
+from ..util.ttl_cache import TTLCache
+import hashlib
 import interactions
+import json
 import logging
 
 logger = logging.getLogger("API")
 
+HISTORY_DAYS = 30
+# Seconds a rendered leaderboard page is served as is, so a burst of polls costs one render
+LEADERBOARD_CACHE_SECONDS = 2
+
 
 def verify_access_token(func: Callable) -> Callable:
-    """Decorator to verify Discord access token from request cookies.
+    """Decorator to authenticate the request from its Discord cookies.
 
-    Extracts and validates the Discord access token from request cookies,
-    then passes the Discord user ID to the wrapped function.
+    Verifies the signed session cookie locally, falling back to the Discord
+    access token when the session is missing or close to expiry, then passes
+    the Discord user ID to the wrapped function. A renewed session cookie
+    is set on the wrapped function's response.
 
     Args:
         func: The function to wrap with token verification.
@@ -25,16 +43,16 @@ def verify_access_token(func: Callable) -> Callable:
     """
     @wraps(func)
     async def wrapper(self: 'SneakyApi', request: Request, *args: Any, **kwargs: Any) -> Any:
-        access_token = request.cookies.get("discord_access_token")
-        if not access_token:
-            return self.json_response("ACCESS_TOKEN_MISSING", "Access token is missing.", 401)
-
-        discord_info = await self.dc_token_handler.get_user_info(access_token)
+        discord_info, renewed_session = await self.dc_token_handler.authenticate(request)
         if not discord_info:
+            if not request.cookies.get("discord_session") and not request.cookies.get("discord_access_token"):
+                return self.json_response("ACCESS_TOKEN_MISSING", "Access token is missing.", 401)
             return self.json_response("ACCESS_TOKEN_INVALID", "Discord rejected access token.", 401)
-        discord_info["access_token"] = access_token
 
-        return await func(self, request, discord_info.get("id"), *args, **kwargs)
+        response = await func(self, request, discord_info.get("id"), *args, **kwargs)
+        if renewed_session:
+            self.dc_token_handler.set_session_cookie(response, renewed_session)
+        return response
     return wrapper
 
 
@@ -47,15 +65,21 @@ class SneakyApi:
     Attributes:
         splatdle: Splatdle game instance.
         dc_token_handler: Discord OAuth handler for authentication.
+        leaderboard_cache: Rendered leaderboard pages with their ETags, by scope, day and position.
     """
-    def __init__(self, bot: interactions.Client) -> None:
+    def __init__(self, bot: interactions.Client, dc_token_handler: Optional[DiscordOauthHandler] = None) -> None:
         """Initialize the API handler.
 
         Args:
             bot: The Discord bot client instance.
+            dc_token_handler: Discord OAuth handler to share with the web server (default: None, a new one).
         """
         self.splatdle: Splatdle = Splatdle(bot)
-        self.dc_token_handler: DiscordOauthHandler = DiscordOauthHandler()
+        self.dc_token_handler: DiscordOauthHandler = dc_token_handler or DiscordOauthHandler()
+        self.leaderboard_cache: TTLCache[Tuple[str, date, Union[str, int]], Tuple[str, bytes]] = \
+            TTLCache(256, LEADERBOARD_CACHE_SECONDS)
+        self._leaderboard_renders: SingleFlight[Tuple[str, date, Union[str, int]], Tuple[str, bytes]] = \
+            SingleFlight()
 
     def json_response(self, code: str, message: str, status: int = 200) -> web.Response:
         """Create a standardized JSON response.
@@ -75,8 +99,17 @@ class SneakyApi:
     async def post_stats(self, request: Request, discord_id: int) -> web.Response:
         """Submit Splatdle game statistics.
 
-        Processes a player's game completion, updates their statistics,
-        manages streaks, and adds them to today's leaderboard.
+        Records a finished game: rejects a guess count outside one to the
+        number of weapons, then updates the player's stats, the game history
+        and the day's and the player's guess-count histograms in one
+        transaction, and returns the histograms for the distribution bars. The
+        stats are written by a single upsert that leaves them alone if the
+        player already played today, and whether their streak carries on
+        follows from the date they last played, so no read-modify-write is
+        needed. A player the stats cache already shows as having played today
+        is answered without touching the database. With ``SUBMISSION_QUEUE=1``
+        the writes are left to the submission queue and the response is sent
+        once the result is journaled.
 
         Args:
             request: The HTTP request containing guess count data.
@@ -88,112 +121,152 @@ class SneakyApi:
         try:
             data = await request.json()
             guess_count = int(data["guess_count"])
-            async with DBContextManager() as cur:
-                await cur.execute("""
-                    SELECT streak, times_played, average_guess_count, played_today
-                    FROM UserStats
-                    WHERE discord_id = %s
-                    """, (discord_id,))
-                row = await cur.fetchone()
-
-                if row:
-                    old_streak, old_times_played, old_avg_guess, played_today = row
-
-                    # Check if they already played today
-                    if played_today:
-                        # Get their existing stats and today's game info
-                        await cur.execute("""
-                            SELECT guess_count, created_at
-                            FROM TodaysLeaderboard
-                            WHERE discord_id = %s
-                        """, (discord_id,))
-                        today_row = await cur.fetchone()
-
-                        # Get global average for comparison
-                        await cur.execute("SELECT AVG(average_guess_count) as global_avg FROM UserStats WHERE times_played > 0")
-                        global_avg_row = await cur.fetchone()
-                        global_avg = float(global_avg_row[0]) if global_avg_row and global_avg_row[0] else 0.0
-
-                        return web.json_response({
-                            "status": "already_played",
-                            "message": "Stats already posted for today",
-                            "playedAt": today_row[1].isoformat() if today_row else None,
-                            "todaysGuesses": today_row[0] if today_row else guess_count,
-                            "streak": old_streak,
-                            "totalGames": old_times_played,
-                            "averageGuesses": float(old_avg_guess),
-                            "globalAverage": global_avg
-                        })
-
-                    # Only count as a streak increase if they haven't already won today
-                    new_streak = old_streak + 1
-                    new_times_played = old_times_played + 1
-                    new_avg = ((old_avg_guess * old_times_played) +
-                               guess_count) / new_times_played
-
-                    await cur.execute("""
-                        UPDATE UserStats
-                        SET streak = %s, times_played = %s, average_guess_count = %s, played_today = TRUE
-                        WHERE discord_id = %s
-                    """, (new_streak, new_times_played, new_avg, discord_id))
-
-                    # Add to today's leaderboard
-                    await cur.execute("""
-                        INSERT INTO TodaysLeaderboard (discord_id, guess_count, created_at)
-                        VALUES (%s, %s, NOW())
-                        ON DUPLICATE KEY UPDATE guess_count = %s
-                    """, (discord_id, guess_count, guess_count))
-                else:
-                    # New user who just clutched their first W
-                    await cur.execute("""
-                        INSERT INTO UserStats (discord_id, streak, times_played, average_guess_count, played_today)
-                        VALUES (%s, %s, %s, %s, TRUE)
-                    """, (discord_id, 1, 1, guess_count))
-
-                    # Add to today's leaderboard
-                    await cur.execute("""
-                        INSERT INTO TodaysLeaderboard (discord_id, guess_count, created_at)
-                        VALUES (%s, %s, NOW())
-                        ON DUPLICATE KEY UPDATE guess_count = %s
-                    """, (discord_id, guess_count, guess_count))
-            # Get global average for comparison
-            await cur.execute("SELECT AVG(average_guess_count) as global_avg FROM UserStats WHERE times_played > 0")
-            global_avg_row = await cur.fetchone()
-            global_avg = float(global_avg_row[0]) if global_avg_row and global_avg_row[0] else 0.0
-
-            # Get updated user stats to return
-            await cur.execute("""
-                SELECT streak, times_played, average_guess_count, played_today
-                FROM UserStats
-                WHERE discord_id = %s
-            """, (discord_id,))
-            updated_stats = await cur.fetchone()
-
-            if updated_stats:
-                current_streak, total_games, current_avg, _ = updated_stats
-
-                # Calculate personal performance for this game
-                personal_performance = "equal"  # Default
-                if guess_count < current_avg:
-                    personal_performance = "above"  # Better than average (fewer guesses)
-                elif guess_count > current_avg:
-                    personal_performance = "below"  # Worse than average (more guesses)
+        except (ValueError, KeyError, TypeError):
+            return self.json_response("INVALID_REQUEST", "Missing or malformed guess count.", 400)
+        # Each guess names a different weapon, so no game takes more guesses than there are weapons
+        if not 1 <= guess_count <= len(self.splatdle.weapons):
+            return self.json_response("INVALID_REQUEST", "Guess count is out of range.", 400)
 
+        try:
+            if submission_queue.enabled:
+                return await self._post_stats_queued(discord_id, guess_count)
+            today, yesterday = splatdle_days()
+            stats = player_stats.cached(discord_id)
+            new_game = False
+            if stats is None or not stats.played_on(today):
+                weapon = self.splatdle.weapon_label()
+                async with DBContextManager(caller="post_stats") as cur:
+                    # Creates or updates the player's stats unless they already played today
+                    new_game = await cur.run("user_stats.record_result",
+                                             (discord_id, guess_count, guess_count, today, yesterday)) > 0
+                    if new_game:
+                        await cur.run("game_results.insert", (today, discord_id, weapon, guess_count))
+                        await record_histograms(cur, [(today, discord_id, guess_count)])
+
+                    # Read back rather than derived from the cache, which may predate another worker's write
+                    await cur.run("user_stats.submission", (discord_id,))
+                    row = await cur.fetchone()
+
+                    if new_game and row:
+                        new_players, average_change = game_delta(row[1], row[2], guess_count)
+                        await record_games(cur, new_players, average_change, 1, guess_count)
+
+                if not row:
+                    return web.json_response({"status": "ok"})
+                stats = PlayerStats.from_row(discord_id, row)
+                player_stats.put(stats)
+
+            # Read on the primary after a write, as the replica may not have the game yet
+            global_avg, global_game_avg = await global_averages(read_only=not new_game)
+
+            streak, total_games, total_guesses = stats.stored_streak, stats.times_played, stats.total_guesses
+            todays_guesses, played_at = stats.last_guess_count, stats.last_played_at
+            day_counts, player_counts = await histograms(today, discord_id, read_only=not new_game)
+            if new_game:
+                rank_index.update(discord_id, weighted_score(total_games, total_guesses))
+            average_guesses = total_guesses / total_games if total_games else 0.0
+
+            if not new_game:
                 return web.json_response({
-                    "status": "ok",
-                    "streak": current_streak,
+                    "status": "already_played",
+                    "message": "Stats already posted for today",
+                    "playedAt": played_at.isoformat() if played_at else None,
+                    "todaysGuesses": todays_guesses if todays_guesses is not None else guess_count,
+                    "streak": streak,
                     "totalGames": total_games,
-                    "averageGuesses": float(current_avg),
+                    "averageGuesses": average_guesses,
                     "globalAverage": global_avg,
-                    "isNewStreak": not row or not row[3],  # True if they hadn't played today
-                    "guessCount": guess_count,
-                    "personalPerformance": personal_performance
+                    "globalGameAverage": global_game_avg,
+                    "guessDistribution": histogram_dict(player_counts),
+                    "todaysDistribution": histogram_dict(day_counts)
                 })
-            else:
-                return web.json_response({"status": "ok"})
+
+            # Calculate personal performance for this game
+            personal_performance = "equal"  # Default
+            if guess_count < average_guesses:
+                personal_performance = "above"  # Better than average (fewer guesses)
+            elif guess_count > average_guesses:
+                personal_performance = "below"  # Worse than average (more guesses)
+
+            return web.json_response({
+                "status": "ok",
+                "streak": streak,
+                "totalGames": total_games,
+                "averageGuesses": average_guesses,
+                "globalAverage": global_avg,
+                "globalGameAverage": global_game_avg,
+                "isNewStreak": True,  # They hadn't played today
+                "guessCount": guess_count,
+                "personalPerformance": personal_performance,
+                "guessDistribution": histogram_dict(player_counts),
+                "todaysDistribution": histogram_dict(day_counts)
+            })
         except Exception as e:
             return web.json_response({"error": "Database error"}, status=500)
 
+    async def _post_stats_queued(self, discord_id: int, guess_count: int) -> web.Response:
+        """Submit Splatdle game statistics through the write-behind submission queue.
+
+        Args:
+            discord_id: The Discord user ID.
+            guess_count: Guesses taken in today's game.
+
+        Returns:
+            JSON response shaped like the one from ``post_stats``.
+        """
+        already_played, stats = await submission_queue.submit(discord_id, guess_count,
+                                                              self.splatdle.weapon_label())
+        # A flush may have just written results that have left ``pending`` but not reached the replica
+        global_avg, global_game_avg = await global_averages(read_only=already_played)
+        if not already_played:
+            rank_index.update(discord_id, weighted_score(stats.times_played, stats.total_guesses))
+            player_stats.put(PlayerStats(discord_id, stats.streak, stats.times_played, stats.total_guesses,
+                                         stats.played_on, stats.guess_count, stats.played_at))
+
+        # Results still waiting in the queue are not in the stored histograms yet
+        today, _ = splatdle_days()
+        day_counts, player_counts = await histograms(today, discord_id, read_only=already_played)
+        for pending in list(submission_queue.pending.values()):
+            if pending.played_on == today:
+                day_counts.append((histogram_bucket(pending.guess_count), 1))
+            if pending.discord_id == int(discord_id):
+                player_counts.append((histogram_bucket(pending.guess_count), 1))
+
+        if already_played:
+            return web.json_response({
+                "status": "already_played",
+                "message": "Stats already posted for today",
+                "playedAt": stats.played_at.isoformat() if stats.played_at else None,
+                "todaysGuesses": stats.guess_count if stats.guess_count is not None else guess_count,
+                "streak": stats.streak,
+                "totalGames": stats.times_played,
+                "averageGuesses": stats.average_guess_count,
+                "globalAverage": global_avg,
+                "globalGameAverage": global_game_avg,
+                "guessDistribution": histogram_dict(player_counts),
+                "todaysDistribution": histogram_dict(day_counts)
+            })
+
+        personal_performance = "equal"
+        if guess_count < stats.average_guess_count:
+            personal_performance = "above"
+        elif guess_count > stats.average_guess_count:
+            personal_performance = "below"
+
+        return web.json_response({
+            "status": "ok",
+            "streak": stats.streak,
+            "totalGames": stats.times_played,
+            "averageGuesses": stats.average_guess_count,
+            "globalAverage": global_avg,
+            "globalGameAverage": global_game_avg,
+            "isNewStreak": True,
+            "guessCount": guess_count,
+            "personalPerformance": personal_performance,
+            "guessDistribution": histogram_dict(player_counts),
+            "todaysDistribution": histogram_dict(day_counts)
+        })
+
     async def serve_splatdle(self, request: Request) -> web.Response:
         """Serve Splatdle game data.
 
@@ -206,9 +279,118 @@ class SneakyApi:
         Returns:
             JSON response containing weapons list and current answer.
         """
-        current_weapon = self.splatdle.get_current_weapon()
         # Format answer as "WeaponName (GameName)" for frontend compatibility
-        answer = f"{current_weapon['name']} ({current_weapon['game']})" if current_weapon else ""
+        answer = self.splatdle.weapon_label()
         return web.json_response({"weapons": self.splatdle.weapons,
                                   "answer": answer
                                   })
+
+    async def get_leaderboard(self, request: Request) -> web.Response:
+        """Serve a page of the global, today's or yesterday's leaderboard.
+
+        Pages come from the same snapshot as ``/splatdle-leaderboard`` and
+        are walked with keyset cursors. Each rendered page is kept for
+        ``LEADERBOARD_CACHE_SECONDS`` and concurrent requests for a page that
+        is being rendered wait for that render, so clients polling at once
+        collapse into one snapshot lookup. Names come from the local profile
+        cache only; Discord is never called. The weak ETag changes with the
+        snapshot version, and a matching ``If-None-Match`` gets a 304.
+
+        Args:
+            request: The HTTP request, with optional ``scope`` (default "global"), ``cursor`` (a ``nextCursor``
+                from an earlier page) and 1-based ``page`` query parameters; ``cursor`` wins over ``page``.
+
+        Returns:
+            JSON response with the page's rows, the snapshot version and the next page's cursor.
+        """
+        scope = request.query.get("scope", "global")
+        cursor = request.query.get("cursor")
+        try:
+            index = int(request.query.get("page", "1")) - 1
+        except ValueError:
+            index = -1
+        if scope not in BOARDS or (cursor is None and index < 0):
+            return self.json_response("INVALID_REQUEST", "Unknown leaderboard or page.", 400)
+
+        today, _ = splatdle_days()
+        key = (scope, today, cursor if cursor is not None else index)
+        cached = self.leaderboard_cache.get(key)
+        if cached is None:
+            try:
+                cached = await self._leaderboard_renders.do(
+                    key, lambda: self._render_leaderboard(scope, today, cursor, index))
+            except ValueError:
+                return self.json_response("INVALID_REQUEST", "Malformed leaderboard cursor.", 400)
+            except Exception as e:
+                logger.error(f"Failed to build the {scope} leaderboard: {e}")
+                return web.json_response({"error": "Database error"}, status=500)
+            self.leaderboard_cache.set(key, cached)
+
+        etag, body = cached
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={LEADERBOARD_CACHE_SECONDS}"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    async def _render_leaderboard(self, scope: str, today: date, cursor: Optional[str],
+                                  index: int) -> Tuple[str, bytes]:
+        """Render a leaderboard page as JSON along with its ETag.
+
+        Args:
+            scope: Which leaderboard: "global", "today" or "yesterday".
+            today: Today's Splatdle day.
+            cursor: Cursor of the page to render, if walking by cursor.
+            index: Zero-based page number, used when there is no cursor.
+
+        Returns:
+            The ETag and the response body.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        if cursor is not None:
+            page = await leaderboard_snapshots.page_after(scope, cursor)
+        else:
+            page = await leaderboard_snapshots.page(scope, index)
+        version = leaderboard_snapshots.version
+        if page is None:
+            data = {"board": scope, "version": version, "page": None if cursor else index + 1, "rows": [],
+                    "hasNext": False, "nextCursor": None}
+        else:
+            data = page.to_json(leaderboard_snapshots.per_page)
+        position = hashlib.sha1(f"{cursor if cursor is not None else index}".encode()).hexdigest()[:12]
+        etag = f'W/"{scope}-{today:%Y%m%d}-{version}-{position}"'
+        return etag, json.dumps(data).encode()
+
+    @verify_access_token
+    async def get_history(self, request: Request, discord_id: int) -> web.Response:
+        """Get the player's Splatdle games over the last 30 days.
+
+        Each finished day also comes with its rollup, so the player's result
+        can be shown next to how everyone else did that day.
+
+        Args:
+            request: The HTTP request.
+            discord_id: The Discord user ID (injected by decorator).
+
+        Returns:
+            JSON response with the player's games and the matching daily rollups.
+        """
+        try:
+            today, _ = splatdle_days()
+            games = await game_history.player_history(int(discord_id), today, HISTORY_DAYS)
+            rollups = await game_history.rollups(today - timedelta(days=HISTORY_DAYS - 1), today)
+        except Exception as e:
+            logger.error(f"Failed to fetch game history for {discord_id}: {e}")
+            return web.json_response({"error": "Database error"}, status=500)
+
+        return web.json_response({
+            "games": [{
+                "date": game["played_on"].isoformat(),
+                "weapon": game["weapon"],
+                "guessCount": game["guess_count"],
+                "finishedAt": game["finished_at"].isoformat() if game["finished_at"] else None,
+            } for game in games],
+            "days": rollups,
+        })
@@ -0,0 +1,180 @@
+import json
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from ..util.database_backend import database_backend
+from ..util.database_context_manager import DBContextManager
+
+logger = logging.getLogger("GameHistory")
+
+
+def month_start(day: date, months_ahead: int = 0) -> date:
+    """Return the first day of the month ``months_ahead`` months after ``day``'s month.
+
+    Args:
+        day: Any day in the starting month.
+        months_ahead: Number of months to move forward (default: 0).
+
+    Returns:
+        The first day of that month.
+    """
+    month_index = day.year * 12 + day.month - 1 + months_ahead
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class GameHistory:
+    """Every finished Splatdle game, and one summary row per finished day.
+
+    Games are written to ``GameResults`` as they are submitted. Once a day is
+    over it never changes again, so it is summarised once into
+    ``DailyRollups`` at the next rollover instead of being aggregated on every
+    read. Days missed while the server was down are caught up the next time
+    ``roll_up_missing`` runs.
+
+    On MySQL, ``GameResults`` is partitioned by month so old months can be
+    dropped or archived without touching recent ones; ``ensure_partitions``
+    keeps a partition ready for the current and the next month.
+    """
+
+    async def roll_up(self, day: date) -> Dict[str, Any]:
+        """Summarise one day's games into ``DailyRollups``.
+
+        Args:
+            day: The Splatdle day to summarise.
+
+        Returns:
+            The rollup that was saved.
+        """
+        async with DBContextManager(caller="daily_rollup") as cur:
+            await cur.run("game_results.day_summary", (day,))
+            players, total_guesses, best_guess_count, weapon = await cur.fetchone()
+            await cur.run("game_results.day_distribution", (day,))
+            distribution = json.dumps({str(guess_count): count for guess_count, count in await cur.fetchall()})
+            await cur.run("daily_rollups.save", (day, weapon, players, total_guesses, best_guess_count, distribution))
+        return self._rollup_dict(day, weapon, players, total_guesses, best_guess_count, distribution)
+
+    async def roll_up_missing(self, today: date) -> int:
+        """Summarise every finished day that has no rollup yet.
+
+        Args:
+            today: Today's Splatdle day, which is still being played and is left out.
+
+        Returns:
+            Number of days summarised.
+        """
+        async with DBContextManager(caller="daily_rollup", read_only=True) as cur:
+            await cur.run("daily_rollups.latest_day")
+            latest = await cur.fetchone()
+            if latest is None:
+                await cur.run("game_results.first_day")
+                first = await cur.fetchone()
+                day = first[0] if first else None
+            else:
+                day = latest[0] + timedelta(days=1)
+
+        rolled_up = 0
+        while day is not None and day < today:
+            await self.roll_up(day)
+            rolled_up += 1
+            day += timedelta(days=1)
+        if rolled_up:
+            logger.info("Rolled up %s finished Splatdle day(s)", rolled_up)
+        return rolled_up
+
+    async def ensure_partitions(self, today: date) -> List[str]:
+        """Split ``p_future`` so the current and next month have their own partitions.
+
+        Only MySQL partitions ``GameResults``; on other backends this does nothing.
+
+        Args:
+            today: Today's Splatdle day.
+
+        Returns:
+            Names of the partitions that were added.
+        """
+        if database_backend.dialect != "mysql":
+            return []
+
+        async with DBContextManager(caller="game_partitions", read_only=True) as cur:
+            await cur.run("game_results.partitions")
+            existing = {row[0] for row in await cur.fetchall()}
+        if not existing or "p_future" not in existing:
+            return []
+
+        added = []
+        definitions = []
+        for months_ahead in (0, 1):
+            start = month_start(today, months_ahead)
+            name = f"p{start:%Y%m}"
+            if name in existing:
+                continue
+            added.append(name)
+            definitions.append(f"PARTITION {name} VALUES LESS THAN ('{month_start(start, 1).isoformat()}')")
+        if not definitions:
+            return []
+
+        definitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+        async with DBContextManager(caller="game_partitions") as cur:
+            await cur.execute(f"ALTER TABLE GameResults REORGANIZE PARTITION p_future INTO ({', '.join(definitions)})")
+        logger.info("Added GameResults partition(s) %s", ", ".join(added))
+        return added
+
+    async def leaderboard(self, day: date) -> List[Dict[str, Any]]:
+        """Get one day's results, best first.
+
+        Args:
+            day: The Splatdle day.
+
+        Returns:
+            Rows with ``discord_id`` and ``guess_count``.
+        """
+        async with DBContextManager(use_dict=True, caller="leaderboard_day", read_only=True) as cur:
+            await cur.run("leaderboard.day", (day,))
+            return list(await cur.fetchall())
+
+    async def player_history(self, discord_id: int, today: date, days: int = 30) -> List[Dict[str, Any]]:
+        """Get a player's games over the last ``days`` days, newest first.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            today: Today's Splatdle day, counted as the last of the ``days``.
+            days: How many days to look back over (default: 30).
+
+        Returns:
+            Rows with ``played_on``, ``weapon``, ``guess_count`` and ``finished_at``.
+        """
+        async with DBContextManager(use_dict=True, caller="player_history", read_only=True) as cur:
+            await cur.run("game_results.player_history", (discord_id, today - timedelta(days=days - 1)))
+            return list(await cur.fetchall())
+
+    async def rollups(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """Get the saved rollups between two days, newest first.
+
+        Args:
+            start: First day, inclusive.
+            end: Last day, inclusive.
+
+        Returns:
+            One dictionary per day, shaped like the return value of ``roll_up``.
+        """
+        async with DBContextManager(caller="daily_rollups", read_only=True) as cur:
+            await cur.run("daily_rollups.range", (start, end))
+            rows = await cur.fetchall()
+        return [self._rollup_dict(*row) for row in rows]
+
+    @staticmethod
+    def _rollup_dict(played_on: date, weapon: Optional[str], players: int, total_guesses: int,
+                     best_guess_count: Optional[int], distribution: Optional[str]) -> Dict[str, Any]:
+        """Shape a ``DailyRollups`` row for the API and the bot.
+        """
+        return {
+            "date": played_on.isoformat(),
+            "weapon": weapon,
+            "players": players,
+            "averageGuesses": total_guesses / players if players else None,
+            "bestGuesses": best_guess_count,
+            "distribution": json.loads(distribution) if distribution else {},
+        }
+
+
+game_history = GameHistory()
@@ -0,0 +1,72 @@
+from typing import Tuple
+from ..util.database_context_manager import DBContextManager, QueryCursor
+
+
+def game_delta(times_played: int, total_guesses: int, guess_count: int) -> Tuple[int, float]:
+    """Work out how one newly recorded game moves the player-based global totals.
+
+    Args:
+        times_played: The player's games played, including the new one.
+        total_guesses: The player's guesses across all games, including the new one.
+        guess_count: Guesses taken in the new game.
+
+    Returns:
+        The change in number of players and the change in the sum of player averages.
+    """
+    new_average = total_guesses / times_played
+    if times_played <= 1:
+        return 1, new_average
+    old_average = (total_guesses - guess_count) / (times_played - 1)
+    return 0, new_average - old_average
+
+
+async def record_games(cur: QueryCursor, players: int, sum_player_averages: float, games: int,
+                       guesses: int) -> None:
+    """Add newly recorded games to the ``GlobalStats`` totals.
+
+    Runs on the caller's cursor so the totals change in the same transaction
+    as the games themselves.
+
+    Args:
+        cur: Cursor of the transaction recording the games.
+        players: Number of players who played their first game.
+        sum_player_averages: Change in the sum of player averages.
+        games: Number of games recorded.
+        guesses: Guesses taken across the recorded games.
+    """
+    await cur.run("global_stats.add", (players, sum_player_averages, games, guesses))
+
+
+async def rebuild_global_stats() -> None:
+    """Recompute the ``GlobalStats`` totals from ``UserStats``.
+
+    ``record_games`` moves the sum of player averages by float differences,
+    so it drifts a little with every game; running this once a day puts it
+    back to the exact value.
+    """
+    async with DBContextManager(caller="global_stats_rebuild") as cur:
+        await cur.run("global_stats.rebuild")
+
+
+async def global_averages(read_only: bool = True) -> Tuple[float, float]:
+    """Get the global averages from the ``GlobalStats`` totals.
+
+    Served by the read replica when one is available, unless the caller
+    has just written and needs to see its own write.
+
+    Args:
+        read_only: Whether the read may go to the replica (default: True).
+
+    Returns:
+        The average of every player's average guess count, and the average
+        guess count over all games played; 0.0 where nobody has played yet.
+    """
+    async with DBContextManager(caller="global_average", read_only=read_only) as cur:
+        await cur.run("global_stats.get")
+        row = await cur.fetchone()
+    if not row:
+        return 0.0, 0.0
+    players, sum_player_averages, total_games, total_guesses = row
+    player_average = float(sum_player_averages) / players if players else 0.0
+    game_average = float(total_guesses) / total_games if total_games else 0.0
+    return player_average, game_average
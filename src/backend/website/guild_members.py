@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+import interactions
+
+logger = logging.getLogger("GuildMembers")
+
+
+class GuildMembership:
+    """Member IDs of every guild the bot is in, kept current from the gateway.
+
+    Each guild's members are requested once over the gateway when the bot
+    joins it or starts up, then kept up to date from member add and remove
+    events, so scoping a leaderboard to a guild never fetches members per
+    request. Only IDs are held, which keeps guilds with tens of thousands of
+    members cheap.
+
+    Attributes:
+        guilds: Member IDs by guild ID, for guilds whose members have been loaded.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index.
+        """
+        self.guilds: Dict[int, Set[int]] = {}
+        # Gateway member requests are rate limited, so guilds are loaded one at a time
+        self._loading: asyncio.Lock = asyncio.Lock()
+
+    def members(self, guild_id: int) -> Optional[Set[int]]:
+        """Get a guild's member IDs.
+
+        Args:
+            guild_id: The guild's ID.
+
+        Returns:
+            The member IDs, or None if the guild has not been loaded yet.
+        """
+        return self.guilds.get(int(guild_id))
+
+    def set_members(self, guild_id: int, member_ids: Iterable[int]) -> None:
+        """Replace a guild's member IDs.
+
+        Args:
+            guild_id: The guild's ID.
+            member_ids: Every member's ID.
+        """
+        self.guilds[int(guild_id)] = {int(member_id) for member_id in member_ids}
+
+    def add(self, guild_id: int, member_id: int) -> None:
+        """Record a member joining a loaded guild.
+
+        Args:
+            guild_id: The guild's ID.
+            member_id: The member's ID.
+        """
+        members = self.guilds.get(int(guild_id))
+        if members is not None:
+            members.add(int(member_id))
+
+    def remove(self, guild_id: int, member_id: int) -> None:
+        """Record a member leaving a guild.
+
+        Args:
+            guild_id: The guild's ID.
+            member_id: The member's ID.
+        """
+        members = self.guilds.get(int(guild_id))
+        if members is not None:
+            members.discard(int(member_id))
+
+    def forget(self, guild_id: int) -> None:
+        """Drop a guild the bot has left.
+
+        Args:
+            guild_id: The guild's ID.
+        """
+        self.guilds.pop(int(guild_id), None)
+
+    async def load(self, guild: interactions.Guild) -> None:
+        """Request a guild's members over the gateway and index them.
+
+        Args:
+            guild: The guild to load.
+        """
+        async with self._loading:
+            if int(guild.id) in self.guilds:
+                return
+            if not guild.chunked.is_set():
+                await guild.gateway_chunk(wait=True, presences=False)
+            self.set_members(guild.id, (member.id for member in guild.members))
+        logger.info("Indexed %s member(s) of guild %s", len(self.guilds[int(guild.id)]), guild.id)
+
+
+guild_membership = GuildMembership()
@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+from ..util.database_context_manager import DBContextManager, QueryCursor
+
+# The last bucket holds every game that took at least this many guesses
+HISTOGRAM_BUCKETS = 10
+
+
+def histogram_bucket(guess_count: int) -> int:
+    """Get the histogram bucket a game falls into.
+
+    Args:
+        guess_count: Guesses taken in the game.
+
+    Returns:
+        The guess count, capped at ``HISTOGRAM_BUCKETS``.
+    """
+    return min(max(guess_count, 1), HISTOGRAM_BUCKETS)
+
+
+def histogram_dict(counts: Iterable[Tuple[int, int]]) -> Dict[str, int]:
+    """Shape bucket counts for the API and the bot.
+
+    Args:
+        counts: Pairs of bucket and count; buckets may repeat.
+
+    Returns:
+        Every bucket from "1" up to e.g. "10+", in order, with missing ones at 0.
+    """
+    totals = Counter()
+    for bucket, count in counts:
+        totals[int(bucket)] += int(count)
+    labels = [str(bucket) for bucket in range(1, HISTOGRAM_BUCKETS)] + [f"{HISTOGRAM_BUCKETS}+"]
+    return {label: totals[bucket] for bucket, label in enumerate(labels, start=1)}
+
+
+async def record_histograms(cur: QueryCursor, games: List[Tuple[date, int, int]]) -> None:
+    """Add newly recorded games to the day and player histograms.
+
+    Runs on the caller's cursor so the histograms change in the same
+    transaction as the games themselves.
+
+    Args:
+        cur: Cursor of the transaction recording the games.
+        games: Day, Discord user ID and guess count of each recorded game.
+    """
+    days = Counter((played_on, histogram_bucket(guess_count)) for played_on, _, guess_count in games)
+    players = Counter((discord_id, histogram_bucket(guess_count)) for _, discord_id, guess_count in games)
+    await cur.run_many("day_histogram.add", [(played_on, bucket, n) for (played_on, bucket), n in days.items()])
+    await cur.run_many("player_histogram.add",
+                       [(discord_id, bucket, n) for (discord_id, bucket), n in players.items()])
+
+
+async def rebuild_histograms(cur: QueryCursor, days: Iterable[date], discord_ids: Iterable[int]) -> None:
+    """Recount the histograms of some days and players from ``GameResults``.
+
+    Args:
+        cur: Cursor to run the rebuild on.
+        days: Days whose histograms are recounted.
+        discord_ids: Players whose histograms are recounted.
+    """
+    for played_on in set(days):
+        await cur.run("day_histogram.clear", (played_on,))
+        await cur.run("day_histogram.rebuild", (HISTOGRAM_BUCKETS, HISTOGRAM_BUCKETS, played_on))
+    for discord_id in set(discord_ids):
+        await cur.run("player_histogram.clear", (discord_id,))
+        await cur.run("player_histogram.rebuild", (HISTOGRAM_BUCKETS, HISTOGRAM_BUCKETS, discord_id))
+
+
+async def histograms(played_on: date, discord_id: int,
+                     read_only: bool = True) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Read one day's histogram and one player's lifetime histogram.
+
+    Args:
+        played_on: The Splatdle day.
+        discord_id: The player's Discord user ID.
+        read_only: Whether the read may go to the replica; pass False right after writing a game (default: True).
+
+    Returns:
+        The day's and the player's bucket counts as pairs of bucket and count.
+    """
+    async with DBContextManager(caller="histograms", read_only=read_only) as cur:
+        await cur.run("day_histogram.get", (played_on,))
+        day_counts = list(await cur.fetchall())
+        await cur.run("player_histogram.get", (discord_id,))
+        player_counts = list(await cur.fetchall())
+    return day_counts, player_counts
+
+
+async def day_players(played_on: date) -> int:
+    """Count the players who finished a day's game, from the day's histogram.
+
+    Args:
+        played_on: The Splatdle day.
+
+    Returns:
+        Number of players.
+    """
+    async with DBContextManager(caller="histograms", read_only=True) as cur:
+        await cur.run("day_histogram.get", (played_on,))
+        return sum(count for _, count in await cur.fetchall())
@@ -0,0 +1,397 @@
+import asyncio
+import base64
+import binascii
+import json
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import interactions
+from ..util.config import global_config
+from ..util.database_context_manager import DBContextManager
+from .guild_members import guild_membership
+from .histograms import day_players
+from .profiles import profile_cache
+from .rank_index import rank_index
+from .splatdle import splatdle_days
+
+# Page query, keyset columns and position query of each board. The page query takes its day, the cursor
+# and a row limit; the position query counts the rows up to a cursor, on the same day for the day boards.
+BOARDS: Dict[str, Tuple[str, Tuple[str, ...], str]] = {
+    "global": ("leaderboard.global_page", ("weighted_score", "discord_id"), "leaderboard.global_position"),
+    "today": ("leaderboard.day_page", ("guess_count", "discord_id"), "leaderboard.day_position"),
+    "yesterday": ("leaderboard.day_page", ("guess_count", "discord_id"), "leaderboard.day_position"),
+}
+
+
+def encode_cursor(values: Tuple[Any, ...]) -> str:
+    """Turn the keyset values of a page's last row into an opaque cursor.
+
+    Args:
+        values: The row's keyset column values.
+
+    Returns:
+        A URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """Read the keyset values back out of a cursor made by ``encode_cursor``.
+
+    Args:
+        cursor: The cursor.
+        size: Number of keyset columns the board has.
+
+    Returns:
+        The keyset values.
+
+    Raises:
+        ValueError: If the cursor is malformed or does not fit the board.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != size \
+            or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        raise ValueError("Cursor does not fit this leaderboard")
+    return tuple(values)
+
+
+class LeaderboardPage:
+    """One page of a leaderboard snapshot.
+
+    Attributes:
+        board: Which leaderboard: "global", "today", "yesterday" or "guild".
+        day: The Splatdle day the page was built for.
+        index: Zero-based page number.
+        version: Snapshot version the page belongs to.
+        rows: One dictionary per player, best first, with their position and profile.
+        has_next: Whether there is a page after this one.
+        total: Number of players on the leaderboard, if known.
+        next_cursor: Cursor of the page after this one, if there is one and the board is keyset paginated.
+        built_at: When the page was built, in UTC.
+    """
+
+    def __init__(self, board: str, day: date, index: int, version: int, rows: List[Dict[str, Any]],
+                 has_next: bool, total: Optional[int], next_cursor: Optional[str] = None) -> None:
+        """Initialize a page.
+
+        Args:
+            board: Which leaderboard: "global", "today", "yesterday" or "guild".
+            day: The Splatdle day the page was built for.
+            index: Zero-based page number.
+            version: Snapshot version the page belongs to.
+            rows: One dictionary per player, best first.
+            has_next: Whether there is a page after this one.
+            total: Number of players on the leaderboard, if known.
+            next_cursor: Cursor of the page after this one (default: None).
+        """
+        self.board: str = board
+        self.day: date = day
+        self.index: int = index
+        self.version: int = version
+        self.rows: List[Dict[str, Any]] = rows
+        self.has_next: bool = has_next
+        self.total: Optional[int] = total
+        self.next_cursor: Optional[str] = next_cursor
+        self.built_at: datetime = datetime.now(timezone.utc)
+
+    def page_count(self, per_page: int) -> Optional[int]:
+        """Number of pages, if the number of players is known.
+
+        Args:
+            per_page: Rows per page.
+        """
+        return -(-self.total // per_page) if self.total else None
+
+    def to_json(self, per_page: int) -> Dict[str, Any]:
+        """Shape the page for the website.
+
+        Args:
+            per_page: Rows per page.
+        """
+        return {
+            "board": self.board,
+            "date": self.day.isoformat(),
+            "version": self.version,
+            "page": self.index + 1,
+            "pageCount": self.page_count(per_page),
+            "players": self.total,
+            "hasNext": self.has_next,
+            "nextCursor": self.next_cursor,
+            "builtAt": self.built_at.isoformat(),
+            "rows": self.rows,
+        }
+
+
+class LeaderboardSnapshots:
+    """Leaderboard pages shared by every bot invocation and the website.
+
+    A page is built once per snapshot version and then served from memory,
+    so the same page viewed in several guilds, or by the bot and the
+    website, costs one database read and one round of profile lookups. The
+    version is the number of games in ``GlobalStats``; it is read at most
+    every ``LEADERBOARD_SNAPSHOT_SECONDS``, and a new game moves it on and
+    drops the cached pages. Pages are built with keyset pagination as they
+    are first asked for, keeping the cursor of each page so the next one
+    starts where it ended. A cursor from an older version that no longer
+    lines up with a cached page is read straight from the database instead.
+
+    Pages may be built without a client to look up players, for example for
+    the website; rows left without a name are filled in the next time the
+    page is served to a caller that has one.
+
+    A guild's board is the global board narrowed to that guild's members. Its
+    order is worked out once per version from the gateway-maintained member
+    index and the scores in the rank index, then each page only reads the
+    stats of the players on it.
+
+    Attributes:
+        interval: Least seconds between checks for a new version.
+        per_page: Rows per page.
+        version: Current snapshot version.
+    """
+
+    def __init__(self, interval: float, per_page: int = 10) -> None:
+        """Initialize an empty snapshot.
+
+        Args:
+            interval: Least seconds between checks for a new version.
+            per_page: Rows per page (default: 10).
+        """
+        self.interval: float = interval
+        self.per_page: int = per_page
+        self.version: int = -1
+        self._checked_at: float = 0.0
+        self._pages: Dict[Tuple[str, date, int], LeaderboardPage] = {}
+        self._cursors: Dict[Tuple[str, date], List[Tuple[Any, ...]]] = {}
+        self._totals: Dict[Tuple[str, date], Optional[int]] = {}
+        # One per board rather than per day, so they do not pile up as the days roll over
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._guild_orders: Dict[int, List[int]] = {}
+        self._guild_pages: Dict[Tuple[int, date, int], LeaderboardPage] = {}
+
+    async def current_version(self) -> int:
+        """Get the snapshot version, checking the database if the interval has passed.
+
+        Returns:
+            The version.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return self.version
+        self._checked_at = now
+        async with DBContextManager(caller="leaderboard_snapshot", read_only=True) as cur:
+            await cur.run("global_stats.get")
+            row = await cur.fetchone()
+        version = int(row[2]) if row else 0
+        if version != self.version:
+            self.version = version
+            self._pages.clear()
+            self._cursors.clear()
+            self._totals.clear()
+            self._guild_orders.clear()
+            self._guild_pages.clear()
+        return self.version
+
+    async def page(self, board: str, index: int,
+                   bot: Optional[interactions.Client] = None) -> Optional[LeaderboardPage]:
+        """Get a page of a leaderboard from the current snapshot.
+
+        Args:
+            board: Which leaderboard: "global", "today" or "yesterday".
+            index: Zero-based page number.
+            bot: Client used to look up players without a cached profile (default: None).
+
+        Returns:
+            The page, or None if it has no rows.
+
+        Raises:
+            KeyError: If the board does not exist.
+        """
+        query, cursor_keys, _ = BOARDS[board]
+        day, params = self._day_params(board)
+        version = await self.current_version()
+        key = (board, day)
+        page = self._pages.get((board, day, index))
+        if page is not None:
+            return await self._fill_profiles(page, bot)
+
+        async with self._locks.setdefault(board, asyncio.Lock()):
+            # Pages before this one are built first, to find where it starts
+            cursors = self._cursors.setdefault(key, [(-1,) * len(cursor_keys)])
+            if key not in self._totals:
+                if board == "global":
+                    self._totals[key] = len(rank_index.scores) if rank_index.loaded else None
+                else:
+                    self._totals[key] = await day_players(day)
+            page = None
+            for position in range(index + 1):
+                page = self._pages.get((board, day, position))
+                if page is not None:
+                    continue
+                if position >= len(cursors):
+                    return None
+                page = await self._build(board, day, position * self.per_page, version, query, params,
+                                         cursor_keys, cursors[position], bot)
+                if page is None:
+                    return None
+                if page.next_cursor is not None and len(cursors) == position + 1:
+                    cursors.append(decode_cursor(page.next_cursor, len(cursor_keys)))
+                if self.version == version:
+                    self._pages[(board, day, position)] = page
+            return page
+
+    async def page_after(self, board: str, cursor: str,
+                         bot: Optional[interactions.Client] = None) -> Optional[LeaderboardPage]:
+        """Get the page that follows a cursor.
+
+        Args:
+            board: Which leaderboard: "global", "today" or "yesterday".
+            cursor: A ``next_cursor`` from an earlier page.
+            bot: Client used to look up players without a cached profile (default: None).
+
+        Returns:
+            The page, or None if nothing follows the cursor.
+
+        Raises:
+            KeyError: If the board does not exist.
+            ValueError: If the cursor is malformed.
+        """
+        query, cursor_keys, position_query = BOARDS[board]
+        after = decode_cursor(cursor, len(cursor_keys))
+        day, params = self._day_params(board)
+        await self.current_version()
+        cursors = self._cursors.get((board, day), [])
+        if after in cursors:
+            return await self.page(board, cursors.index(after), bot)
+
+        # The cursor is from an older snapshot; read the page directly, counting the rows before it
+        version = self.version
+        async with DBContextManager(caller="leaderboard_page", read_only=True) as cur:
+            await cur.run(position_query, after if board == "global" else (day,) + after)
+            row = await cur.fetchone()
+        return await self._build(board, day, row[0] if row else 0, version, query, params, cursor_keys, after, bot)
+
+    @staticmethod
+    def _day_params(board: str) -> Tuple[date, Tuple[Any, ...]]:
+        """Work out the day a board is for and the parameters its page query starts with.
+        """
+        today, yesterday = splatdle_days()
+        day = yesterday if board == "yesterday" else today
+        # The global board needs yesterday to tell which streaks are broken
+        return day, ((yesterday,) if board == "global" else (day,))
+
+    async def _build(self, board: str, day: date, offset: int, version: int, query: str, params: Tuple[Any, ...],
+                     cursor_keys: Tuple[str, ...], after: Tuple[Any, ...],
+                     bot: Optional[interactions.Client]) -> Optional[LeaderboardPage]:
+        """Read the page after a keyset cursor and resolve its players' profiles.
+        """
+        async with DBContextManager(use_dict=True, caller="leaderboard_page", read_only=True) as cur:
+            await cur.run(query, params + after + (self.per_page + 1,))
+            records = list(await cur.fetchall())
+        if not records:
+            return None
+        has_next = len(records) > self.per_page
+        records = records[:self.per_page]
+        next_cursor = encode_cursor(tuple(records[-1][key] for key in cursor_keys)) if has_next else None
+
+        rows = await self._rows(board, records, offset + 1, bot)
+        return LeaderboardPage(board, day, offset // self.per_page, version, rows, has_next,
+                               self._totals.get((board, day)), next_cursor)
+
+    @staticmethod
+    async def _fill_profiles(page: LeaderboardPage, bot: Optional[interactions.Client]) -> LeaderboardPage:
+        """Look up the names a cached page was built without, now that there is a client to ask.
+        """
+        missing = [row for row in page.rows if row["username"] is None]
+        if bot is None or not missing:
+            return page
+        profiles = await profile_cache.get_many([int(row["discordId"]) for row in missing], bot)
+        for row in missing:
+            profile = profiles.get(int(row["discordId"]))
+            if profile is not None:
+                row["username"], row["avatarUrl"] = profile.username, profile.avatar_url
+        return page
+
+    async def guild_page(self, guild_id: int, index: int,
+                         bot: Optional[interactions.Client] = None) -> Optional[LeaderboardPage]:
+        """Get a page of the global leaderboard narrowed to one guild's members.
+
+        Args:
+            guild_id: The guild's ID.
+            index: Zero-based page number.
+            bot: Client used to look up players without a cached profile (default: None).
+
+        Returns:
+            The page, or None if it has no rows or the guild's members are not loaded yet.
+        """
+        guild_id = int(guild_id)
+        today, yesterday = splatdle_days()
+        version = await self.current_version()
+        page = self._guild_pages.get((guild_id, today, index))
+        if page is not None:
+            return await self._fill_profiles(page, bot)
+
+        order = self._guild_orders.get(guild_id)
+        if order is None:
+            members = guild_membership.members(guild_id)
+            if members is None or not rank_index.loaded:
+                return None
+            scores = rank_index.scores
+            # Walk whichever side is smaller; big guilds usually have few players
+            if len(members) < len(scores):
+                ranked = [member_id for member_id in members if member_id in scores]
+            else:
+                ranked = [player_id for player_id in scores if player_id in members]
+            order = sorted(ranked, key=lambda player_id: (scores[player_id], player_id))
+            if self.version == version:
+                self._guild_orders[guild_id] = order
+
+        player_ids = order[index * self.per_page:(index + 1) * self.per_page]
+        if not player_ids:
+            return None
+        records = []
+        async with DBContextManager(use_dict=True, caller="leaderboard_guild", read_only=True) as cur:
+            for player_id in player_ids:
+                await cur.run("leaderboard.global_row", (yesterday, player_id))
+                record = await cur.fetchone()
+                if record is not None:
+                    records.append(record)
+        rows = await self._rows("guild", records, index * self.per_page + 1, bot)
+        page = LeaderboardPage("guild", today, index, version, rows, len(order) > (index + 1) * self.per_page,
+                               len(order))
+        if self.version == version:
+            self._guild_pages[(guild_id, today, index)] = page
+        return page
+
+    @staticmethod
+    async def _rows(board: str, records: List[Dict[str, Any]], first_position: int,
+                    bot: Optional[interactions.Client]) -> List[Dict[str, Any]]:
+        """Shape database rows for a page, resolving each player's profile.
+        """
+        profiles = await profile_cache.get_many([record["discord_id"] for record in records], bot)
+        rows = []
+        for position, record in enumerate(records, start=first_position):
+            profile = profiles.get(int(record["discord_id"]))
+            row = {
+                "position": position,
+                "discordId": str(record["discord_id"]),
+                "username": profile.username if profile else None,
+                "avatarUrl": profile.avatar_url if profile else None,
+            }
+            if board in ("global", "guild"):
+                row.update({
+                    "averageGuesses": float(record["average_guess_count"]),
+                    "weightedScore": float(record["weighted_score"]),
+                    "timesPlayed": record["times_played"],
+                    "streak": record["streak"],
+                })
+            else:
+                row["guessCount"] = record["guess_count"]
+            rows.append(row)
+        return rows
+
+
+leaderboard_snapshots = LeaderboardSnapshots(global_config.leaderboard_snapshot_seconds)
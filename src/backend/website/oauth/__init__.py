@@ -1,4 +1,5 @@
 # pylint: skip-file
 # flake8: noqa
-from .oauth_base import OauthBase
+from .oauth_base import OauthBase, TokenRequestError
 from .oauth_discord import DiscordOauthHandler
+from .rate_limits import RateLimited, RateLimitedClient
@@ -1,13 +1,25 @@
 import time
 import logging
-from urllib.parse import urlunparse
-from aiohttp import web, ClientSession
-from typing import Optional
+from urllib.parse import urlparse, urlunparse
+from aiohttp import web, BasicAuth, ClientTimeout
+from typing import Any, Dict, Optional, Tuple
 from authlib.integrations.requests_client import OAuth2Session
 from backend.util.database_context_manager import DBContextManager
 from backend.util.config import global_config
+from backend.util.http_client import HttpClient, http_client
+from .rate_limits import RateLimitedClient, rate_limited_client
+from .session_cookie import session_signer
+from .token_cache import token_cache
 logger = logging.getLogger("webserver")
 
+# Calls to the provider give up after this long rather than hold up the request waiting on them
+OAUTH_REQUEST_TIMEOUT = ClientTimeout(total=10)
+
+
+class TokenRequestError(Exception):
+    """The provider's token endpoint refused a request or answered with something other than a token.
+    """
+
 
 class OauthBase:
     """Base class for OAuth2 authentication handlers.
@@ -23,11 +35,13 @@ class OauthBase:
         _redirect_uri: Redirect URI for OAuth callback.
         _client_id: OAuth client ID.
         _client_secret: OAuth client secret.
-        session: aiohttp ClientSession for API requests.
-        oauth2_client: OAuth2 client for token operations.
+        http: Shared outbound HTTP client that API and token requests go through.
+        rest: Rate-limit-aware client API and token requests are sent with.
+        oauth2_client: OAuth2 client used to build the authorization URL.
     """
     def __init__(
         self, platform: str, base_url: str, token_url: str, auth_url: str, scopes: str, client_dict: dict,
+        http: Optional[HttpClient] = None, rest: Optional[RateLimitedClient] = None,
     ):
         """Initialize the OAuth base handler.
 
@@ -38,6 +52,8 @@ class OauthBase:
             auth_url: Authorization endpoint URL.
             scopes: OAuth scopes to request.
             client_dict: Dictionary containing client credentials and redirect URI.
+            http: Outbound HTTP client to use (default: the process-wide ``http_client``).
+            rest: Rate-limit-aware client to use (default: the shared one when ``http`` is the shared client).
         """
         self._base_url = base_url
         self._token_url = token_url
@@ -46,7 +62,9 @@ class OauthBase:
         self._redirect_uri = client_dict["redirect_uri"]
         self._client_id = client_dict["client_id"]
         self._client_secret = client_dict["client_secret"]
-        self.session = None
+        self.http: HttpClient = http or http_client
+        self.rest: RateLimitedClient = rest or (
+            rate_limited_client if self.http is rate_limited_client.http else RateLimitedClient(self.http))
         logger.debug("Setting up Oauth for %s, Redirect URL: %s",
                      self._platform_name, self._redirect_uri)
         self.oauth2_client = OAuth2Session(
@@ -58,17 +76,6 @@ class OauthBase:
         self._auth_url, _ = self.oauth2_client.create_authorization_url(
             auth_url)
 
-    async def init(self) -> None:
-        """Initialize the HTTP client session.
-        """
-        self.session = ClientSession()
-
-    async def close(self) -> None:
-        """Close the HTTP client session.
-        """
-        if self.session and not self.session.closed:
-            await self.session.close()
-
     async def login_redirect(self, request: web.Request) -> web.HTTPFound:
         """Handle login redirect logic.
 
@@ -92,18 +99,8 @@ class OauthBase:
             new_token = await self._refresh_access_token(refresh_token)
             if new_token:
                 access_token, refresh_token, expires_at = new_token
-                async with DBContextManager as db:
-                    await db.execute(
-                        """
-                        INSERT INTO UserTokens (discord_id, access_token, refresh_token, expires_at)
-                        VALUES (?, ?, ?, ?)
-                        ON CONFLICT(discord_id) DO UPDATE SET
-                            access_token=excluded.access_token,
-                            refresh_token=excluded.refresh_token,
-                            expires_at=excluded.expires_at
-                        """,
-                        (user_id, access_token, refresh_token, int(expires_at))
-                    )
+                async with DBContextManager(caller="login_redirect") as cur:
+                    await cur.run("user_tokens.upsert", (user_id, access_token, refresh_token, int(expires_at)))
                 raise web.HTTPFound("/")
 
         raise web.HTTPFound(self._auth_url)
@@ -163,12 +160,7 @@ class OauthBase:
             Tuple of (access_token, refresh_token, expires_at) or None if failed.
         """
         try:
-            new_token = self.oauth2_client.refresh_token(
-                self._token_url,
-                refresh_token=refresh_token,
-                client_id=self._client_id,
-                client_secret=self._client_secret
-            )
+            new_token = await self._token_request({"grant_type": "refresh_token", "refresh_token": refresh_token})
             return (
                 new_token.get("access_token"),
                 new_token.get("refresh_token"),
@@ -178,6 +170,55 @@ class OauthBase:
             logger.error("Failed to refresh token: %s", e)
             return None
 
+    async def fetch_token(self, code: str) -> Dict[str, Any]:
+        """Exchange an authorization code for tokens.
+
+        Args:
+            code: The authorization code from the callback.
+
+        Returns:
+            The token response, with ``access_token``, ``refresh_token`` and ``expires_in``.
+
+        Raises:
+            TokenRequestError: If the provider refused the code.
+            RateLimited: If the token endpoint's rate limit would not allow the request in time.
+            aiohttp.ClientError: If the provider could not be reached.
+            asyncio.TimeoutError: If the provider took longer than ``OAUTH_REQUEST_TIMEOUT``.
+        """
+        data = {"grant_type": "authorization_code", "code": code}
+        if self._redirect_uri:
+            data["redirect_uri"] = self._redirect_uri
+        return await self._token_request(data)
+
+    async def _token_request(self, data: Dict[str, str]) -> Dict[str, Any]:
+        """POST a grant to the token endpoint within its rate limit, authenticating as the client.
+
+        Args:
+            data: The grant's form fields, e.g. ``grant_type`` and ``code`` or ``refresh_token``.
+
+        Returns:
+            The token response, with ``access_token``, ``refresh_token`` and ``expires_in``.
+
+        Raises:
+            TokenRequestError: If the provider answered without an access token.
+            RateLimited: If the token endpoint's rate limit would not allow the request in time.
+            aiohttp.ClientError: If the provider could not be reached.
+            asyncio.TimeoutError: If the provider took longer than ``OAUTH_REQUEST_TIMEOUT``.
+        """
+        status, token = await self.rest.request(
+            "POST",
+            self._token_url,
+            route=urlparse(self._token_url).path,
+            data=data,
+            auth=BasicAuth(self._client_id or "", self._client_secret or ""),
+            headers={"Accept": "application/json"},
+            timeout=OAUTH_REQUEST_TIMEOUT,
+        )
+        if status != 200 or not isinstance(token, dict) or "access_token" not in token:
+            error = token.get("error") if isinstance(token, dict) else None
+            raise TokenRequestError(f"Token endpoint answered {status}: {error}")
+        return token
+
     async def get_session(self, request: web.Request) -> Optional[tuple]:
         """Retrieve the user's session from the database.
 
@@ -191,15 +232,8 @@ class OauthBase:
         if not user_id:
             return None
 
-        async with DBContextManager() as cur:
-            session = await cur.execute(
-                """
-                SELECT access_token, refresh_token, expires_at
-                FROM UserTokens
-                WHERE discord_id = %s
-                """,
-                (user_id,)
-            )
+        async with DBContextManager(caller="get_session") as cur:
+            await cur.run("user_tokens.by_id", (user_id,))
             session = await cur.fetchone()
         if not session:
             return None
@@ -223,6 +257,61 @@ class OauthBase:
         """
         raise NotImplementedError("No get user info provided")
 
+    async def introspect(self, access_token: str) -> Optional[Dict[str, Any]]:
+        """Get the user behind an access token, from the token cache when possible.
+
+        Args:
+            access_token: The access token.
+
+        Returns:
+            User information dictionary, or None if the provider rejected the token.
+        """
+        if not access_token:
+            return None
+        return await token_cache.user_info(self._platform_name, access_token, self.get_user_info)
+
+    async def authenticate(self, request: web.Request) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Work out who sent a request.
+
+        A valid signed session cookie is trusted without any network I/O.
+        Only when the session is missing or close to expiry is the access
+        token checked with the provider, and a renewed session issued. If
+        the provider cannot be reached, a session that has not expired yet is
+        still accepted.
+
+        Args:
+            request: The HTTP request.
+
+        Returns:
+            The user's ``id``, ``username`` and ``avatar`` (or None if the request is not
+            authenticated), and a renewed session cookie to set on the response, if one was issued.
+        """
+        session = session_signer.verify(request.cookies.get(f"{self._platform_name}_session"))
+        if session is not None and not session_signer.needs_refresh(session):
+            return session, None
+
+        access_token = request.cookies.get(f"{self._platform_name}_access_token")
+        if not access_token:
+            return session, None
+        try:
+            user = await self.introspect(access_token)
+        except Exception as e:
+            logger.warning("Could not confirm a %s session, using the one still valid: %s", self._platform_name, e)
+            return session, None
+        if not user:
+            return None, None
+        return user, session_signer.issue(user)
+
+    def set_session_cookie(self, response: web.StreamResponse, session: str) -> None:
+        """Set a signed session cookie on a response.
+
+        Args:
+            response: The response.
+            session: The cookie value from ``session_signer.issue``.
+        """
+        response.set_cookie(f"{self._platform_name}_session", session, httponly=True, secure=global_config.secured,
+                            samesite="Lax", max_age=int(session_signer.ttl))
+
     async def check_login_status(self, request: web.Request) -> web.Response:
         """Check if user is logged in.
 
@@ -236,15 +325,9 @@ class OauthBase:
         if not user_id:
             return web.json_response({"logged_in": False}, status=401)
 
-        async with DBContextManager() as db:
-            row = await db.fetchone(
-                """
-            SELECT access_token, refresh_token, expires_at
-            FROM UserTokens
-            WHERE discord_id = ?
-            """,
-                (user_id,)
-            )
+        async with DBContextManager(caller="check_login_status") as cur:
+            await cur.run("user_tokens.by_id", (user_id,))
+            row = await cur.fetchone()
 
         if not row or row[2] < time.time():
             return web.json_response({"logged_in": False}, status=401)
@@ -298,18 +381,25 @@ class OauthBase:
     async def logout_platform(self, request: web.Request) -> web.Response:
         """Log out user from the platform.
 
+        The access token is dropped from the token cache, so it is checked
+        with the provider again if it is ever presented after logout.
+
         Args:
             request: The HTTP request.
 
         Returns:
             JSON response confirming logout and cleared cookies.
         """
+        access_token = request.cookies.get(f"{self._platform_name}_access_token")
+        if access_token:
+            token_cache.invalidate(self._platform_name, access_token)
         response = web.json_response({"message": "Logged out successfully"})
 
         # Remove cookies by setting them with an empty value and max_age=0
         response.del_cookie(f"{self._platform_name}_access_token")
         response.del_cookie(f"{self._platform_name}_refresh_token")
         response.del_cookie(f"{self._platform_name}_user_id")
+        response.del_cookie(f"{self._platform_name}_session")
         return response
     # async def logout_all_platforms(self, request):
     #     response = web.json_response({"message": "Logged out successfully"})
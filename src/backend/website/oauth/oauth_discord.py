@@ -1,11 +1,18 @@
 import time
 import logging
-from urllib.parse import urlparse
 from aiohttp import web
 from typing import Any, Optional, Dict
 from backend.util.database_context_manager import DBContextManager
 from . import OauthBase
+from .oauth_base import OAUTH_REQUEST_TIMEOUT
+from .session_cookie import session_signer
+from .token_cache import token_cache
 from backend.util.config import global_config
+from backend.util.http_client import HttpClient
+from backend.website.splatdle import splatdle_days
+from backend.website.rank_index import rank_index
+from backend.website.profiles import profile_cache
+from backend.website.player_stats import player_stats
 
 logger = logging.getLogger("webserver")
 
@@ -18,10 +25,13 @@ class DiscordOauthHandler(OauthBase):
 
     Inherits from OauthBase and implements Discord-specific OAuth logic.
     """
-    def __init__(self) -> None:
+    def __init__(self, http: Optional[HttpClient] = None) -> None:
         """Initialize the Discord OAuth handler.
 
         Sets up Discord API endpoints and client configuration.
+
+        Args:
+            http: Outbound HTTP client to use (default: the process-wide ``http_client``).
         """
         base_url = "https://discord.com/api/v10"
         super().__init__(
@@ -34,14 +44,17 @@ class DiscordOauthHandler(OauthBase):
                 "client_id": global_config.client_id,
                 "client_secret": global_config.client_secret,
                 "redirect_uri": global_config.redirect_uri
-            }
+            },
+            http=http,
         )
 
     async def handle_callback(self, request: web.Request) -> web.Response:
         """Handle the OAuth2 callback from Discord.
 
         Processes the authorization code, exchanges it for tokens,
-        stores user information, and sets authentication cookies.
+        stores user information and the user's profile in the profile
+        cache, and sets authentication cookies, including the signed
+        session cookie later requests are authenticated with.
 
         Args:
             request: The callback request containing the authorization code.
@@ -49,23 +62,12 @@ class DiscordOauthHandler(OauthBase):
         Returns:
             Redirect response to the authorized page or error response.
         """
-
-        auth_response_url = self.get_request_url(request)
-        print(auth_response_url)
-        parsed_url = urlparse(auth_response_url)
-        if not parsed_url.scheme:
-            auth_response_url = f"http://{auth_response_url}"
-
         code = request.query.get("code")
         if not code:
             return web.HTTPFound("/")
 
         try:
-            token = self.oauth2_client.fetch_token(
-                self._token_url,
-                authorization_response=auth_response_url,
-                client_secret=self._client_secret,
-            )
+            token = await self.fetch_token(code)
         except Exception as e:
             return web.Response(text=f"Error fetching token: {str(e)}", status=500)
 
@@ -76,28 +78,15 @@ class DiscordOauthHandler(OauthBase):
         if access_token:
             user = await self.get_user_info(access_token)
             if user:
+                token_cache.remember(self._platform_name, access_token, user)
                 user_id = user.get("id")
                 if user_id:
-                    async with DBContextManager() as cur:
-                        # Log the values being inserted
-                        # logger.debug(
-                        #     "Inserting/Updating UserTokens: discord_id=%s, access_token=%s, refresh_token=%s, expires_at=%s",
-                        #     user_id, access_token, refresh_token, int(
-                        #         expires_at)
-                        # )
-                        # Insert or update the user's tokens in UserTokens table
-                        await cur.execute(
-                            """
-                            INSERT INTO UserTokens (discord_id, access_token, refresh_token, expires_at)
-                            VALUES (%s, %s, %s, %s)
-                            ON DUPLICATE KEY UPDATE
-                                access_token = VALUES(access_token),
-                                refresh_token = VALUES(refresh_token),
-                                expires_at = VALUES(expires_at)
-                            """,
-                            (int(user_id), access_token,
-                             refresh_token, int(expires_at))
+                    async with DBContextManager(caller="handle_callback") as cur:
+                        await cur.run(
+                            "user_tokens.upsert",
+                            (int(user_id), access_token, refresh_token, int(expires_at))
                         )
+                    await profile_cache.remember(int(user_id), user.get("username"), user.get("avatar"))
                     response = web.HTTPFound("/authorised")
                     response.set_cookie("discord_user_id", str(
                         user_id), httponly=True, secure=global_config.secured, samesite="Lax")
@@ -105,6 +94,7 @@ class DiscordOauthHandler(OauthBase):
                                         secure=global_config.secured, samesite="Lax", max_age=3600)
                     response.set_cookie("discord_refresh_token", refresh_token, httponly=True,
                                         secure=global_config.secured, samesite="Lax", max_age=86400 * 7)
+                    self.set_session_cookie(response, session_signer.issue(user))
                     logger.debug(
                         "%s has authorised via Discord Oauth2", user_id)
 
@@ -118,6 +108,9 @@ class DiscordOauthHandler(OauthBase):
     async def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Fetch Discord user information using access token.
 
+        Sent through the rate-limit-aware client, so a busy token waits for
+        its bucket rather than being rejected.
+
         Args:
             access_token: Valid Discord access token.
 
@@ -126,20 +119,23 @@ class DiscordOauthHandler(OauthBase):
         """
         if not access_token:
             return
-        async with self.session.get(
+        status, user_data = await self.rest.request(
+            "GET",
             f"{self._base_url}/users/@me",
+            route="/users/@me",
             headers={"Authorization": f"Bearer {access_token}"},
-        ) as response:
-            if response.status != 200:
-                return None
-            user_data = await response.json()
-            return user_data
+            timeout=OAUTH_REQUEST_TIMEOUT,
+        )
+        if status != 200:
+            return None
+        return user_data
 
     async def check_auth_status(self, request: web.Request) -> web.Response:
         """Check if the user is authenticated and return their status.
 
-        Validates the access token and returns user information along
-        with their Splatdle statistics if available.
+        Authenticates the request from its signed session cookie, falling
+        back to the access token, and returns user information along with
+        their Splatdle statistics and global rank if available.
 
         Args:
             request: The request containing authentication cookies.
@@ -147,32 +143,30 @@ class DiscordOauthHandler(OauthBase):
         Returns:
             JSON response with authentication status and user data.
         """
-        access_token = request.cookies.get("discord_access_token")
         logger.debug("Checking discord auth status...")
-        if not access_token:
-            logger.debug("Rejected because there is no discord access token")
+        user_data, renewed_session = await self.authenticate(request)
+        if not user_data:
+            logger.debug("Rejected because there is no valid discord session or access token")
             return web.json_response({"logged_in": False}, status=401)
 
-        user_data = await self.get_user_info(access_token)
-        async with DBContextManager() as cur:
-            await cur.execute(
-                "SELECT discord_id, streak, times_played, average_guess_count FROM UserStats WHERE discord_id = %s",
-                (user_data["id"],)
-            )
-            row = await cur.fetchone()
-            player = None
-            if row:
-                player = {
-                    "id": str(row[0]),
-                    "streak": row[1],
-                    "times_played": row[2],
-                    "average_guess_count": row[3]
-                }
+        # Keeps the cached name and avatar current; only writes when they changed
+        await profile_cache.remember(int(user_data["id"]), user_data.get("username"), user_data.get("avatar"))
+        _, yesterday = splatdle_days()
+        stats = await player_stats.get(user_data["id"])
+        player = None
+        if stats is not None:
+            player = {
+                "id": str(stats.discord_id),
+                "streak": stats.streak(yesterday),
+                "times_played": stats.times_played,
+                "average_guess_count": stats.average_guess_count
+            }
         if player is not None:
             player_data = {
                 "id": str(user_data.get("id")),
                 "avatar": user_data.get("avatar"),
-                "username": user_data.get("username")
+                "username": user_data.get("username"),
+                "rank": rank_index.rank(user_data["id"])
             }
         else:
             player_data = {
@@ -180,8 +174,7 @@ class DiscordOauthHandler(OauthBase):
                 "avatar": user_data.get("avatar"),
                 "username": None
             }
-        if user_data:
-            return web.json_response({"logged_in": True, "player": player_data})
-
-        logger.debug("Rejected because there is no discord user data")
-        return web.json_response({"logged_in": False}, status=401)
+        response = web.json_response({"logged_in": True, "player": player_data})
+        if renewed_session:
+            self.set_session_cookie(response, renewed_session)
+        return response
@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from aiohttp import ClientResponse
+from backend.util.http_client import HttpClient, http_client
+
+logger = logging.getLogger("webserver")
+
+# Longest a request waits for its bucket or the global limit to reset before it is given up on
+MAX_WAIT_SECONDS = 10.0
+# Times a request that was answered with 429 is sent again
+MAX_RETRIES = 3
+# Buckets are pruned once there are more than this many, dropping those whose limit has reset
+MAX_BUCKETS = 4096
+
+
+class RateLimited(Exception):
+    """A request was given up on because the provider's rate limit would not reset in time.
+
+    Attributes:
+        retry_after: Seconds until the limit resets.
+    """
+
+    def __init__(self, route: str, retry_after: float) -> None:
+        """Initialize the error.
+
+        Args:
+            route: The route that was rate limited.
+            retry_after: Seconds until the limit resets.
+        """
+        super().__init__(f"Rate limited on {route} for another {retry_after:.2f}s")
+        self.retry_after: float = retry_after
+
+
+class RateLimitBucket:
+    """What is known about one rate limit bucket from the provider's headers.
+
+    Attributes:
+        limit: Requests allowed per reset, or None if unknown.
+        remaining: Requests left before the bucket resets, or None if unknown.
+        reset_at: ``time.monotonic()`` value at which the bucket resets.
+        window: Seconds the last reset was announced to take, used to guess the next one.
+        unlimited: Whether the provider answered without any limits for the bucket, so its requests
+            are not held back.
+        lock: Held while a request waits for and reserves a slot, so waiters queue in order.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a bucket nothing is known about yet.
+        """
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: float = 0.0
+        self.window: float = 0.0
+        self.unlimited: bool = False
+        self.lock: asyncio.Lock = asyncio.Lock()
+
+    def update(self, response: ClientResponse) -> bool:
+        """Read the bucket's state from a response's ``X-RateLimit-*`` headers.
+
+        Args:
+            response: The response.
+
+        Returns:
+            Whether the response carried the bucket's limits.
+        """
+        limit = response.headers.get("X-RateLimit-Limit")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if limit is None or remaining is None or reset_after is None:
+            return False
+        try:
+            limit, remaining, reset_after = int(limit), int(remaining), float(reset_after)
+        except ValueError:
+            return False
+        self.unlimited = False
+        now = time.monotonic()
+        if self.remaining is not None and self.reset_at > now:
+            # Slots reserved for requests still in flight are not counted by the provider yet
+            remaining = min(remaining, self.remaining)
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = now + reset_after
+        self.window = max(self.window, reset_after)
+        return True
+
+
+class RateLimitedClient:
+    """Sends requests to Discord within its rate limits.
+
+    Buckets are learned from the ``X-RateLimit-*`` headers of each response
+    and kept per route and per credential, since user tokens each have
+    their own limits. Until a bucket's limits are known, its requests are
+    sent one at a time to learn them; a route that answers without any is
+    treated as unlimited. When a bucket is exhausted, further requests for
+    it queue locally until it resets instead of being sent to fail. A 429 is
+    honoured by waiting ``Retry-After`` and sending the request again, and a
+    global 429 holds back every request. Waits are capped at
+    ``MAX_WAIT_SECONDS``; a request that would wait longer, or is still
+    rate limited after ``MAX_RETRIES`` retries, raises ``RateLimited``, so a
+    rate limit is never mistaken for a rejection.
+
+    Attributes:
+        http: Outbound HTTP client the requests are sent with.
+        waiting: Requests currently queued for a bucket or the global limit.
+        requests: Requests sent.
+        rate_limited: 429 responses received.
+        queued: Requests that had to wait before being sent.
+    """
+
+    def __init__(self, http: HttpClient) -> None:
+        """Initialize with no known buckets.
+
+        Args:
+            http: Outbound HTTP client to send requests with.
+        """
+        self.http: HttpClient = http
+        self.waiting: int = 0
+        self.requests: int = 0
+        self.rate_limited: int = 0
+        self.queued: int = 0
+        self._routes: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[str, str], RateLimitBucket] = {}
+        self._global_reset_at: float = 0.0
+
+    @staticmethod
+    def _identity(kwargs: Dict[str, Any]) -> str:
+        """Identify the credential a request is sent with, without keeping the credential itself.
+        """
+        authorization = (kwargs.get("headers") or {}).get("Authorization")
+        if authorization is None and kwargs.get("auth") is not None:
+            authorization = kwargs["auth"].login
+        return hashlib.sha256((authorization or "").encode()).hexdigest()[:16]
+
+    def _bucket(self, route: str, identity: str) -> RateLimitBucket:
+        """Find or create the bucket a route falls in for one credential.
+        """
+        key = (self._routes.get(route, route), identity)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune()
+            bucket = self._buckets[key] = RateLimitBucket()
+        return bucket
+
+    def _prune(self) -> None:
+        """Drop buckets whose limit has reset and that nobody is waiting on.
+        """
+        now = time.monotonic()
+        for key, bucket in list(self._buckets.items()):
+            if bucket.reset_at <= now and not bucket.lock.locked():
+                del self._buckets[key]
+
+    async def _acquire(self, bucket: RateLimitBucket, route: str) -> bool:
+        """Wait until the global limit and the bucket allow a request, then reserve a slot.
+
+        Returns:
+            Whether the bucket's lock is still held, because its limits are unknown and the
+            request has to learn them before anyone else is let through.
+
+        Raises:
+            RateLimited: If waiting would take longer than ``MAX_WAIT_SECONDS``.
+        """
+        self.waiting += 1
+        try:
+            await bucket.lock.acquire()
+            try:
+                queued = False
+                while True:
+                    now = time.monotonic()
+                    if bucket.reset_at <= now and bucket.remaining is not None:
+                        # Start the next window locally; the first response of it corrects the guess
+                        bucket.remaining = bucket.limit
+                        bucket.reset_at = now + bucket.window
+                    delay = max(self._global_reset_at - now, 0.0)
+                    if bucket.remaining == 0:
+                        delay = max(delay, bucket.reset_at - now)
+                    if delay <= 0:
+                        break
+                    if delay > MAX_WAIT_SECONDS:
+                        raise RateLimited(route, delay)
+                    if not queued:
+                        queued = True
+                        self.queued += 1
+                    # Sleeps can end a little early, so the loop checks again
+                    await asyncio.sleep(delay)
+                if bucket.remaining is not None:
+                    bucket.remaining -= 1
+                elif not bucket.unlimited:
+                    return True
+            except BaseException:
+                bucket.lock.release()
+                raise
+            bucket.lock.release()
+            return False
+        finally:
+            self.waiting -= 1
+
+    async def request(self, method: str, url: str, route: str, **kwargs: Any) -> Tuple[int, Any]:
+        """Send a request within the rate limits.
+
+        Args:
+            method: HTTP method.
+            url: Full URL.
+            route: The route's path without IDs, e.g. ``/users/@me``, which buckets are tracked by.
+            **kwargs: Passed on to ``ClientSession.request``.
+
+        Returns:
+            The response status and its decoded JSON body (None if it had none).
+
+        Raises:
+            RateLimited: If the rate limit would not allow the request in time.
+            aiohttp.ClientError: If the provider could not be reached.
+            asyncio.TimeoutError: If the request timed out.
+        """
+        identity = self._identity(kwargs)
+        route_key = f"{method} {route}"
+        for _ in range(MAX_RETRIES + 1):
+            bucket = self._bucket(route_key, identity)
+            probe = bucket if await self._acquire(bucket, route_key) else None
+            self.requests += 1
+            try:
+                status, data = await self._send(method, url, route_key, identity, bucket, kwargs)
+            finally:
+                if probe is not None:
+                    probe.lock.release()
+            if status != 429:
+                return status, data
+        raise RateLimited(route_key, max(self._global_reset_at, bucket.reset_at) - time.monotonic())
+
+    async def _send(self, method: str, url: str, route_key: str, identity: str, bucket: RateLimitBucket,
+                    kwargs: Dict[str, Any]) -> Tuple[int, Any]:
+        """Send one request and record what its headers say about the rate limits.
+        """
+        async with self.http.session.request(method, url, **kwargs) as response:
+            buckets = [bucket]
+            bucket_hash = response.headers.get("X-RateLimit-Bucket")
+            if bucket_hash and self._routes.get(route_key) != bucket_hash:
+                # Routes that share a bucket hash share its limits; the route's bucket becomes the
+                # shared one unless another route got there first
+                self._routes[route_key] = bucket_hash
+                shared = self._buckets.setdefault((bucket_hash, identity), bucket)
+                if shared is not bucket:
+                    buckets.append(shared)
+            for known in buckets:
+                if not known.update(response) and known.remaining is None and response.status != 429:
+                    # Routes that send no limits are not probed one request at a time forever
+                    known.unlimited = True
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                data = None
+            if response.status != 429:
+                return response.status, data
+
+            self.rate_limited += 1
+            retry_after = self._retry_after(response, data)
+            if response.headers.get("X-RateLimit-Global") or (isinstance(data, dict) and data.get("global")):
+                self._global_reset_at = time.monotonic() + retry_after
+            else:
+                for known in buckets:
+                    known.remaining = 0
+                    known.reset_at = time.monotonic() + retry_after
+            logger.warning("Rate limited on %s, retrying in %.2fs", route_key, retry_after)
+            return response.status, data
+
+    @staticmethod
+    def _retry_after(response: ClientResponse, data: Any) -> float:
+        """Read how long to wait after a 429, from the body or the ``Retry-After`` header.
+        """
+        if isinstance(data, dict) and isinstance(data.get("retry_after"), (int, float)):
+            return float(data["retry_after"])
+        try:
+            return float(response.headers.get("Retry-After", "1"))
+        except ValueError:
+            return 1.0
+
+    def stats(self) -> Dict[str, int]:
+        """Get the client's counters.
+
+        Returns:
+            ``waiting`` (queue depth right now), ``requests``, ``rate_limited``, ``queued`` and ``buckets``.
+        """
+        return {
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "queued": self.queued,
+            "buckets": len(self._buckets),
+        }
+
+
+rate_limited_client = RateLimitedClient(http_client)
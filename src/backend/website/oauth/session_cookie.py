@@ -0,0 +1,111 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from typing import Any, Dict, Optional
+from backend.util.config import global_config
+
+logger = logging.getLogger("webserver")
+
+
+def _b64encode(data: bytes) -> str:
+    """Encode bytes as unpadded URL-safe base64.
+    """
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    """Decode unpadded URL-safe base64.
+    """
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SessionSigner:
+    """Issues and checks our own signed session cookies.
+
+    A session cookie holds the user's Discord ID, username, avatar and
+    expiry, signed with HMAC-SHA256, so a request can be authenticated by
+    checking the signature instead of asking Discord who an access token
+    belongs to. The cookie is only readable, not secret, so it carries
+    nothing that is not already public.
+
+    Attributes:
+        ttl: Seconds a session is valid for.
+        refresh_before: Seconds before expiry when a session should be confirmed and renewed.
+    """
+
+    def __init__(self, secret: Optional[str], ttl: float, refresh_before: float) -> None:
+        """Initialize the signer.
+
+        Args:
+            secret: Signing key; without one a random key is used, which only this process accepts.
+            ttl: Seconds a session is valid for.
+            refresh_before: Seconds before expiry when a session should be confirmed and renewed.
+        """
+        self._key: Optional[bytes] = secret.encode() if secret else None
+        self.ttl: float = ttl
+        self.refresh_before: float = refresh_before
+
+    def _sign(self, payload: str) -> str:
+        """Sign an encoded payload.
+        """
+        if self._key is None:
+            logger.warning("SESSION_SECRET is not set; sessions will not survive a restart or work across workers")
+            self._key = secrets.token_bytes(32)
+        return _b64encode(hmac.new(self._key, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user: Dict[str, Any]) -> str:
+        """Create a session cookie for a user.
+
+        Args:
+            user: The user's information from Discord, with ``id``, ``username`` and ``avatar``.
+
+        Returns:
+            The cookie value.
+        """
+        payload = _b64encode(json.dumps({
+            "id": str(user["id"]),
+            "username": user.get("username"),
+            "avatar": user.get("avatar"),
+            "exp": int(time.time() + self.ttl),
+        }, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, cookie: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Check a session cookie's signature and expiry.
+
+        Args:
+            cookie: The cookie value.
+
+        Returns:
+            The session's ``id``, ``username``, ``avatar`` and ``exp``, or None if it is missing,
+            tampered with or expired.
+        """
+        if not cookie or cookie.count(".") != 1:
+            return None
+        payload, signature = cookie.split(".")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        try:
+            session = json.loads(_b64decode(payload))
+        except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        if not isinstance(session, dict) or not isinstance(session.get("exp"), int) or session["exp"] <= time.time():
+            return None
+        return session
+
+    def needs_refresh(self, session: Dict[str, Any]) -> bool:
+        """Whether a verified session is close enough to expiry to be confirmed with Discord and renewed.
+
+        Args:
+            session: A session returned by ``verify``.
+        """
+        return session["exp"] - time.time() <= self.refresh_before
+
+
+session_signer = SessionSigner(global_config.session_secret, global_config.session_seconds,
+                               global_config.session_refresh_seconds)
@@ -0,0 +1,90 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+from backend.util.config import global_config
+from backend.util.single_flight import SingleFlight
+from backend.util.ttl_cache import TTLCache
+
+# Seconds a token the provider rejected is remembered, so retries of a bad token do not reach the provider
+INVALID_TOKEN_SECONDS = 5.0
+
+
+class TokenCache:
+    """Users behind OAuth access tokens, as last confirmed by the provider.
+
+    Every authenticated request would otherwise ask the provider who the
+    token belongs to. Answers are kept for ``TOKEN_CACHE_SECONDS``, far
+    shorter than a token lives, and concurrent lookups of the same token
+    share one request. Tokens are only held as SHA-256 hashes.
+
+    Attributes:
+        memory: The user behind each token hash, or False for a rejected token.
+        lookups: Provider lookups in flight, by token hash.
+    """
+
+    def __init__(self, capacity: int, ttl: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            capacity: Most tokens held in memory.
+            ttl: Seconds a token's user is trusted before asking the provider again.
+        """
+        self.memory: TTLCache[str, Any] = TTLCache(capacity, ttl)
+        self.lookups: SingleFlight[str, Optional[Dict[str, Any]]] = SingleFlight()
+
+    @staticmethod
+    def _key(platform: str, access_token: str) -> str:
+        """Hash a platform's access token into a cache key.
+        """
+        return hashlib.sha256(f"{platform}:{access_token}".encode()).hexdigest()
+
+    async def user_info(self, platform: str, access_token: str,
+                        fetch: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Get the user behind an access token.
+
+        Args:
+            platform: Name of the OAuth platform.
+            access_token: The access token.
+            fetch: Asks the provider for the token's user, returning None if it is rejected.
+
+        Returns:
+            A copy of the user's information, or None if the provider rejected the token.
+        """
+        key = self._key(platform, access_token)
+        user = self.memory.get(key)
+        if user is None:
+            user = await self.lookups.do(key, lambda: fetch(access_token))
+            if user:
+                self.memory.set(key, user)
+            else:
+                self.memory.set(key, False, ttl=INVALID_TOKEN_SECONDS)
+        return dict(user) if user else None
+
+    def remember(self, platform: str, access_token: str, user: Dict[str, Any]) -> None:
+        """Store a token's user that was just read from the provider.
+
+        Args:
+            platform: Name of the OAuth platform.
+            access_token: The access token.
+            user: The user's information.
+        """
+        self.memory.set(self._key(platform, access_token), dict(user))
+
+    def invalidate(self, platform: str, access_token: str) -> None:
+        """Forget a token, for example when the user logs out.
+
+        Args:
+            platform: Name of the OAuth platform.
+            access_token: The access token.
+        """
+        self.memory.pop(self._key(platform, access_token))
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache's counters.
+
+        Returns:
+            ``size``, ``hits``, ``misses`` and ``coalesced`` (lookups that waited on one already in flight).
+        """
+        return {**self.memory.stats(), "coalesced": self.lookups.coalesced}
+
+
+token_cache = TokenCache(global_config.token_cache_size, global_config.token_cache_seconds)
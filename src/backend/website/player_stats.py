@@ -0,0 +1,173 @@
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Sequence
+from ..util.config import global_config
+from ..util.database_context_manager import DBContextManager
+from ..util.ttl_cache import TTLCache
+
+# Stored for players with no stats, so repeated lookups of non-players are hits too
+_NO_STATS = object()
+
+
+class PlayerStats:
+    """A player's Splatdle stats as stored in ``UserStats``.
+
+    The stored streak and the last day played are kept as they are, and
+    whether the streak still counts or the player has played today is
+    worked out from the day asked about, so a cached copy stays correct
+    across the daily rollover.
+
+    Attributes:
+        discord_id: The player's Discord user ID.
+        stored_streak: Streak as of the last day played.
+        times_played: Games played.
+        total_guesses: Guesses taken across all games.
+        last_played: The last Splatdle day played.
+        last_guess_count: Guesses taken on the last day played, if known.
+        last_played_at: When the last game was submitted, in UTC, if known.
+    """
+
+    def __init__(self, discord_id: int, stored_streak: int, times_played: int, total_guesses: int,
+                 last_played: Optional[date], last_guess_count: Optional[int] = None,
+                 last_played_at: Optional[datetime] = None) -> None:
+        """Initialize a player's stats.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            stored_streak: Streak as of the last day played.
+            times_played: Games played.
+            total_guesses: Guesses taken across all games.
+            last_played: The last Splatdle day played.
+            last_guess_count: Guesses taken on the last day played (default: None).
+            last_played_at: When the last game was submitted, in UTC (default: None).
+        """
+        self.discord_id: int = int(discord_id)
+        self.stored_streak: int = stored_streak
+        self.times_played: int = times_played
+        self.total_guesses: int = total_guesses
+        self.last_played: Optional[date] = last_played
+        self.last_guess_count: Optional[int] = last_guess_count
+        self.last_played_at: Optional[datetime] = last_played_at
+
+    @classmethod
+    def from_row(cls, discord_id: int, row: Sequence[Any]) -> "PlayerStats":
+        """Build stats from a ``user_stats.submission`` row.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            row: The row.
+
+        Returns:
+            The stats.
+        """
+        streak, times_played, total_guesses, last_played, guess_count, played_at = row
+        return cls(discord_id, streak, times_played, total_guesses, last_played, guess_count, played_at)
+
+    @property
+    def average_guess_count(self) -> float:
+        """Average guesses per game.
+        """
+        return self.total_guesses / self.times_played if self.times_played else 0.0
+
+    def streak(self, yesterday: date) -> int:
+        """The streak as it stands, which is broken once a day is missed.
+
+        Args:
+            yesterday: Yesterday's Splatdle day.
+        """
+        return self.stored_streak if self.last_played is not None and self.last_played >= yesterday else 0
+
+    def played_on(self, day: date) -> bool:
+        """Whether the player has played on a day.
+
+        Args:
+            day: The Splatdle day.
+        """
+        return self.last_played == day
+
+    def todays_guess_count(self, today: date) -> Optional[int]:
+        """Guesses taken in today's game, or None if the player has not played today.
+
+        Args:
+            today: Today's Splatdle day.
+        """
+        return self.last_guess_count if self.played_on(today) else None
+
+
+class PlayerStatsCache:
+    """Read-through cache of each player's Splatdle stats.
+
+    Shared by the bot commands, the OAuth status check and the API, which
+    would otherwise each read the same ``UserStats`` row. Results this worker
+    records are put straight into the cache; results written by other workers
+    show up once the cached copy is older than ``PLAYER_STATS_TTL_SECONDS``.
+
+    Attributes:
+        memory: Stats held in this process, by Discord ID.
+    """
+
+    def __init__(self, capacity: int, ttl: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            capacity: Most players held in memory.
+            ttl: Seconds before a player's stats are read from the database again.
+        """
+        self.memory: TTLCache[int, Any] = TTLCache(capacity, ttl)
+
+    def cached(self, discord_id: int) -> Optional[PlayerStats]:
+        """Get a player's stats if they are cached, without reading the database.
+
+        Args:
+            discord_id: The player's Discord user ID.
+
+        Returns:
+            The stats, or None if they are not cached or the player has none.
+        """
+        stats = self.memory.get(int(discord_id))
+        return stats if isinstance(stats, PlayerStats) else None
+
+    async def get(self, discord_id: int) -> Optional[PlayerStats]:
+        """Get a player's stats, reading them from the database on a miss.
+
+        Args:
+            discord_id: The player's Discord user ID.
+
+        Returns:
+            The stats, or None if the player has never played.
+        """
+        discord_id = int(discord_id)
+        stats = self.memory.get(discord_id)
+        if stats is None:
+            async with DBContextManager(caller="player_stats", read_only=True) as cur:
+                await cur.run("user_stats.submission", (discord_id,))
+                row = await cur.fetchone()
+            stats = PlayerStats.from_row(discord_id, row) if row else _NO_STATS
+            self.memory.set(discord_id, stats)
+        return stats if isinstance(stats, PlayerStats) else None
+
+    def put(self, stats: PlayerStats) -> None:
+        """Store stats that were just written or read.
+
+        Args:
+            stats: The player's stats.
+        """
+        self.memory.set(stats.discord_id, stats)
+
+    def forget(self, discord_id: int) -> None:
+        """Drop a player's cached stats so the next lookup reads the database.
+
+        Args:
+            discord_id: The player's Discord user ID.
+        """
+        self.memory.pop(int(discord_id))
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache's counters.
+
+        Returns:
+            ``size``, ``hits`` and ``misses``.
+        """
+        return self.memory.stats()
+
+
+player_stats = PlayerStatsCache(global_config.player_stats_cache_size, global_config.player_stats_ttl_seconds)
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+import interactions
+from ..util.config import global_config
+from ..util.database_context_manager import DBContextManager
+from ..util.ttl_cache import TTLCache
+
+logger = logging.getLogger("DiscordProfiles")
+
+# Stored for users with no stored profile, so gateway events about them skip the database
+_NO_PROFILE = object()
+
+
+def _utc_now() -> datetime:
+    """Current UTC time as stored in ``DiscordProfiles.updated_at``.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+class DiscordProfile:
+    """A Discord user's name and avatar as last seen.
+
+    Attributes:
+        discord_id: The user's Discord ID.
+        username: The user's username.
+        avatar: The user's avatar hash, or None for a default avatar.
+        updated_at: When this was read from Discord, in UTC.
+    """
+
+    def __init__(self, discord_id: int, username: str, avatar: Optional[str], updated_at: datetime) -> None:
+        """Initialize a profile.
+
+        Args:
+            discord_id: The user's Discord ID.
+            username: The user's username.
+            avatar: The user's avatar hash, or None for a default avatar.
+            updated_at: When this was read from Discord, in UTC.
+        """
+        self.discord_id: int = int(discord_id)
+        self.username: str = username
+        self.avatar: Optional[str] = avatar
+        self.updated_at: datetime = updated_at
+
+    @property
+    def avatar_url(self) -> str:
+        """URL of the user's avatar on Discord's CDN.
+        """
+        if self.avatar:
+            return f"https://cdn.discordapp.com/avatars/{self.discord_id}/{self.avatar}.png"
+        return f"https://cdn.discordapp.com/embed/avatars/{(self.discord_id >> 22) % 6}.png"
+
+    def age(self) -> float:
+        """Seconds since this was read from Discord.
+        """
+        return (_utc_now() - self.updated_at).total_seconds()
+
+
+class ProfileCache:
+    """Discord usernames and avatars, cached in memory and in ``DiscordProfiles``.
+
+    Lookups go to the in-memory LRU first, then the database, and only ask
+    Discord for users that are missing or older than ``PROFILE_TTL_SECONDS``.
+    Profiles are written when a user logs in, and gateway member updates
+    refresh users that are already cached, so a leaderboard page normally
+    renders without any Discord REST calls. If Discord cannot be reached, a
+    stale profile is served rather than none.
+
+    Attributes:
+        ttl: Seconds before a profile is looked up on Discord again.
+        memory: Profiles held in this process, and users known to have none, by Discord ID.
+    """
+
+    def __init__(self, capacity: int, ttl: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            capacity: Most profiles held in memory.
+            ttl: Seconds before a profile is looked up on Discord again.
+        """
+        self.ttl: float = ttl
+        self.memory: TTLCache[int, Any] = TTLCache(capacity, ttl)
+
+    def _keep(self, profile: DiscordProfile) -> None:
+        """Hold a profile in memory until it goes stale.
+        """
+        self.memory.set(profile.discord_id, profile, ttl=self.ttl - profile.age())
+
+    def _unchanged(self, profile: DiscordProfile, username: str, avatar: Optional[str]) -> bool:
+        """Whether a stored profile still matches Discord and is fresh enough to leave unwritten.
+        """
+        return profile.username == username and profile.avatar == avatar and profile.age() < self.ttl / 2
+
+    async def get(self, discord_id: int, bot: Optional[interactions.Client] = None) -> Optional[DiscordProfile]:
+        """Get one user's profile.
+
+        Args:
+            discord_id: The user's Discord ID.
+            bot: Client used to look up missing or stale profiles (default: None, cache only).
+
+        Returns:
+            The profile, or None if it is not cached and could not be looked up.
+        """
+        return (await self.get_many([discord_id], bot)).get(int(discord_id))
+
+    async def get_many(self, discord_ids: Iterable[int],
+                       bot: Optional[interactions.Client] = None) -> Dict[int, DiscordProfile]:
+        """Get several users' profiles.
+
+        Args:
+            discord_ids: The users' Discord IDs.
+            bot: Client used to look up missing or stale profiles (default: None, cache only).
+
+        Returns:
+            The profiles found, by Discord ID.
+        """
+        profiles: Dict[int, DiscordProfile] = {}
+        missing = []
+        for discord_id in dict.fromkeys(int(discord_id) for discord_id in discord_ids):
+            profile = self.memory.get(discord_id)
+            if isinstance(profile, DiscordProfile):
+                profiles[discord_id] = profile
+            else:
+                missing.append(discord_id)
+        if not missing:
+            return profiles
+
+        stale: Dict[int, Optional[DiscordProfile]] = {}
+        async with DBContextManager(caller="discord_profiles", read_only=True) as cur:
+            for discord_id in missing:
+                await cur.run("discord_profiles.by_id", (discord_id,))
+                row = await cur.fetchone()
+                profile = DiscordProfile(*row) if row else None
+                if profile is not None and profile.age() < self.ttl:
+                    self._keep(profile)
+                    profiles[discord_id] = profile
+                else:
+                    stale[discord_id] = profile
+
+        if bot is not None and stale:
+            users = await asyncio.gather(*(bot.fetch_user(discord_id) for discord_id in stale),
+                                         return_exceptions=True)
+            for discord_id, user in zip(stale, users):
+                if isinstance(user, Exception) or user is None:
+                    logger.warning("Could not look up Discord user %s: %s", discord_id, user)
+                    continue
+                stale[discord_id] = await self.remember(discord_id, user.username,
+                                                        getattr(user.avatar, "hash", None))
+
+        for discord_id, profile in stale.items():
+            if profile is not None:
+                profiles[discord_id] = profile
+        return profiles
+
+    async def remember(self, discord_id: int, username: str, avatar: Optional[str]) -> DiscordProfile:
+        """Store a profile just read from Discord.
+
+        The database is only written when the name or avatar changed or the
+        stored profile is getting stale, so calling this on every request is cheap.
+
+        Args:
+            discord_id: The user's Discord ID.
+            username: The user's username.
+            avatar: The user's avatar hash, or None for a default avatar.
+
+        Returns:
+            The stored profile.
+        """
+        cached = self.memory.get(int(discord_id))
+        if isinstance(cached, DiscordProfile) and self._unchanged(cached, username, avatar):
+            return cached
+        profile = DiscordProfile(discord_id, username, avatar, _utc_now())
+        async with DBContextManager(caller="discord_profiles") as cur:
+            await cur.run("discord_profiles.upsert", (profile.discord_id, username, avatar, profile.updated_at))
+        self._keep(profile)
+        return profile
+
+    async def refresh(self, discord_id: int, username: str, avatar: Optional[str]) -> bool:
+        """Update a profile that is already stored, for example from a gateway event.
+
+        Users who were never stored are left out, so events about people who
+        have not played do not fill the table, and they are remembered as
+        missing so later events about them skip the database. A stored
+        profile is only written when the name or avatar changed or it is
+        getting stale, so this can be called on every event.
+
+        Args:
+            discord_id: The user's Discord ID.
+            username: The user's username.
+            avatar: The user's avatar hash, or None for a default avatar.
+
+        Returns:
+            Whether the user has a stored profile.
+        """
+        discord_id = int(discord_id)
+        stored = self.memory.get(discord_id)
+        if stored is _NO_PROFILE:
+            return False
+        if stored is None:
+            async with DBContextManager(caller="discord_profiles") as cur:
+                await cur.run("discord_profiles.by_id", (discord_id,))
+                row = await cur.fetchone()
+            if not row:
+                self.memory.set(discord_id, _NO_PROFILE)
+                return False
+            stored = DiscordProfile(*row)
+        if self._unchanged(stored, username, avatar):
+            self._keep(stored)
+            return True
+
+        profile = DiscordProfile(discord_id, username, avatar, _utc_now())
+        async with DBContextManager(caller="discord_profiles") as cur:
+            updated = await cur.run("discord_profiles.refresh", (username, avatar, profile.updated_at,
+                                                                 profile.discord_id)) > 0
+        if updated:
+            self._keep(profile)
+        else:
+            self.memory.set(discord_id, _NO_PROFILE)
+        return updated
+
+
+profile_cache = ProfileCache(global_config.profile_cache_size, global_config.profile_ttl_seconds)
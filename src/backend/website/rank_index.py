@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import math
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from ..util.config import global_config
+from ..util.database_context_manager import DBContextManager
+from .splatdle import splatdle_days
+
+logger = logging.getLogger("RankIndex")
+
+# Scores are kept to SCORE_STEP; anything at or above MAX_SCORE shares the last bucket
+SCORE_STEP = 0.001
+MAX_SCORE = 100.0
+
+
+def weighted_score(times_played: int, total_guesses: int) -> Optional[float]:
+    """Compute a player's global leaderboard score, matching ``UserStats.weighted_score``.
+
+    Args:
+        times_played: Games the player has played.
+        total_guesses: Guesses taken across all of them.
+
+    Returns:
+        The exact average plus a penalty that shrinks with more games, or None before the first game.
+    """
+    if times_played <= 0:
+        return None
+    return total_guesses / times_played + 4.0 / math.sqrt(times_played)
+
+
+class FenwickTree:
+    """Binary indexed tree of counts with O(log n) updates and prefix sums.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize an all-zero tree.
+
+        Args:
+            size: Number of positions.
+        """
+        self.size: int = size
+        self._tree: List[int] = [0] * (size + 1)
+
+    def add(self, position: int, delta: int) -> None:
+        """Add to the count at a position.
+
+        Args:
+            position: Zero-based position.
+            delta: Amount to add.
+        """
+        position += 1
+        while position <= self.size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def prefix_sum(self, end: int) -> int:
+        """Sum the counts before a position.
+
+        Args:
+            end: Zero-based position to stop before.
+
+        Returns:
+            The sum of positions ``0`` to ``end - 1``.
+        """
+        total = 0
+        position = min(end, self.size)
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+
+class RankIndex:
+    """In-memory order-statistic index over the global leaderboard.
+
+    Players are counted in a Fenwick tree keyed by their weighted score, so a
+    player's rank (one plus the number of players with a strictly lower
+    score, as in ``leaderboard.global_page``) is two O(log n) operations instead
+    of a sort over everyone. Scores are bucketed to ``SCORE_STEP``, so
+    players less than that apart share a rank.
+
+    The index is loaded from ``UserStats`` when the web server starts and is
+    updated by ``post_stats`` as results come in. Each worker process has its
+    own copy, so every ``RANK_SYNC_SECONDS`` it compares the game count in
+    ``GlobalStats`` with the one it last saw and, if another worker has
+    written since, reloads the scores of everyone who played since then.
+
+    Attributes:
+        sync_interval: Seconds between checks for other workers' writes.
+        scores: Weighted score of each indexed player, by Discord user ID.
+    """
+
+    def __init__(self, sync_interval: float) -> None:
+        """Initialize an empty index; ``start`` loads it.
+
+        Args:
+            sync_interval: Seconds between checks for other workers' writes.
+        """
+        self.sync_interval: float = sync_interval
+        self.scores: Dict[int, float] = {}
+        self._tree: FenwickTree = FenwickTree(int(MAX_SCORE / SCORE_STEP) + 1)
+        self._synced_games: Optional[int] = None
+        self._synced_day: Optional[date] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index has been loaded from the database.
+        """
+        return self._synced_day is not None
+
+    @staticmethod
+    def _bucket(score: float) -> int:
+        """Map a score onto its position in the tree.
+        """
+        return min(max(int(float(score) / SCORE_STEP), 0), int(MAX_SCORE / SCORE_STEP))
+
+    def update(self, discord_id: int, score: Optional[float]) -> None:
+        """Set a player's score, adding them if they are new.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            score: Their weighted score; None leaves the player out of the index.
+        """
+        discord_id = int(discord_id)
+        old_score = self.scores.pop(discord_id, None)
+        if old_score is not None:
+            self._tree.add(self._bucket(old_score), -1)
+        if score is None:
+            return
+        self.scores[discord_id] = float(score)
+        self._tree.add(self._bucket(score), 1)
+
+    def rank(self, discord_id: int) -> Optional[Dict[str, Any]]:
+        """Get a player's position on the global leaderboard.
+
+        Args:
+            discord_id: The player's Discord user ID.
+
+        Returns:
+            ``rank`` (players in the same score bucket share one), ``players`` and
+            ``percentile`` (share of other players ranked below them), or None
+            if the player has no score.
+        """
+        score = self.scores.get(int(discord_id))
+        if score is None:
+            return None
+        bucket = self._bucket(score)
+        players = len(self.scores)
+        rank = self._tree.prefix_sum(bucket) + 1
+        behind = players - self._tree.prefix_sum(bucket + 1)
+        percentile = 100.0 * behind / (players - 1) if players > 1 else 100.0
+        return {"rank": rank, "players": players, "percentile": round(percentile, 1)}
+
+    async def load(self) -> None:
+        """Rebuild the index from every score in ``UserStats``.
+        """
+        today, _ = splatdle_days()
+        async with DBContextManager(caller="rank_index", read_only=True) as cur:
+            await cur.run("global_stats.get")
+            totals = await cur.fetchone()
+            await cur.run("user_stats.scores")
+            rows = await cur.fetchall()
+        self.scores = {}
+        self._tree = FenwickTree(self._tree.size)
+        for discord_id, score in rows:
+            self.update(discord_id, score)
+        self._synced_games = totals[2] if totals else 0
+        self._synced_day = today
+        logger.info("Loaded %s player score(s) into the rank index", len(self.scores))
+
+    async def sync(self) -> int:
+        """Pick up scores written by other workers since the last sync.
+
+        Returns:
+            Number of player scores reloaded.
+        """
+        if not self.loaded:
+            await self.load()
+            return len(self.scores)
+        today, _ = splatdle_days()
+        async with DBContextManager(caller="rank_sync", read_only=True) as cur:
+            await cur.run("global_stats.get")
+            totals = await cur.fetchone()
+            games = totals[2] if totals else 0
+            if games == self._synced_games:
+                return 0
+            # A write may land on the day before the last sync, from a queued result flushed after midnight
+            await cur.run("user_stats.scores_since", (self._synced_day - timedelta(days=1),))
+            rows = await cur.fetchall()
+        for discord_id, score in rows:
+            self.update(discord_id, score)
+        self._synced_games = games
+        self._synced_day = today
+        return len(rows)
+
+    async def start(self) -> None:
+        """Load the index and start the sync task.
+        """
+        if self._task is not None:
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error("Failed to load the rank index, will retry: %s", e)
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def _sync_loop(self) -> None:
+        """Sync with the database on every interval.
+        """
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error("Failed to sync the rank index, will retry: %s", e)
+
+    async def close(self) -> None:
+        """Stop the sync task.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+rank_index = RankIndex(global_config.rank_sync_seconds)
@@ -4,13 +4,28 @@ import random
 from urllib.parse import urljoin, quote
 from datetime import datetime, timezone
 import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from ..util.database_context_manager import DBContextManager
 from ..util.config import global_config
 import asyncio
 import interactions
 
 
+def splatdle_days(now: Optional[datetime.datetime] = None) -> Tuple[datetime.date, datetime.date]:
+    """Return today's and yesterday's Splatdle day.
+
+    Days roll over at midnight UTC, when a new weapon is picked.
+
+    Args:
+        now: Moment to get the days for (default: the current time).
+
+    Returns:
+        Today's date and yesterday's date.
+    """
+    today = (now or datetime.datetime.now(timezone.utc)).date()
+    return today, today - datetime.timedelta(days=1)
+
+
 class Splatdle:
     """Splatdle daily weapon guessing game manager.
 
@@ -80,8 +95,8 @@ class Splatdle:
             return
 
         try:
-            async with DBContextManager(use_dict=True) as cur:
-                await cur.execute("SELECT * FROM SplatdleChannels")
+            async with DBContextManager(use_dict=True, caller="splatdle_announcement") as cur:
+                await cur.run("splatdle_channels.all")
                 records = await cur.fetchall()
 
             if not records:
@@ -175,34 +190,38 @@ class Splatdle:
         self.pick_random_weapon(save=True)
         return self.current_weapon
 
-    async def reset_played_today_and_streaks(self) -> None:
-        """Reset daily player statistics.
+    def weapon_label(self) -> str:
+        """Get today's answer as shown to players.
+
+        Returns:
+            The weapon as "WeaponName (GameName)", or an empty string if none is available.
+        """
+        current_weapon = self.get_current_weapon()
+        return f"{current_weapon['name']} ({current_weapon['game']})" if current_weapon else ""
+
+    async def _roll_over(self, today: datetime.date) -> None:
+        """Summarise the finished days into the game history and correct the global totals.
 
-        Resets streaks for players who didn't play today, clears the
-        played_today flags for all players, and empties the daily leaderboard.
+        Pending queued results are written first so yesterday's rollup sees
+        every game.
+
+        Args:
+            today: The Splatdle day that just started.
         """
-        async with DBContextManager() as cur:
-            # Reset streaks for users who didn't play
-            await cur.execute("""
-                UPDATE UserStats
-                SET streak = 0
-                WHERE played_today = FALSE
-            """)
-
-            # Reset everyone’s played_today for next day
-            await cur.execute("""
-                UPDATE UserStats
-                SET played_today = FALSE
-            """)
-            await cur.execute("""
-                DELETE FROM TodaysLeaderboard;
-            """)
+        from .game_history import game_history
+        from .global_stats import rebuild_global_stats
+        from .submission_queue import submission_queue
+        if submission_queue.enabled:
+            await submission_queue.flush()
+        await game_history.roll_up_missing(today)
+        await game_history.ensure_partitions(today)
+        await rebuild_global_stats()
 
     async def run(self) -> None:
         """Run the daily Splatdle game loop.
 
-        Continuously checks for date changes and triggers weapon resets,
-        database cleanup, and announcements when a new day begins.
+        Continuously checks for date changes and triggers weapon resets
+        and announcements when a new day begins.
         """
         """Run forever, picking a new weapon each day."""
         last_date = None
@@ -219,7 +238,7 @@ class Splatdle:
         while True:
             today = datetime.datetime.now(timezone.utc).date()
             if last_date != today:
-                await self.reset_played_today_and_streaks()
+                # Player state is keyed by date; only the finished day's rollup needs writing
                 try:
                     await self._load_or_pick_weapon()
                 except Exception as e:
@@ -228,6 +247,12 @@ class Splatdle:
                     logger.error(f"Error during weapon selection/announcement: {e}")
                     import traceback
                     logger.error(traceback.format_exc())
+                try:
+                    await self._roll_over(today)
+                except Exception as e:
+                    import logging
+                    logger = logging.getLogger("Splatdle")
+                    logger.error(f"Error rolling up finished days: {e}")
                 print("Reset splatdle!")
 
                 last_date = today
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from ..util.config import global_config
+from ..util.database_context_manager import DBContextManager
+from .global_stats import game_delta, record_games
+from .histograms import rebuild_histograms, record_histograms
+from .player_stats import player_stats
+from .splatdle import splatdle_days
+
+logger = logging.getLogger("SubmissionQueue")
+
+
+class Submission:
+    """A player's stats as of their latest Splatdle result.
+
+    Holds absolute values rather than increments, so writing the same
+    submission twice (for example when the journal is replayed after a
+    partial flush) leaves the database in the same state.
+
+    Attributes:
+        discord_id: The player's Discord user ID.
+        streak: Streak including this game.
+        times_played: Games played including this one.
+        total_guesses: Guesses taken across all games including this one.
+        guess_count: Guesses taken in today's game.
+        played_at: When today's game was submitted, in UTC.
+        weapon: Today's weapon, as shown to players.
+    """
+
+    def __init__(self, discord_id: int, streak: int, times_played: int, total_guesses: int,
+                 guess_count: Optional[int], played_at: Optional[datetime], weapon: Optional[str] = None) -> None:
+        """Initialize a submission.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            streak: Streak including this game.
+            times_played: Games played including this one.
+            total_guesses: Guesses taken across all games including this one.
+            guess_count: Guesses taken in today's game.
+            played_at: When today's game was submitted, in UTC.
+            weapon: Today's weapon, as shown to players.
+        """
+        self.discord_id: int = discord_id
+        self.streak: int = streak
+        self.times_played: int = times_played
+        self.total_guesses: int = total_guesses
+        self.guess_count: Optional[int] = guess_count
+        self.played_at: Optional[datetime] = played_at
+        self.weapon: Optional[str] = weapon
+
+    @property
+    def played_on(self) -> Optional[date]:
+        """The Splatdle day the game was played on.
+        """
+        return self.played_at.date() if self.played_at else None
+
+    @property
+    def average_guess_count(self) -> float:
+        """Average guesses per game.
+        """
+        return self.total_guesses / self.times_played if self.times_played else 0.0
+
+    def to_json(self) -> str:
+        """Serialise the submission as one journal line.
+        """
+        return json.dumps({
+            "discord_id": self.discord_id,
+            "streak": self.streak,
+            "times_played": self.times_played,
+            "total_guesses": self.total_guesses,
+            "guess_count": self.guess_count,
+            "played_at": self.played_at.isoformat() if self.played_at else None,
+            "weapon": self.weapon,
+        })
+
+    @classmethod
+    def from_json(cls, line: str) -> "Submission":
+        """Parse a journal line written by ``to_json``.
+
+        Args:
+            line: The journal line.
+
+        Returns:
+            The submission.
+        """
+        data = json.loads(line)
+        played_at = datetime.fromisoformat(data["played_at"]) if data.get("played_at") else None
+        return cls(int(data["discord_id"]), int(data["streak"]), int(data["times_played"]),
+                   int(data["total_guesses"]), data.get("guess_count"), played_at, data.get("weapon"))
+
+
+class SubmissionQueue:
+    """Write-behind queue for Splatdle result submissions.
+
+    With ``SUBMISSION_QUEUE=1``, ``SneakyApi.post_stats`` hands results to
+    this queue instead of updating the database itself. A submission reads the
+    player's row once, computes the new stats, appends them to a local journal
+    and is acknowledged straight away. A background task writes pending
+    results to the database in multi-row batches every ``SUBMISSION_FLUSH_MS``
+    milliseconds, or sooner once ``SUBMISSION_BATCH_SIZE`` are waiting.
+
+    Pending results are kept per player and day, so a player who is still
+    waiting to be written is answered from memory. The journal is rewritten
+    to hold only what is still pending after every successful batch, and is
+    replayed when the queue starts, so results accepted before a crash or a
+    database outage are not lost. The ``GlobalStats`` totals and the
+    guess-count histograms are moved by each batch as a whole; a replayed
+    batch may already have been committed before the crash, so they are
+    rebuilt from ``UserStats`` and ``GameResults`` after a replay.
+
+    Attributes:
+        journal_path: Path of the journal file.
+        flush_interval: Seconds between batched writes.
+        batch_size: Pending results that trigger an early write, and the most written per statement.
+        pending: Results accepted but not yet written, by day and Discord user ID.
+    """
+
+    def __init__(self, journal_path: str, flush_interval: float, batch_size: int) -> None:
+        """Initialize the queue; ``start`` replays the journal and begins flushing.
+
+        Args:
+            journal_path: Path of the journal file.
+            flush_interval: Seconds between batched writes.
+            batch_size: Pending results that trigger an early write.
+        """
+        self.journal_path: str = journal_path
+        self.flush_interval: float = flush_interval
+        self.batch_size: int = max(1, batch_size)
+        self.pending: Dict[Tuple[date, int], Submission] = {}
+        self._journal: Optional[Any] = None
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        self._journal_lock: asyncio.Lock = asyncio.Lock()
+        self._wake: asyncio.Event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild_totals: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether submissions go through the queue.
+        """
+        return global_config.submission_queue
+
+    async def start(self) -> None:
+        """Replay the journal, write what it held and start the flush task.
+        """
+        if self._task is not None:
+            return
+        journal_dir = os.path.dirname(self.journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+        replayed = self._replay()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if replayed:
+            logger.info("Replaying %s pending submission(s) from %s", replayed, self.journal_path)
+            self._rebuild_totals = True
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Failed to write replayed submissions, will retry: %s", e)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def _replay(self) -> int:
+        """Load the journal into ``pending``.
+
+        A line cut short by a crash mid-write is skipped.
+
+        Returns:
+            Number of pending results.
+        """
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        submission = Submission.from_json(line)
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning("Skipping unreadable journal line: %s", e)
+                        continue
+                    self.pending[(submission.played_on, submission.discord_id)] = submission
+        except FileNotFoundError:
+            pass
+        return len(self.pending)
+
+    async def submit(self, discord_id: int, guess_count: int,
+                     weapon: Optional[str] = None) -> Tuple[bool, Submission]:
+        """Accept a player's result for today.
+
+        Args:
+            discord_id: The player's Discord user ID.
+            guess_count: Guesses taken in today's game.
+            weapon: Today's weapon, as shown to players.
+
+        Returns:
+            Whether the player had already played today, and their stats: the
+            existing ones if they had, otherwise the ones including this game.
+        """
+        discord_id = int(discord_id)
+        now = datetime.now(timezone.utc)
+        today, yesterday = splatdle_days(now)
+        submission = self.pending.get((today, discord_id))
+        if submission is not None:
+            return True, submission
+
+        previous = self.pending.get((yesterday, discord_id))
+        row = None
+        if previous is None:
+            async with DBContextManager(caller="post_stats") as cur:
+                await cur.run("user_stats.submission", (discord_id,))
+                row = await cur.fetchone()
+
+            # Another request for the same player may have been accepted while this one read the database
+            submission = self.pending.get((today, discord_id))
+            if submission is not None:
+                return True, submission
+
+        if previous is not None:
+            streak, times_played, total_guesses, last_played = (previous.streak, previous.times_played,
+                                                                 previous.total_guesses, yesterday)
+        elif row:
+            streak, times_played, total_guesses, last_played, todays_guesses, played_at = row
+            if last_played == today:
+                return True, Submission(discord_id, streak, times_played, total_guesses,
+                                        todays_guesses if todays_guesses is not None else guess_count, played_at)
+        else:
+            streak, times_played, total_guesses, last_played = 0, 0, 0, None
+
+        submission = Submission(discord_id, streak + 1 if last_played == yesterday else 1, times_played + 1,
+                                total_guesses + guess_count, guess_count,
+                                now.replace(tzinfo=None, microsecond=0), weapon)
+
+        # Added to pending before the journal write so a concurrent compaction keeps it
+        self.pending[(today, discord_id)] = submission
+        async with self._journal_lock:
+            self._journal.write(submission.to_json() + "\n")
+            self._journal.flush()
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._journal.fileno())
+
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+        return False, submission
+
+    async def flush(self) -> None:
+        """Write every pending result to the database.
+
+        Raises:
+            Exception: Whatever the database raised; the results stay pending.
+        """
+        async with self._flush_lock:
+            batch = list(self.pending.values())
+            if not batch:
+                return
+            async with DBContextManager(caller="submission_flush") as cur:
+                for start in range(0, len(batch), self.batch_size):
+                    chunk = batch[start:start + self.batch_size]
+                    await cur.run_many("user_stats.write_behind", [
+                        (s.discord_id, s.streak, s.times_played, s.total_guesses, s.average_guess_count, s.played_on)
+                        for s in chunk
+                    ])
+                    await cur.run_many("game_results.write_behind", [
+                        (s.played_on, s.discord_id, s.weapon, s.guess_count, s.played_at) for s in chunk
+                    ])
+
+                new_players, average_change = 0, 0.0
+                for submission in batch:
+                    players, change = game_delta(submission.times_played, submission.total_guesses,
+                                                 submission.guess_count)
+                    new_players += players
+                    average_change += change
+                await record_games(cur, new_players, average_change, len(batch),
+                                   sum(submission.guess_count for submission in batch))
+                await record_histograms(cur, [(s.played_on, s.discord_id, s.guess_count) for s in batch])
+                if self._rebuild_totals:
+                    await cur.run("global_stats.rebuild")
+                    await rebuild_histograms(cur, [s.played_on for s in batch], [s.discord_id for s in batch])
+
+            if self._rebuild_totals:
+                # Stats read while the replayed results were still pending are out of date
+                for submission in batch:
+                    player_stats.forget(submission.discord_id)
+            self._rebuild_totals = False
+
+            for submission in batch:
+                key = (submission.played_on, submission.discord_id)
+                if self.pending.get(key) is submission:
+                    del self.pending[key]
+            await self._compact()
+            logger.debug("Wrote %s submission(s), %s still pending", len(batch), len(self.pending))
+
+    async def _compact(self) -> None:
+        """Rewrite the journal so it only holds results that are still pending.
+
+        Holds the journal lock, so a submission is never written to or synced
+        on a journal that is being swapped out.
+        """
+        async with self._journal_lock:
+            lines = [submission.to_json() + "\n" for submission in self.pending.values()]
+            await asyncio.get_running_loop().run_in_executor(None, self._write_journal, lines)
+            self._journal.close()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _write_journal(self, lines: List[str]) -> None:
+        """Atomically replace the journal file with the given lines.
+        """
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    async def _flush_loop(self) -> None:
+        """Flush pending results on every interval or when a batch fills up.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Failed to write %s pending submission(s), will retry: %s", len(self.pending), e)
+
+    async def close(self) -> None:
+        """Stop the flush task, write what is pending and close the journal.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._journal is None:
+            return
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Leaving %s submission(s) in the journal for the next start: %s", len(self.pending), e)
+        async with self._journal_lock:
+            self._journal.close()
+            self._journal = None
+
+
+submission_queue = SubmissionQueue(global_config.submission_journal, global_config.submission_flush_ms / 1000,
+                                   global_config.submission_batch_size)
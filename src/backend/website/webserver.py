@@ -7,7 +7,10 @@ import aiohttp_cors
 import interactions
 from .oauth import DiscordOauthHandler
 from ..util.config import global_config
+from ..util.http_client import http_client
 from .api import SneakyApi
+from .submission_queue import submission_queue
+from .rank_index import rank_index
 logger = logging.getLogger("webserver")
 
 
@@ -35,7 +38,7 @@ class WebServer:
         self.app: web.Application = web.Application()
 
         self.discord_token_handler: DiscordOauthHandler = DiscordOauthHandler()
-        self.sneaky_api: SneakyApi = SneakyApi(bot)
+        self.sneaky_api: SneakyApi = SneakyApi(bot, self.discord_token_handler)
         self.cors: Any = aiohttp_cors.setup(self.app, defaults={
             "*": aiohttp_cors.ResourceOptions(
                 allow_credentials=True,
@@ -117,6 +120,10 @@ class WebServer:
             "/api/splatdle", self.sneaky_api.serve_splatdle)
         self.app.router.add_post(
             "/api/splatdle/stats", self.sneaky_api.post_stats)
+        self.app.router.add_get(
+            "/api/splatdle/history", self.sneaky_api.get_history)
+        self.app.router.add_get(
+            "/api/splatdle/leaderboard", self.sneaky_api.get_leaderboard)
 
         logger.debug("Static directory: %s", self.static_dir)
         assets_dir = os.path.join(self.static_dir, "assets")
@@ -137,11 +144,13 @@ class WebServer:
     async def run(self) -> None:
         """Start the web server.
 
-        Initializes OAuth handlers, sets up the HTTP server, and begins
-        serving requests. Also starts the Splatdle game loop.
+        Sets up the HTTP server and begins
+        serving requests. Also starts the submission queue when enabled,
+        loads the rank index and runs the Splatdle game loop.
         """
-        await self.discord_token_handler.init()
-        await self.sneaky_api.dc_token_handler.init()
+        if submission_queue.enabled:
+            await submission_queue.start()
+        await rank_index.start()
         runner = web.AppRunner(self.app)
         await runner.setup()
         site = web.TCPSite(runner, '0.0.0.0',
@@ -158,8 +167,13 @@ class WebServer:
 
     async def close(self) -> None:
         """Close the web server and cleanup resources.
+
+        Closes the shared outbound HTTP session and writes out anything left in
+        the submission queue while the database pools are still open.
         """
-        await self.discord_token_handler.close()
+        await http_client.close()
+        await submission_queue.close()
+        await rank_index.close()
 
     async def handle_500(self, _: Any) -> web.HTTPFound:
         """Handle 500 Internal Server Error responses.
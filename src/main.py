@@ -8,7 +8,7 @@ from typing import List
 from dotenv import load_dotenv
 import interactions
 from interactions import Intents
-from backend.util import global_config
+from backend.util import global_config, database_backend, migration_runner, index_advisor
 from backend.website import WebServer, __version__, __author__, setup_logging
 
 setup_logging()
@@ -46,6 +46,12 @@ logger.info(ASCII_BANNER)
 parser = argparse.ArgumentParser(description="Sneaky's application")
 parser.add_argument('--override-env', action='store_true',
                     help='Override environment variables')
+parser.add_argument('--migrate', action='store_true',
+                    help='Apply pending database migrations and exit')
+parser.add_argument('--dry-run', action='store_true',
+                    help='With --migrate, list pending migrations without applying them')
+parser.add_argument('--advise-indexes', action='store_true',
+                    help='EXPLAIN the registered queries, report full scans and exit')
 args = parser.parse_args()
 
 load_dotenv(override=args.override_env)
@@ -69,21 +75,52 @@ for ext in ext_names:
 async def run_services() -> None:
     """Run the main application services.
 
-    Starts the web server and Discord bot concurrently,
-    handling the main application loop.
+    Opens the database backend's shared pools, applies pending migrations
+    when ``MIGRATE_ON_STARTUP`` is set, starts the web server and Discord bot
+    concurrently, and closes the pools again on shutdown.
     """
     """
     Main method
     """
+    await database_backend.init()
+    if global_config.migrate_on_startup:
+        await migration_runner.migrate()
     webserver = WebServer(bot=bot)
     logger.info("Using client ID: %s", global_config.client_id)
     logger.info("Running the application...")
-    await asyncio.gather(
-        webserver.run(),
-        bot.astart(global_config.discord_token),
-    )
+    try:
+        await asyncio.gather(
+            webserver.run(),
+            bot.astart(global_config.discord_token),
+        )
+    finally:
+        await webserver.close()
+        await database_backend.close()
+
+
+async def run_database_tools() -> None:
+    """Run the database command line tools selected by the arguments.
+
+    ``--migrate`` applies pending schema migrations (only lists them with
+    ``--dry-run``) and ``--advise-indexes`` reports registered queries that
+    scan whole tables.
+    """
+    await database_backend.init()
+    try:
+        if args.migrate:
+            await migration_runner.migrate(dry_run=args.dry_run)
+        if args.advise_indexes:
+            findings = await index_advisor.review()
+            for name, problem in findings:
+                print(f"{name}: {problem}")
+            print(f"{len(findings)} finding(s)")
+    finally:
+        await database_backend.close()
 
 if __name__ == "__main__":
+    if args.migrate or args.advise_indexes:
+        asyncio.run(run_database_tools())
+        raise SystemExit(0)
     try:
         asyncio.run(run_services())
     except RuntimeError as e:
@@ -0,0 +1,9 @@
+-- Store each player's total guesses next to times_played so averages are
+-- computed from exact running totals instead of the rounded DECIMAL(4,1)
+-- average_guess_count. Existing rows are backfilled from the rounded average,
+-- so their totals are as close as the stored averages allow.
+ALTER TABLE UserStats
+    ADD COLUMN total_guesses INTEGER NOT NULL DEFAULT 0 AFTER times_played;
+
+UPDATE UserStats
+SET total_guesses = ROUND(average_guess_count * times_played);
@@ -0,0 +1,18 @@
+-- Running totals behind the global averages, kept up to date in the same
+-- transaction that records each game so reading them never scans UserStats.
+-- sum_player_averages / players is the average of every player's average;
+-- total_guesses / total_games is the average over all games played.
+CREATE TABLE IF NOT EXISTS GlobalStats (
+    id TINYINT,
+    players INTEGER NOT NULL DEFAULT 0,
+    sum_player_averages DECIMAL(20,6) NOT NULL DEFAULT 0,
+    total_games BIGINT NOT NULL DEFAULT 0,
+    total_guesses BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id)
+);
+
+REPLACE INTO GlobalStats (id, players, sum_player_averages, total_games, total_guesses)
+SELECT 1, COUNT(*), COALESCE(SUM(total_guesses / times_played), 0), COALESCE(SUM(times_played), 0),
+       COALESCE(SUM(total_guesses), 0)
+FROM UserStats
+WHERE times_played > 0;
@@ -0,0 +1,11 @@
+-- Let both leaderboards be read in index order instead of sorting the whole
+-- table. weighted_score is the global leaderboard ranking: a player's exact
+-- average plus a penalty that shrinks as they play more games.
+ALTER TABLE UserStats
+    ADD COLUMN weighted_score DOUBLE AS (
+        CASE WHEN times_played > 0 THEN total_guesses / times_played + 4.0 / SQRT(times_played) END
+    ) STORED,
+    ADD INDEX idx_weighted_score (weighted_score);
+
+ALTER TABLE TodaysLeaderboard
+    ADD INDEX idx_guess_count (guess_count);
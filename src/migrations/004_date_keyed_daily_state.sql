@@ -0,0 +1,30 @@
+-- Derive "played today" and streak breaks from the date a player last played,
+-- and key today's leaderboard by date, so the midnight rollover no longer
+-- rewrites UserStats or empties TodaysLeaderboard. Dates are UTC, matching
+-- when the Splatdle weapon changes.
+ALTER TABLE UserStats
+    ADD COLUMN last_played_date DATE NULL AFTER streak;
+
+-- The old midnight reset zeroed the streak of everyone who missed a day, so a
+-- player with a streak who has not played today last played yesterday.
+UPDATE UserStats
+SET last_played_date = CASE
+    WHEN played_today THEN UTC_DATE()
+    WHEN streak > 0 THEN UTC_DATE() - INTERVAL 1 DAY
+END;
+
+ALTER TABLE UserStats
+    DROP COLUMN played_today;
+
+ALTER TABLE TodaysLeaderboard
+    ADD COLUMN played_on DATE NULL FIRST;
+
+UPDATE TodaysLeaderboard
+SET played_on = UTC_DATE();
+
+ALTER TABLE TodaysLeaderboard
+    MODIFY played_on DATE NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (played_on, discord_id),
+    DROP INDEX idx_guess_count,
+    ADD INDEX idx_played_on_guess_count (played_on, guess_count);
@@ -0,0 +1,34 @@
+-- Keep every game instead of only today's. GameResults is partitioned by
+-- month on played_on; p_future catches everything past the newest monthly
+-- partition and is split further by GameHistory.ensure_partitions as months
+-- come up. Each finished day is summarised once into DailyRollups.
+CREATE TABLE IF NOT EXISTS GameResults (
+    played_on DATE NOT NULL,
+    discord_id BIGINT NOT NULL,
+    weapon VARCHAR(255),
+    guess_count INT NOT NULL,
+    finished_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (played_on, discord_id),
+    INDEX idx_discord_id_played_on (discord_id, played_on),
+    INDEX idx_played_on_guess_count (played_on, guess_count)
+)
+PARTITION BY RANGE COLUMNS (played_on) (
+    PARTITION p_before VALUES LESS THAN ('2026-10-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE IF NOT EXISTS DailyRollups (
+    played_on DATE,
+    weapon VARCHAR(255),
+    players INTEGER NOT NULL DEFAULT 0,
+    total_guesses INTEGER NOT NULL DEFAULT 0,
+    best_guess_count INTEGER,
+    distribution VARCHAR(2048), -- JSON object of guess count to number of players
+    PRIMARY KEY (played_on)
+);
+
+INSERT IGNORE INTO GameResults (played_on, discord_id, guess_count, finished_at)
+SELECT played_on, discord_id, guess_count, created_at
+FROM TodaysLeaderboard;
+
+DROP TABLE TodaysLeaderboard;
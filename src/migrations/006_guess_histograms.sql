@@ -0,0 +1,27 @@
+-- Guess-count histograms for each day and for each player's lifetime, kept up
+-- to date as results are recorded so the stats endpoint and /splatdle-stats
+-- never group over GameResults. Buckets are guess counts 1 to 9; bucket 10
+-- holds every game that took 10 or more guesses.
+CREATE TABLE IF NOT EXISTS DailyGuessHistogram (
+    played_on DATE,
+    bucket TINYINT,
+    players INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (played_on, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS PlayerGuessHistogram (
+    discord_id BIGINT,
+    bucket TINYINT,
+    games INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (discord_id, bucket)
+);
+
+INSERT INTO DailyGuessHistogram (played_on, bucket, players)
+SELECT played_on, LEAST(guess_count, 10), COUNT(*)
+FROM GameResults
+GROUP BY played_on, LEAST(guess_count, 10);
+
+INSERT INTO PlayerGuessHistogram (discord_id, bucket, games)
+SELECT discord_id, LEAST(guess_count, 10), COUNT(*)
+FROM GameResults
+GROUP BY discord_id, LEAST(guess_count, 10);
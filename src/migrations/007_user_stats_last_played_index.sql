@@ -0,0 +1,4 @@
+-- Lets each worker's rank index reload only the players who played since it
+-- last synced, instead of every score.
+ALTER TABLE UserStats
+    ADD INDEX idx_last_played_date (last_played_date);
@@ -0,0 +1,11 @@
+-- Cache of Discord usernames and avatars, so leaderboards and the website do
+-- not ask Discord for them on every render. Rows are written on login and by
+-- lookups that had to go to Discord, and refreshed from gateway member
+-- updates. updated_at is UTC.
+CREATE TABLE IF NOT EXISTS DiscordProfiles (
+    discord_id BIGINT,
+    username VARCHAR(255) NOT NULL,
+    avatar VARCHAR(255),
+    updated_at DATETIME NOT NULL,
+    PRIMARY KEY (discord_id)
+);
@@ -0,0 +1,87 @@
+-- Schema for the embedded SQLite backend (DB_BACKEND=sqlite).
+-- Mirrors schema.sql plus the migrations; SQLite declares secondary indexes
+-- separately (naming the discord_id tiebreak InnoDB appends to every index)
+-- and does not partition GameResults.
+CREATE TABLE IF NOT EXISTS UserTokens (
+    discord_id INTEGER,
+    access_token VARCHAR(2048),
+    refresh_token VARCHAR(2048),
+    expires_at INTEGER,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (discord_id)
+);
+CREATE INDEX IF NOT EXISTS idx_expires_at ON UserTokens (expires_at);
+
+CREATE TABLE IF NOT EXISTS UserStats (
+    discord_id INTEGER,
+    streak INTEGER DEFAULT 0,
+    last_played_date DATE,
+    times_played INTEGER DEFAULT 0,
+    total_guesses INTEGER NOT NULL DEFAULT 0,
+    average_guess_count DECIMAL(4,1) DEFAULT 0,
+    weighted_score DOUBLE GENERATED ALWAYS AS (
+        CASE WHEN times_played > 0 THEN total_guesses * 1.0 / times_played + 4.0 / SQRT(times_played) END
+    ) STORED,
+    PRIMARY KEY (discord_id)
+);
+CREATE INDEX IF NOT EXISTS idx_weighted_score ON UserStats (weighted_score, discord_id);
+CREATE INDEX IF NOT EXISTS idx_last_played_date ON UserStats (last_played_date);
+
+CREATE TABLE IF NOT EXISTS GameResults (
+    played_on DATE NOT NULL,
+    discord_id INTEGER NOT NULL,
+    weapon VARCHAR(255),
+    guess_count INT NOT NULL,
+    finished_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (played_on, discord_id)
+);
+CREATE INDEX IF NOT EXISTS idx_discord_id_played_on ON GameResults (discord_id, played_on);
+CREATE INDEX IF NOT EXISTS idx_played_on_guess_count ON GameResults (played_on, guess_count, discord_id);
+
+CREATE TABLE IF NOT EXISTS DailyRollups (
+    played_on DATE,
+    weapon VARCHAR(255),
+    players INTEGER NOT NULL DEFAULT 0,
+    total_guesses INTEGER NOT NULL DEFAULT 0,
+    best_guess_count INTEGER,
+    distribution VARCHAR(2048),
+    PRIMARY KEY (played_on)
+);
+
+CREATE TABLE IF NOT EXISTS DailyGuessHistogram (
+    played_on DATE,
+    bucket TINYINT,
+    players INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (played_on, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS PlayerGuessHistogram (
+    discord_id INTEGER,
+    bucket TINYINT,
+    games INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (discord_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS DiscordProfiles (
+    discord_id INTEGER,
+    username VARCHAR(255) NOT NULL,
+    avatar VARCHAR(255),
+    updated_at DATETIME NOT NULL,
+    PRIMARY KEY (discord_id)
+);
+
+CREATE TABLE IF NOT EXISTS SplatdleChannels (
+    guild_id INTEGER,
+    channel_id INTEGER,
+    PRIMARY KEY (guild_id)
+);
+
+CREATE TABLE IF NOT EXISTS GlobalStats (
+    id TINYINT,
+    players INTEGER NOT NULL DEFAULT 0,
+    sum_player_averages DECIMAL(20,6) NOT NULL DEFAULT 0,
+    total_games BIGINT NOT NULL DEFAULT 0,
+    total_guesses BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id)
+);
+INSERT OR IGNORE INTO GlobalStats (id) VALUES (1);
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend the way main.py does, from the src directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point the database at a throwaway SQLite file before global_config reads the environment
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="sneaky-tests-"), "tests.sqlite")
+os.environ["SUBMISSION_QUEUE"] = "0"
+os.environ["SESSION_SECRET"] = "test-session-secret"
@@ -0,0 +1,77 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.player_stats import PlayerStats
+from backend.website.splatdle import splatdle_days
+
+DAY = date(2024, 6, 1)
+
+
+class TestSplatdleDays(unittest.TestCase):
+    """Splatdle days roll over at midnight UTC.
+    """
+
+    def test_days_follow_utc(self) -> None:
+        self.assertEqual(splatdle_days(datetime(2024, 6, 1, 23, 59, tzinfo=timezone.utc)), (DAY, date(2024, 5, 31)))
+        self.assertEqual(splatdle_days(datetime(2024, 6, 2, 0, 0, tzinfo=timezone.utc)), (date(2024, 6, 2), DAY))
+
+    def test_default_is_now(self) -> None:
+        today, yesterday = splatdle_days()
+        self.assertEqual(today, datetime.now(timezone.utc).date())
+        self.assertEqual(yesterday, today - timedelta(days=1))
+
+
+class TestDateKeyedState(unittest.IsolatedAsyncioTestCase):
+    """Played-today and streaks worked out from ``last_played_date`` on SQLite.
+
+    Nothing is written between days in these tests; only the day asked about changes.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run("user_stats.record_result", (6001, 4, 4, DAY, DAY - timedelta(days=1)))
+            await cur.run("game_results.insert", (DAY, 6001, "Splattershot", 4))
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def player(self) -> PlayerStats:
+        async with DBContextManager(caller="tests", read_only=True) as cur:
+            await cur.run("user_stats.submission", (6001,))
+            return PlayerStats.from_row(6001, await cur.fetchone())
+
+    async def leaderboard_streak(self, today: date) -> int:
+        async with DBContextManager(use_dict=True, caller="tests", read_only=True) as cur:
+            await cur.run("leaderboard.global_row", (today - timedelta(days=1), 6001))
+            return (await cur.fetchone())["streak"]
+
+    async def day_players(self, day: date):
+        async with DBContextManager(caller="tests", read_only=True) as cur:
+            await cur.run("leaderboard.day", (day,))
+            return [discord_id for discord_id, _ in await cur.fetchall()]
+
+    async def test_played_today_only_on_the_day(self) -> None:
+        stats = await self.player()
+        self.assertTrue(stats.played_on(DAY))
+        self.assertEqual(stats.todays_guess_count(DAY), 4)
+        self.assertFalse(stats.played_on(DAY + timedelta(days=1)))
+        self.assertIsNone(stats.todays_guess_count(DAY + timedelta(days=1)))
+
+    async def test_streak_lapses_after_a_missed_day(self) -> None:
+        stats = await self.player()
+        for days_later, streak in ((0, 1), (1, 1), (2, 0)):
+            today = DAY + timedelta(days=days_later)
+            with self.subTest(days_later=days_later):
+                self.assertEqual(stats.streak(today - timedelta(days=1)), streak)
+                self.assertEqual(await self.leaderboard_streak(today), streak)
+        self.assertEqual(stats.stored_streak, 1)
+
+    async def test_days_leaderboard_is_a_date_filter(self) -> None:
+        self.assertIn(6001, await self.day_players(DAY))
+        self.assertNotIn(6001, await self.day_players(DAY + timedelta(days=1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
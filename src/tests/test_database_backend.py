@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import date
+from backend.util.database_backend import SQLitePool, database_backend
+from backend.util.database_context_manager import DBContextManager
+
+
+async def channel_of(guild_id: int):
+    """Read a guild's Splatdle channel back, or None if it has none.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.execute("SELECT channel_id FROM SplatdleChannels WHERE guild_id = %s", (guild_id,))
+        row = await cur.fetchone()
+    return row[0] if row else None
+
+
+class TestSQLiteBackend(unittest.IsolatedAsyncioTestCase):
+    """``DBContextManager`` transactions and cursors on the SQLite backend.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_block_is_committed(self) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            await cur.execute("INSERT INTO SplatdleChannels (guild_id, channel_id) VALUES (%s, %s)", (4001, 11))
+        self.assertEqual(await channel_of(4001), 11)
+
+    async def test_failed_block_is_rolled_back(self) -> None:
+        with self.assertRaises(RuntimeError):
+            async with DBContextManager(caller="tests") as cur:
+                await cur.execute("INSERT INTO SplatdleChannels (guild_id, channel_id) VALUES (%s, %s)", (4002, 12))
+                raise RuntimeError("failed halfway")
+        self.assertIsNone(await channel_of(4002))
+
+    async def test_dict_rows_and_run_many(self) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            self.assertEqual(await cur.run_many("game_results.write_behind", [
+                (date(2024, 3, 1), 4003, "Splattershot", 3, "2024-03-01 10:00:00"),
+                (date(2024, 3, 1), 4004, "Splattershot", 5, "2024-03-01 11:00:00"),
+            ]), 2)
+        async with DBContextManager(use_dict=True, caller="tests", read_only=True) as cur:
+            await cur.run("leaderboard.day", (date(2024, 3, 1),))
+            rows = await cur.fetchall()
+        self.assertEqual(rows, [{"discord_id": 4003, "guess_count": 3}, {"discord_id": 4004, "guess_count": 5}])
+
+    async def test_dates_and_mysql_functions(self) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run("game_results.insert", (date(2024, 3, 2), 4005, "Splat Roller", 4))
+            await cur.run("game_results.player_history", (4005, date(2024, 3, 1)))
+            played_on, weapon, guess_count, finished_at = await cur.fetchone()
+            await cur.execute("SELECT SQRT(%s)", (16,))
+            self.assertEqual((await cur.fetchone())[0], 4.0)
+        self.assertEqual((played_on, weapon, guess_count), (date(2024, 3, 2), "Splat Roller", 4))
+        self.assertIsNotNone(finished_at)
+
+    async def test_connections_go_back_to_the_pool(self) -> None:
+        async with DBContextManager(caller="tests_pool"):
+            self.assertEqual(database_backend.pool.in_use, 1)
+        with self.assertRaises(ValueError):
+            async with DBContextManager(caller="tests_pool", read_only=True) as cur:
+                await cur.run("global_stats.add", (0, 0, 0, 0))
+        self.assertEqual(database_backend.pool.in_use, 0)
+        self.assertEqual(database_backend.pool.stats()["callers"]["tests_pool"]["acquires"], 2)
+
+
+class TestSQLitePool(unittest.IsolatedAsyncioTestCase):
+    """Sizing and waiting in the SQLite connection pool.
+    """
+
+    async def test_memory_database_has_one_connection(self) -> None:
+        pool = SQLitePool(":memory:", size=4)
+        await pool.init()
+        try:
+            self.assertEqual(pool.size, 1)
+            first = await pool.acquire("first")
+            waiting = asyncio.create_task(pool.acquire("second"))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+            await pool.release(first)
+            self.assertIs(await waiting, first)
+            await pool.release(first)
+            self.assertEqual(pool.in_use, 0)
+        finally:
+            await pool.close()
+
+    async def test_file_database_is_shared_by_its_connections(self) -> None:
+        pool = SQLitePool(os.path.join(tempfile.mkdtemp(prefix="sneaky-pool-"), "pool.sqlite"), size=2)
+        await pool.init()
+        try:
+            writer, reader = await pool.acquire(), await pool.acquire()
+            self.assertIsNot(writer, reader)
+            cur = await writer.cursor()
+            await cur.execute("INSERT INTO SplatdleChannels (guild_id, channel_id) VALUES (%s, %s)", (1, 2))
+            await writer.commit()
+            cur = await reader.cursor()
+            await cur.execute("SELECT channel_id FROM SplatdleChannels WHERE guild_id = ?", (1,))
+            self.assertEqual(await cur.fetchone(), (2,))
+            await pool.release(writer)
+            await pool.release(reader)
+        finally:
+            await pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.global_stats import game_delta, global_averages, rebuild_global_stats
+
+
+class TestGlobalStats(unittest.IsolatedAsyncioTestCase):
+    """Incremental ``GlobalStats`` totals and their daily rebuild on SQLite.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def exact_averages(self):
+        async with DBContextManager(caller="tests") as cur:
+            await cur.execute("SELECT total_guesses, times_played FROM UserStats WHERE times_played > 0")
+            rows = await cur.fetchall()
+        averages = [total_guesses / times_played for total_guesses, times_played in rows]
+        games = sum(times_played for _, times_played in rows)
+        guesses = sum(total_guesses for total_guesses, _ in rows)
+        return sum(averages) / len(averages), guesses / games
+
+    async def assert_averages(self, player_average: float, game_average: float) -> None:
+        stored_player_average, stored_game_average = await global_averages(read_only=False)
+        self.assertAlmostEqual(stored_player_average, player_average, places=12)
+        self.assertAlmostEqual(stored_game_average, game_average, places=12)
+
+    def test_game_delta(self) -> None:
+        self.assertEqual(game_delta(1, 4, 4), (1, 4.0))
+        players, change = game_delta(2, 6, 2)
+        self.assertEqual(players, 0)
+        self.assertAlmostEqual(change, 3.0 - 4.0)
+
+    async def test_rebuild_corrects_drift(self) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run_many("user_stats.write_behind", [
+                (9001, 1, 3, 10, 10 / 3, "2024-01-01"),
+                (9002, 1, 7, 20, 20 / 7, "2024-01-01"),
+                (9003, 1, 1, 6, 6.0, "2024-01-01"),
+            ])
+        await rebuild_global_stats()
+        player_average, game_average = await self.exact_averages()
+        await self.assert_averages(player_average, game_average)
+
+        # Float differences leave the sum of averages slightly off
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run("global_stats.add", (0, 1e-9, 0, 0))
+        self.assertNotAlmostEqual((await global_averages(read_only=False))[0], player_average, places=12)
+
+        await rebuild_global_stats()
+        await self.assert_averages(player_average, game_average)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import random
+import unittest
+from datetime import date, datetime
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.histograms import day_players, record_histograms
+
+DAY = date(2024, 7, 1)
+PER_PAGE = 7
+
+
+async def all_pages(query: str, params, sort_key: str):
+    """Read a board page by page, starting each page after the previous page's last row.
+    """
+    rows, after = [], (-1, -1)
+    async with DBContextManager(use_dict=True, caller="tests", read_only=True) as cur:
+        while True:
+            await cur.run(query, params + after + (PER_PAGE + 1,))
+            page = list(await cur.fetchall())
+            rows.extend(page[:PER_PAGE])
+            if len(page) <= PER_PAGE:
+                return rows
+            after = (page[PER_PAGE - 1][sort_key], page[PER_PAGE - 1]["discord_id"])
+
+
+class TestKeysetPages(unittest.IsolatedAsyncioTestCase):
+    """Keyset leaderboard pages on SQLite against a full sort.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = random.Random(15)
+        # Few distinct guess counts, so most rows tie on the sort key
+        cls.games = [(DAY, 7000 + n, rng.randint(1, 6)) for n in range(40)]
+        cls.players = [(7000 + n, 1, rng.randint(1, 9), rng.randint(1, 50), DAY) for n in range(40)]
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        async with DBContextManager(caller="tests") as cur:
+            await cur.execute("SELECT COUNT(*) FROM GameResults WHERE played_on = %s", (DAY,))
+            if (await cur.fetchone())[0]:
+                return
+            await cur.run_many("game_results.write_behind", [
+                (day, discord_id, "Splattershot", guess_count, datetime(2024, 7, 1, 12))
+                for day, discord_id, guess_count in self.games
+            ])
+            await record_histograms(cur, self.games)
+            await cur.run_many("user_stats.write_behind", [
+                (discord_id, streak, times_played, total_guesses, total_guesses / times_played, last_played)
+                for discord_id, streak, times_played, total_guesses, last_played in self.players
+            ])
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_day_pages_match_a_full_sort(self) -> None:
+        rows = await all_pages("leaderboard.day_page", (DAY,), "guess_count")
+        expected = sorted((guess_count, discord_id) for _, discord_id, guess_count in self.games)
+        self.assertEqual([(row["guess_count"], row["discord_id"]) for row in rows], expected)
+
+    async def test_global_pages_match_a_full_sort(self) -> None:
+        rows = await all_pages("leaderboard.global_page", (DAY,), "weighted_score")
+        async with DBContextManager(caller="tests", read_only=True) as cur:
+            await cur.execute("SELECT weighted_score, discord_id FROM UserStats WHERE weighted_score IS NOT NULL")
+            expected = sorted(tuple(row) for row in await cur.fetchall())
+        self.assertEqual([(row["weighted_score"], row["discord_id"]) for row in rows], expected)
+
+    async def test_positions_count_the_rows_up_to_a_cursor(self) -> None:
+        expected = sorted((guess_count, discord_id) for _, discord_id, guess_count in self.games)
+        async with DBContextManager(caller="tests", read_only=True) as cur:
+            for position in (0, PER_PAGE - 1, len(expected) - 1):
+                await cur.run("leaderboard.day_position", (DAY,) + expected[position])
+                self.assertEqual((await cur.fetchone())[0], position + 1)
+
+    async def test_player_count_comes_from_the_histogram(self) -> None:
+        self.assertEqual(await day_players(DAY), len(self.games))
+        self.assertEqual(await day_players(date(2024, 7, 2)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.histograms import record_histograms
+from backend.website.leaderboard_snapshots import LeaderboardSnapshots, encode_cursor
+
+DAY = date(2024, 8, 1)
+
+
+async def record_games(games) -> None:
+    """Store games for ``DAY`` with their histograms, leaving ``GlobalStats`` alone.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.run_many("game_results.write_behind", [
+            (DAY, discord_id, "Splattershot", guess_count, datetime(2024, 8, 1, 12))
+            for discord_id, guess_count in games
+        ])
+        await record_histograms(cur, [(DAY, discord_id, guess_count) for discord_id, guess_count in games])
+
+
+async def new_version() -> None:
+    """Move the snapshot version on, as recording a game does.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.run("global_stats.add", (0, 0, 1, 0))
+
+
+class TestLeaderboardSnapshots(unittest.IsolatedAsyncioTestCase):
+    """Page caching and invalidation of leaderboard snapshots on SQLite.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        async with DBContextManager(caller="tests") as cur:
+            await cur.execute("DELETE FROM GameResults WHERE played_on = %s", (DAY,))
+            await cur.execute("DELETE FROM DailyGuessHistogram WHERE played_on = %s", (DAY,))
+        await record_games([(8000 + n, n % 6 + 2) for n in range(12)])
+        patcher = mock.patch("backend.website.leaderboard_snapshots.splatdle_days",
+                             return_value=(DAY, DAY - timedelta(days=1)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.snapshots = LeaderboardSnapshots(interval=0, per_page=5)
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_pages_are_built_once_per_version(self) -> None:
+        first = await self.snapshots.page("today", 0)
+        self.assertIs(await self.snapshots.page("today", 0), first)
+        last = await self.snapshots.page("today", 2)
+        self.assertEqual([row["position"] for row in last.rows], [11, 12])
+        self.assertFalse(last.has_next)
+        self.assertEqual(last.total, 12)
+        self.assertIsNone(await self.snapshots.page("today", 3))
+
+        positions = []
+        for index in range(3):
+            positions += [(row["guessCount"], int(row["discordId"]))
+                          for row in (await self.snapshots.page("today", index)).rows]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(len(set(positions)), 12)
+
+    async def test_new_game_moves_the_version_on(self) -> None:
+        first = await self.snapshots.page("today", 0)
+        await record_games([(8100, 1)])
+        self.assertIs(await self.snapshots.page("today", 0), first)
+
+        await new_version()
+        rebuilt = await self.snapshots.page("today", 0)
+        self.assertIsNot(rebuilt, first)
+        self.assertGreater(rebuilt.version, first.version)
+        self.assertEqual(rebuilt.rows[0]["discordId"], "8100")
+        self.assertEqual(rebuilt.total, 13)
+
+    async def test_version_is_only_checked_every_interval(self) -> None:
+        self.snapshots.interval = 3600
+        first = await self.snapshots.page("today", 0)
+        await new_version()
+        self.assertIs(await self.snapshots.page("today", 0), first)
+
+    async def test_cursor_of_a_cached_page(self) -> None:
+        first = await self.snapshots.page("today", 0)
+        second = await self.snapshots.page_after("today", first.next_cursor)
+        self.assertIs(second, await self.snapshots.page("today", 1))
+        self.assertEqual(second.rows[0]["position"], 6)
+
+    async def test_cursor_from_an_older_snapshot(self) -> None:
+        page = await self.snapshots.page_after("today", encode_cursor((3, 8001)))
+        # Two players with two guesses and 8001 itself come before it
+        self.assertEqual(page.rows[0]["position"], 4)
+        self.assertEqual((page.rows[0]["guessCount"], page.rows[0]["discordId"]), (3, "8007"))
+
+    async def test_one_lock_per_board(self) -> None:
+        await self.snapshots.page("today", 1)
+        await self.snapshots.page("yesterday", 0)
+        await self.snapshots.page("today", 0)
+        self.assertEqual(set(self.snapshots._locks), {"today", "yesterday"})
+
+
+if __name__ == "__main__":
+    unittest.main()
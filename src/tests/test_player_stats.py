@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from backend.util.database_backend import database_backend
+from backend.website.player_stats import PlayerStats, player_stats
+from backend.website.splatdle import splatdle_days
+from backend.website.submission_queue import Submission, SubmissionQueue
+
+
+class TestPlayerStatsCache(unittest.IsolatedAsyncioTestCase):
+    """The read-through player stats cache on SQLite.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        player_stats.memory.clear()
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_non_players_are_cached(self) -> None:
+        self.assertIsNone(await player_stats.get(3001))
+        self.assertIsNone(player_stats.cached(3001))
+        hits = player_stats.stats()["hits"]
+        self.assertIsNone(await player_stats.get(3001))
+        self.assertEqual(player_stats.stats()["hits"], hits + 1)
+
+    async def test_put_is_served_without_the_database(self) -> None:
+        today = splatdle_days()[0]
+        player_stats.put(PlayerStats(3002, 4, 10, 40, today, 3))
+        stats = await player_stats.get("3002")
+        self.assertEqual((stats.stored_streak, stats.times_played, stats.todays_guess_count(today)), (4, 10, 3))
+
+    async def test_replay_drops_stats_read_before_it(self) -> None:
+        journal_path = os.path.join(tempfile.mkdtemp(prefix="sneaky-journal-"), "submissions.log")
+        played_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        with open(journal_path, "w", encoding="utf-8") as f:
+            f.write(Submission(3003, 1, 1, 5, 5, played_at).to_json() + "\n")
+        # Looked up while the result was only in the journal
+        self.assertIsNone(await player_stats.get(3003))
+
+        queue = SubmissionQueue(journal_path, flush_interval=3600, batch_size=100)
+        await queue.start()
+        try:
+            stats = await player_stats.get(3003)
+            self.assertEqual((stats.times_played, stats.total_guesses), (1, 5))
+        finally:
+            await queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
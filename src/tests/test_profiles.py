@@ -0,0 +1,68 @@
+import unittest
+from datetime import timedelta
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.profiles import ProfileCache, _utc_now
+
+
+async def stored_profile(discord_id: int):
+    """Read a profile's username, avatar and update time back from ``DiscordProfiles``.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.run("discord_profiles.by_id", (discord_id,))
+        row = await cur.fetchone()
+    return row[1:] if row else None
+
+
+class TestProfileCache(unittest.IsolatedAsyncioTestCase):
+    """Gateway refreshes of stored profiles on SQLite.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        self.cache = ProfileCache(capacity=100, ttl=3600)
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def store(self, discord_id: int, username: str, avatar: str, age: float = 0) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run("discord_profiles.upsert", (discord_id, username, avatar,
+                                                      _utc_now() - timedelta(seconds=age)))
+
+    async def test_unknown_user_is_remembered_as_missing(self) -> None:
+        self.assertFalse(await self.cache.refresh(2001, "nobody", None))
+        self.assertIsNone(await stored_profile(2001))
+        # Stored behind the cache's back, so only a database read would notice it
+        await self.store(2001, "nobody", None)
+        self.assertFalse(await self.cache.refresh(2001, "nobody", None))
+        # Lookups for rendering still read the database
+        self.assertEqual((await self.cache.get(2001)).username, "nobody")
+
+    async def test_unchanged_profile_is_not_written(self) -> None:
+        await self.store(2002, "inkling", "abc", age=60)
+        before = await stored_profile(2002)
+        self.assertTrue(await self.cache.refresh(2002, "inkling", "abc"))
+        self.assertEqual(await stored_profile(2002), before)
+        self.assertEqual((await self.cache.get(2002)).username, "inkling")
+
+    async def test_changed_profile_is_written(self) -> None:
+        await self.store(2003, "inkling", "abc", age=60)
+        self.assertTrue(await self.cache.refresh(2003, "octoling", "def"))
+        self.assertEqual((await stored_profile(2003))[:2], ("octoling", "def"))
+        self.assertEqual((await self.cache.get(2003)).username, "octoling")
+
+    async def test_stale_profile_is_rewritten(self) -> None:
+        await self.store(2004, "inkling", "abc", age=3000)
+        self.assertTrue(await self.cache.refresh(2004, "inkling", "abc"))
+        self.assertLess((await self.cache.get(2004)).age(), 60)
+
+    async def test_login_replaces_a_missing_entry(self) -> None:
+        self.assertFalse(await self.cache.refresh(2005, "inkling", None))
+        await self.cache.remember(2005, "inkling", None)
+        self.assertTrue(await self.cache.refresh(2005, "inkling", None))
+        self.assertEqual((await self.cache.get(2005)).username, "inkling")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import sqlite3
+import unittest
+from types import SimpleNamespace
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager, QueryCursor
+from backend.util.queries import query_registry
+from backend.util.query_registry import NamedQuery, QueryRegistry
+
+# Read MySQL's own catalogue, which SQLite has no equivalent of
+MYSQL_ONLY = {"game_results.partitions"}
+
+
+class FakeMySQLCursor:
+    """Records the statements a ``QueryCursor`` sends to MySQL.
+    """
+
+    def __init__(self) -> None:
+        self.statements = []
+        self.rowcount = 1
+
+    async def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+        return self.rowcount
+
+    async def nextset(self):
+        return None
+
+
+class TestQueryRegistry(unittest.TestCase):
+    """Registering and looking up named queries.
+    """
+
+    def test_register_and_get(self) -> None:
+        registry = QueryRegistry()
+        query = registry.register("things.by_id", """
+            SELECT id, name
+            FROM Things
+            WHERE id = %s AND name = %s
+        """, read_only=True)
+        self.assertIs(registry.get("things.by_id"), query)
+        self.assertEqual(query.sql, "SELECT id, name FROM Things WHERE id = %s AND name = %s")
+        self.assertEqual(query.prepared_sql, "SELECT id, name FROM Things WHERE id = ? AND name = ?")
+        self.assertEqual(query.statement_name, "stmt_things_by_id")
+        self.assertEqual(query.param_count, 2)
+        self.assertEqual(list(registry.all()), ["things.by_id"])
+
+    def test_duplicate_and_unknown_names(self) -> None:
+        registry = QueryRegistry()
+        registry.register("things.all", "SELECT id FROM Things")
+        with self.assertRaises(ValueError):
+            registry.register("things.all", "SELECT name FROM Things")
+        with self.assertRaises(KeyError):
+            registry.get("things.none")
+
+    def test_sqlite_variant(self) -> None:
+        query = NamedQuery("things.save", "REPLACE INTO Things VALUES (%s)",
+                           sqlite="INSERT OR REPLACE INTO Things VALUES (%s)")
+        self.assertEqual(query.sql_for("mysql"), "REPLACE INTO Things VALUES (%s)")
+        self.assertEqual(query.sql_for("sqlite"), "INSERT OR REPLACE INTO Things VALUES (?)")
+        self.assertEqual(NamedQuery("things.all", "SELECT id FROM Things").sql_for("sqlite"), "SELECT id FROM Things")
+
+    def test_stats_heaviest_first(self) -> None:
+        registry = QueryRegistry()
+        registry.record("fast", 0.001)
+        registry.record("slow", 0.5)
+        registry.record("fast", 0.002)
+        stats = registry.stats_by_total_time()
+        self.assertEqual(list(stats), ["slow", "fast"])
+        self.assertEqual(stats["fast"]["calls"], 2)
+        self.assertEqual(list(registry.stats_by_total_time(limit=1)), ["slow"])
+
+
+class TestPreparedStatements(unittest.IsolatedAsyncioTestCase):
+    """Server-side prepared statements as sent to MySQL.
+    """
+
+    async def test_statement_is_prepared_once_per_connection(self) -> None:
+        raw, con = FakeMySQLCursor(), SimpleNamespace()
+        cur = QueryCursor(raw, con, dialect="mysql")
+        query = query_registry.get("discord_profiles.by_id")
+        await cur._execute_prepared(query, (1,))
+        await cur._execute_prepared(query, (2,))
+        self.assertEqual(raw.statements, [
+            ("PREPARE stmt_discord_profiles_by_id FROM %s", (query.prepared_sql,)),
+            ("SET @p0 = %s; EXECUTE stmt_discord_profiles_by_id USING @p0", (1,)),
+            ("SET @p0 = %s; EXECUTE stmt_discord_profiles_by_id USING @p0", (2,)),
+        ])
+
+        # A new connection has to prepare it again
+        other = FakeMySQLCursor()
+        await QueryCursor(other, SimpleNamespace(), dialect="mysql")._execute_prepared(query, (3,))
+        self.assertEqual(other.statements[0][0], "PREPARE stmt_discord_profiles_by_id FROM %s")
+
+    async def test_statement_without_parameters(self) -> None:
+        raw = FakeMySQLCursor()
+        query = query_registry.get("game_results.first_day")
+        await QueryCursor(raw, SimpleNamespace(), dialect="mysql")._execute_prepared(query, ())
+        self.assertEqual(raw.statements[-1], ("EXECUTE stmt_game_results_first_day", None))
+
+
+class TestRegisteredQueries(unittest.IsolatedAsyncioTestCase):
+    """Every registered query against the SQLite schema.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_every_query_compiles_on_sqlite(self) -> None:
+        async with DBContextManager(caller="tests") as cur:
+            for name, query in query_registry.all().items():
+                if name in MYSQL_ONLY:
+                    continue
+                with self.subTest(name):
+                    try:
+                        await cur.execute("EXPLAIN " + query.sqlite_sql, (None,) * query.sqlite_sql.count("?"))
+                    except sqlite3.Error as e:
+                        self.fail(f"{name}: {e}")
+
+    async def test_read_only_cursor_refuses_writes(self) -> None:
+        async with DBContextManager(caller="tests", read_only=True) as cur:
+            await cur.run("global_stats.get")
+            with self.assertRaises(ValueError):
+                await cur.run("global_stats.add", (0, 0, 0, 0))
+            with self.assertRaises(ValueError):
+                await cur.run_many("user_stats.write_behind", [])
+
+    async def test_runs_are_counted(self) -> None:
+        calls = query_registry.stats.get("global_stats.get")
+        before = calls.calls if calls else 0
+        async with DBContextManager(caller="tests") as cur:
+            await cur.run("global_stats.get")
+        self.assertEqual(query_registry.stats["global_stats.get"].calls, before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import random
+import unittest
+from backend.website.rank_index import MAX_SCORE, FenwickTree, RankIndex, weighted_score
+
+
+class TestFenwickTree(unittest.TestCase):
+    """Prefix sums of the Fenwick tree against a plain list.
+    """
+
+    def test_prefix_sums_match_a_list(self) -> None:
+        rng = random.Random(7)
+        tree = FenwickTree(64)
+        counts = [0] * 64
+        for _ in range(500):
+            position, delta = rng.randrange(64), rng.choice((-1, 1, 2))
+            tree.add(position, delta)
+            counts[position] += delta
+        for end in range(66):
+            self.assertEqual(tree.prefix_sum(end), sum(counts[:end]))
+
+    def test_empty_prefix_is_zero(self) -> None:
+        tree = FenwickTree(8)
+        tree.add(0, 3)
+        self.assertEqual(tree.prefix_sum(0), 0)
+        self.assertEqual(tree.prefix_sum(1), 3)
+
+
+class TestRankIndex(unittest.TestCase):
+    """Ranks and percentiles from the in-memory leaderboard index.
+    """
+
+    def setUp(self) -> None:
+        self.index = RankIndex(sync_interval=60)
+
+    def test_weighted_score(self) -> None:
+        self.assertIsNone(weighted_score(0, 0))
+        self.assertAlmostEqual(weighted_score(4, 12), 5.0)
+
+    def test_lower_scores_rank_first_and_ties_share_a_rank(self) -> None:
+        self.index.update(1, 2.0)
+        self.index.update(2, 3.0)
+        self.index.update(3, 3.0)
+        self.assertEqual(self.index.rank(1), {"rank": 1, "players": 3, "percentile": 100.0})
+        self.assertEqual(self.index.rank(2), {"rank": 2, "players": 3, "percentile": 0.0})
+        self.assertEqual(self.index.rank(3)["rank"], 2)
+
+    def test_update_moves_a_player(self) -> None:
+        self.index.update(1, 2.0)
+        self.index.update(2, 3.0)
+        self.index.update(2, 1.0)
+        self.assertEqual(self.index.rank(2)["rank"], 1)
+        self.assertEqual(self.index.rank(1)["rank"], 2)
+        self.assertEqual(len(self.index.scores), 2)
+
+    def test_none_removes_a_player(self) -> None:
+        self.index.update(1, 2.0)
+        self.index.update(2, 3.0)
+        self.index.update(1, None)
+        self.assertIsNone(self.index.rank(1))
+        self.assertEqual(self.index.rank(2), {"rank": 1, "players": 1, "percentile": 100.0})
+
+    def test_string_ids_are_the_same_player(self) -> None:
+        self.index.update("5", 2.0)
+        self.index.update(5, 4.0)
+        self.assertEqual(len(self.index.scores), 1)
+        self.assertEqual(self.index.rank("5")["players"], 1)
+
+    def test_scores_past_the_maximum_share_the_last_rank(self) -> None:
+        self.index.update(1, 1.0)
+        self.index.update(2, MAX_SCORE * 2)
+        self.index.update(3, MAX_SCORE * 3)
+        self.assertEqual(self.index.rank(2)["rank"], 2)
+        self.assertEqual(self.index.rank(3)["rank"], 2)
+
+    def test_ranks_match_a_sort(self) -> None:
+        rng = random.Random(11)
+        for player_id in range(200):
+            self.index.update(player_id, round(rng.uniform(1, 12), 3))
+        scores = self.index.scores
+        for player_id, score in scores.items():
+            expected = 1 + sum(1 for other in scores.values() if self.index._bucket(other) < self.index._bucket(score))
+            self.assertEqual(self.index.rank(player_id)["rank"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
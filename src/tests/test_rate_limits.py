@@ -0,0 +1,138 @@
+import asyncio
+import time
+import unittest
+from typing import Any, Dict
+from aiohttp import test_utils, web
+from backend.util.http_client import HttpClient
+from backend.website.oauth.rate_limits import RateLimited, RateLimitedClient
+
+
+class FakeDiscord:
+    """A ``/users/@me`` endpoint with a per-token bucket of ``limit`` requests every ``window`` seconds.
+    """
+
+    def __init__(self, limit: int = 2, window: float = 0.3) -> None:
+        self.limit = limit
+        self.window = window
+        self.buckets: Dict[str, Dict[str, float]] = {}
+        self.hits = 0
+        self.rejected = 0
+        self.global_429s = 0
+        self.retry_after = None
+
+    async def token(self, request: web.Request) -> web.Response:
+        # Answers slowly and without any X-RateLimit-* headers
+        self.hits += 1
+        await asyncio.sleep(0.1)
+        return web.json_response({"access_token": "abc"})
+
+    async def users_me(self, request: web.Request) -> web.Response:
+        self.hits += 1
+        if self.global_429s:
+            self.global_429s -= 1
+            self.rejected += 1
+            return web.json_response({"retry_after": 0.1, "global": True}, status=429,
+                                     headers={"X-RateLimit-Global": "true"})
+        if self.retry_after is not None:
+            self.rejected += 1
+            return web.json_response({"retry_after": self.retry_after}, status=429)
+
+        now = time.monotonic()
+        bucket = self.buckets.setdefault(request.headers.get("Authorization", ""), {"remaining": 0, "reset": 0.0})
+        if now >= bucket["reset"]:
+            bucket["remaining"], bucket["reset"] = self.limit, now + self.window
+        if bucket["remaining"] <= 0:
+            self.rejected += 1
+            return web.json_response({"retry_after": bucket["reset"] - now}, status=429)
+        bucket["remaining"] -= 1
+        return web.json_response({"id": "1"}, headers={
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(int(bucket["remaining"])),
+            "X-RateLimit-Reset-After": str(bucket["reset"] - now),
+            "X-RateLimit-Bucket": "users-me",
+        })
+
+
+class TestRateLimitedClient(unittest.IsolatedAsyncioTestCase):
+    """Bucket tracking, queueing and 429 handling against a local server.
+    """
+
+    async def asyncSetUp(self) -> None:
+        self.discord = FakeDiscord()
+        app = web.Application()
+        app.router.add_get("/users/@me", self.discord.users_me)
+        app.router.add_post("/oauth2/token", self.discord.token)
+        self.server = test_utils.TestServer(app)
+        await self.server.start_server()
+        self.http = HttpClient(limit=10, limit_per_host=10, keepalive=30, dns_ttl=10, timeout=10)
+        self.client = RateLimitedClient(self.http)
+
+    async def asyncTearDown(self) -> None:
+        await self.http.close()
+        await self.server.close()
+
+    async def get_me(self, token: str = "token") -> Any:
+        return await self.client.request("GET", str(self.server.make_url("/users/@me")), route="/users/@me",
+                                         headers={"Authorization": f"Bearer {token}"})
+
+    async def test_burst_queues_instead_of_hitting_429(self) -> None:
+        started = time.monotonic()
+        results = await asyncio.gather(*(self.get_me() for _ in range(6)))
+        self.assertEqual(results, [(200, {"id": "1"})] * 6)
+        self.assertEqual(self.discord.rejected, 0)
+        self.assertEqual(self.discord.hits, 6)
+        self.assertGreater(self.client.queued, 0)
+        # Three windows of two requests each
+        self.assertGreaterEqual(time.monotonic() - started, 2 * self.discord.window)
+        self.assertEqual(self.client.stats()["waiting"], 0)
+
+    async def test_tokens_have_separate_buckets(self) -> None:
+        results = await asyncio.gather(*(self.get_me(f"token-{n}") for n in range(4)))
+        self.assertEqual(results, [(200, {"id": "1"})] * 4)
+        self.assertEqual(self.client.queued, 0)
+
+    async def test_route_without_limits_is_not_serialised(self) -> None:
+        url = str(self.server.make_url("/oauth2/token"))
+        await self.client.request("POST", url, route="/oauth2/token")
+        started = time.monotonic()
+        results = await asyncio.gather(*(self.client.request("POST", url, route="/oauth2/token") for _ in range(5)))
+        self.assertEqual(results, [(200, {"access_token": "abc"})] * 5)
+        # One at a time would take half a second
+        self.assertLess(time.monotonic() - started, 0.3)
+
+    async def test_429_is_retried_after_retry_after(self) -> None:
+        self.discord.retry_after = 0.1
+        asyncio.get_running_loop().call_later(0.05, setattr, self.discord, "retry_after", None)
+        self.assertEqual(await self.get_me(), (200, {"id": "1"}))
+        self.assertEqual(self.client.rate_limited, 1)
+
+    async def test_global_429_is_retried(self) -> None:
+        self.discord.global_429s = 1
+        started = time.monotonic()
+        self.assertEqual(await self.get_me(), (200, {"id": "1"}))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(self.client.rate_limited, 1)
+
+    async def test_global_limit_holds_back_a_fresh_token(self) -> None:
+        started = time.monotonic()
+        self.client._global_reset_at = started + 0.1
+        self.assertEqual(await self.get_me("fresh"), (200, {"id": "1"}))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(self.client.queued, 1)
+
+    async def test_long_wait_raises_rate_limited(self) -> None:
+        self.discord.retry_after = 60
+        with self.assertRaises(RateLimited) as raised:
+            await self.get_me()
+        self.assertGreater(raised.exception.retry_after, 10)
+        self.assertEqual(self.discord.hits, 1)
+
+    async def test_persistent_429_gives_up_after_retries(self) -> None:
+        self.discord.retry_after = 0.01
+        with self.assertRaises(RateLimited):
+            await self.get_me()
+        self.assertEqual(self.discord.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
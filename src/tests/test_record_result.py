@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from datetime import date, timedelta
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+
+DAY = date(2024, 5, 10)
+
+
+async def record(discord_id: int, guess_count: int, today: date) -> int:
+    """Record a game the way ``post_stats`` does and return the rows affected.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        return await cur.run("user_stats.record_result",
+                             (discord_id, guess_count, guess_count, today, today - timedelta(days=1)))
+
+
+async def stored(discord_id: int):
+    """Read a player's streak, games, guesses, average and last day back from ``UserStats``.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.execute("""
+            SELECT streak, times_played, total_guesses, average_guess_count, last_played_date
+            FROM UserStats
+            WHERE discord_id = %s
+        """, (discord_id,))
+        return await cur.fetchone()
+
+
+class TestRecordResult(unittest.IsolatedAsyncioTestCase):
+    """The single-statement ``user_stats.record_result`` upsert on SQLite.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+
+    async def asyncTearDown(self) -> None:
+        await database_backend.close()
+
+    async def test_first_game_creates_the_row(self) -> None:
+        self.assertEqual(await record(5001, 4, DAY), 1)
+        self.assertEqual(await stored(5001), (1, 1, 4, 4.0, DAY))
+
+    async def test_second_game_on_a_day_changes_nothing(self) -> None:
+        await record(5002, 4, DAY)
+        self.assertEqual(await record(5002, 9, DAY), 0)
+        self.assertEqual(await stored(5002), (1, 1, 4, 4.0, DAY))
+
+    async def test_next_day_carries_the_streak(self) -> None:
+        await record(5003, 4, DAY)
+        self.assertEqual(await record(5003, 2, DAY + timedelta(days=1)), 1)
+        self.assertEqual(await stored(5003), (2, 2, 6, 3.0, DAY + timedelta(days=1)))
+
+    async def test_missed_day_resets_the_streak(self) -> None:
+        await record(5004, 4, DAY)
+        await record(5004, 6, DAY + timedelta(days=1))
+        await record(5004, 5, DAY + timedelta(days=3))
+        self.assertEqual(await stored(5004), (1, 3, 15, 5.0, DAY + timedelta(days=3)))
+
+    async def test_concurrent_submissions_record_one_game(self) -> None:
+        affected = await asyncio.gather(*(record(5005, guess_count, DAY) for guess_count in (3, 4, 5, 6)))
+        self.assertEqual(sorted(affected), [0, 0, 0, 1])
+        streak, times_played, total_guesses = (await stored(5005))[:3]
+        self.assertEqual((streak, times_played), (1, 1))
+        self.assertIn(total_guesses, (3, 4, 5, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
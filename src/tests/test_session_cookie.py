@@ -0,0 +1,52 @@
+import unittest
+from backend.website.oauth.session_cookie import SessionSigner
+
+USER = {"id": 1234, "username": "inkling", "avatar": "abc123"}
+
+
+class TestSessionSigner(unittest.TestCase):
+    """Issuing and checking signed session cookies.
+    """
+
+    def setUp(self) -> None:
+        self.signer = SessionSigner("secret", ttl=3600, refresh_before=300)
+
+    def test_round_trip(self) -> None:
+        session = self.signer.verify(self.signer.issue(USER))
+        self.assertEqual(session["id"], "1234")
+        self.assertEqual(session["username"], "inkling")
+        self.assertEqual(session["avatar"], "abc123")
+        self.assertFalse(self.signer.needs_refresh(session))
+
+    def test_tampered_payload_is_rejected(self) -> None:
+        other = self.signer.issue({**USER, "id": 9999})
+        payload, _ = other.split(".")
+        _, signature = self.signer.issue(USER).split(".")
+        self.assertIsNone(self.signer.verify(f"{payload}.{signature}"))
+
+    def test_other_key_is_rejected(self) -> None:
+        cookie = SessionSigner("another secret", ttl=3600, refresh_before=300).issue(USER)
+        self.assertIsNone(self.signer.verify(cookie))
+
+    def test_expired_session_is_rejected(self) -> None:
+        expired = SessionSigner("secret", ttl=-1, refresh_before=300)
+        self.assertIsNone(self.signer.verify(expired.issue(USER)))
+
+    def test_malformed_cookies_are_rejected(self) -> None:
+        for cookie in (None, "", "no-dot", "a.b.c", "!!!.!!!"):
+            self.assertIsNone(self.signer.verify(cookie), cookie)
+
+    def test_session_near_expiry_needs_refresh(self) -> None:
+        signer = SessionSigner("secret", ttl=200, refresh_before=300)
+        self.assertTrue(signer.needs_refresh(signer.verify(signer.issue(USER))))
+
+    def test_without_a_secret_only_this_signer_accepts(self) -> None:
+        signer = SessionSigner(None, ttl=3600, refresh_before=300)
+        with self.assertLogs("webserver", level="WARNING"):
+            cookie = signer.issue(USER)
+        self.assertIsNotNone(signer.verify(cookie))
+        self.assertIsNone(SessionSigner(None, ttl=3600, refresh_before=300).verify(cookie))
+
+
+if __name__ == "__main__":
+    unittest.main()
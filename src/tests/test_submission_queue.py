@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from backend.util.database_backend import database_backend
+from backend.util.database_context_manager import DBContextManager
+from backend.website.splatdle import splatdle_days
+from backend.website.submission_queue import Submission, SubmissionQueue
+
+
+async def stored_stats(discord_id: int):
+    """Read a player's streak, games, guesses and last day back from ``UserStats``.
+    """
+    async with DBContextManager(caller="tests") as cur:
+        await cur.run("user_stats.submission", (discord_id,))
+        return await cur.fetchone()
+
+
+class TestSubmissionQueue(unittest.IsolatedAsyncioTestCase):
+    """Journaling, replay and compaction of the write-behind queue on SQLite.
+
+    Every test uses its own Discord IDs, as they share one database file.
+    """
+
+    async def asyncSetUp(self) -> None:
+        await database_backend.init()
+        self.journal_path = os.path.join(tempfile.mkdtemp(prefix="sneaky-journal-"), "submissions.log")
+        self.queue = SubmissionQueue(self.journal_path, flush_interval=3600, batch_size=100)
+
+    async def asyncTearDown(self) -> None:
+        await self.queue.close()
+        await database_backend.close()
+
+    def journal_lines(self):
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            return [line for line in f if line.strip()]
+
+    async def test_string_and_int_ids_are_one_player(self) -> None:
+        await self.queue.start()
+        already_played, first = await self.queue.submit("1001", 3)
+        self.assertFalse(already_played)
+        already_played, second = await self.queue.submit(1001, 5)
+        self.assertTrue(already_played)
+        self.assertIs(second, first)
+        self.assertEqual(len(self.journal_lines()), 1)
+
+    async def test_flush_writes_and_compacts_the_journal(self) -> None:
+        await self.queue.start()
+        await self.queue.submit(1002, 4)
+        self.assertEqual(len(self.journal_lines()), 1)
+        await self.queue.flush()
+        self.assertEqual(self.queue.pending, {})
+        self.assertEqual(self.journal_lines(), [])
+        streak, times_played, total_guesses, last_played = (await stored_stats(1002))[:4]
+        self.assertEqual((streak, times_played, total_guesses), (1, 1, 4))
+        self.assertEqual(last_played, splatdle_days()[0])
+
+    async def test_replay_writes_journaled_results_once(self) -> None:
+        played_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        line = Submission(1003, 1, 1, 6, 6, played_at).to_json() + "\n"
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            # A line cut short by a crash is skipped
+            f.write(line + line[:20])
+        await self.queue.start()
+        self.assertEqual(self.queue.pending, {})
+        self.assertEqual(self.journal_lines(), [])
+        self.assertEqual((await stored_stats(1003))[:3], (1, 1, 6))
+
+        # Replaying the same result again, as after a crash mid-flush, leaves the stats alone
+        await self.queue.close()
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.write(line)
+        self.queue = SubmissionQueue(self.journal_path, flush_interval=3600, batch_size=100)
+        await self.queue.start()
+        self.assertEqual((await stored_stats(1003))[:3], (1, 1, 6))
+
+    async def test_replayed_player_is_not_accepted_twice(self) -> None:
+        played_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.write(Submission(1004, 1, 1, 2, 2, played_at).to_json() + "\n")
+        # Replayed without starting, as when the startup flush fails
+        self.queue._replay()
+        self.queue._journal = open(self.journal_path, "a", encoding="utf-8")
+        already_played, stats = await self.queue.submit("1004", 7)
+        self.assertTrue(already_played)
+        self.assertEqual(stats.guess_count, 2)
+
+    async def test_submissions_during_compaction_are_kept(self) -> None:
+        self.queue.batch_size = 2
+        await self.queue.start()
+        discord_ids = range(1100, 1140)
+        results = await asyncio.gather(*(self.queue.submit(discord_id, 3) for discord_id in discord_ids),
+                                       *(self.queue.flush() for _ in range(10)))
+        self.assertTrue(all(not already_played for already_played, _ in results[:len(discord_ids)]))
+        await self.queue.flush()
+        self.assertEqual(self.journal_lines(), [])
+        for discord_id in discord_ids:
+            self.assertIsNotNone(await stored_stats(discord_id), discord_id)
+
+
+if __name__ == "__main__":
+    unittest.main()